@@ -1,5 +1,7 @@
 import logging
 import os
+from datetime import timedelta
+
 from homeassistant.helpers import config_validation as cv
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
@@ -14,16 +16,67 @@ from .const import (
     CONF_AUTO_VOICE_LABEL,
     CONF_ENABLE_USER_ASSIGN,
     CONF_DETAILED_RESPONSE,
+    CONF_POOL_SIZE,
+    CONF_KEEPALIVE_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    CONF_COMMAND_TIMEOUT,
+    CONF_PROMPT_BUDGET,
+    DEFAULT_PROMPT_BUDGET,
+    CONF_PROMPT_ENCODING,
+    DEFAULT_PROMPT_ENCODING,
+    CONF_COMPACT_OUTPUT,
+    CONF_FAST_PATH,
+    CONF_PARSE_CACHE_SIZE,
+    DEFAULT_PARSE_CACHE_SIZE,
+    CONF_PARSE_CACHE_PERSIST,
+    DEFAULT_COMMAND_TIMEOUT,
+    CONF_RATE_LIMIT,
+    CONF_RATE_BURST,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_BURST,
+    CONF_OUTBOX,
+    CONF_METADATA_TTL,
+    DEFAULT_METADATA_TTL,
+    CONF_WEBHOOK_SECRET,
+    WEBHOOK_METADATA_TTL,
+    WEBHOOK_USER_CACHE_REFRESH_HOURS,
+    DATA_RUNTIME,
+    HEALTH_PROBE_INTERVAL_SECONDS,
+)
+from .api.vikunja_api import VikunjaAPI
+from .api.homeassistant_llm_api import AITaskCapabilities, HomeAssistantLLMAPI
+from .helpers.circuit_breaker import CircuitBreaker
+from .helpers.scheduler import (
+    PRIORITY_BACKGROUND,
+    RequestScheduler,
+    request_priority,
 )
+from .metadata_cache import MetadataCache
+from .helpers.fast_path import FastPathParser
+from .helpers.fuzzy_resolver import FuzzyResolver
+from .helpers.prompt_budget import RecentUsage
+from .parse_cache import ParseCache
+from .snapshot import MetadataSnapshotStore
+from .voice_label import VoiceLabelResolver
+from .webhook import (
+    VikunjaWebhookProcessor,
+    async_register_webhook,
+    ensure_webhook_id,
+)
+from .runtime import VikunjaRuntimeData
 from .services import setup_services
 from .user_cache import VikunjaUserCacheManager
 from .intents import register_intents
+from .outbox import VikunjaOutbox
 
 _LOGGER = logging.getLogger(__name__)
 
 # Integration uses config entries only, but hassfest expects a CONFIG_SCHEMA when async_setup exists
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
+PLATFORMS = ["binary_sensor", "sensor"]
+
 
 def copy_custom_sentences(hass: HomeAssistant) -> None:
     """Copy bundled custom sentences into Home Assistant's expected directory.
@@ -73,13 +126,135 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         CONF_AUTO_VOICE_LABEL: entry.data.get(CONF_AUTO_VOICE_LABEL, True),
         CONF_ENABLE_USER_ASSIGN: entry.data.get(CONF_ENABLE_USER_ASSIGN, False),
         CONF_DETAILED_RESPONSE: entry.data.get(CONF_DETAILED_RESPONSE, True),
+        CONF_COMMAND_TIMEOUT: entry.options.get(
+            CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT
+        ),
+        CONF_PROMPT_BUDGET: entry.options.get(
+            CONF_PROMPT_BUDGET, DEFAULT_PROMPT_BUDGET
+        ),
+        CONF_PROMPT_ENCODING: entry.options.get(
+            CONF_PROMPT_ENCODING, DEFAULT_PROMPT_ENCODING
+        ),
+        CONF_COMPACT_OUTPUT: entry.options.get(CONF_COMPACT_OUTPUT, False),
+        CONF_FAST_PATH: entry.options.get(CONF_FAST_PATH, False),
     }
 
+    # Per-backend circuit breakers; their state is the cached backend health
+    vikunja_breaker = CircuitBreaker("Vikunja")
+    llm_breaker = CircuitBreaker("AI Task")
+
+    # One long-lived client per entry, shared by every code path; requests
+    # are admitted by priority so voice commands overtake background refreshes
+    pool_size = entry.options.get(CONF_POOL_SIZE, DEFAULT_POOL_SIZE)
+    scheduler = RequestScheduler(
+        rate=entry.options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+        burst=entry.options.get(CONF_RATE_BURST, DEFAULT_RATE_BURST),
+        max_concurrent=pool_size,
+    )
+    vikunja_api = VikunjaAPI.with_connection_pool(
+        hass,
+        entry.data[CONF_VIKUNJA_URL],
+        entry.data[CONF_VIKUNJA_API_KEY],
+        pool_size=pool_size,
+        keepalive_timeout=entry.options.get(
+            CONF_KEEPALIVE_TIMEOUT, DEFAULT_KEEPALIVE_TIMEOUT
+        ),
+        breaker=vikunja_breaker,
+        scheduler=scheduler,
+    )
+    entry.async_on_unload(vikunja_api.async_close)
+    vikunja_breaker.probe = vikunja_api.ping
+    llm_breaker.probe = HomeAssistantLLMAPI(
+        hass, entry.data[CONF_AI_TASK_ENTITY]
+    ).async_is_available
+
     # User cache manager (optional feature)
-    user_cache_manager = VikunjaUserCacheManager(hass)
+    user_cache_manager = VikunjaUserCacheManager(hass, vikunja_api)
     await user_cache_manager.load()
+
+    # Projects/labels served from memory, revalidated in the background
+    metadata_ttl = entry.options.get(CONF_METADATA_TTL, DEFAULT_METADATA_TTL)
+    webhook_secret = entry.options.get(CONF_WEBHOOK_SECRET, "")
+    if webhook_secret:
+        # Webhooks keep the caches current; polling becomes a slow safety net
+        metadata_ttl = max(metadata_ttl, WEBHOOK_METADATA_TTL)
+        user_cache_manager.refresh_hours = WEBHOOK_USER_CACHE_REFRESH_HOURS
+    metadata_cache = MetadataCache(hass, vikunja_api, ttl=metadata_ttl)
+
+    webhook_processor = None
+    if webhook_secret:
+        webhook_processor = VikunjaWebhookProcessor(
+            webhook_secret, metadata_cache, user_cache_manager
+        )
+        entry.async_on_unload(
+            async_register_webhook(
+                hass, entry, webhook_processor, ensure_webhook_id(hass, entry)
+            )
+        )
+
+    voice_label = VoiceLabelResolver(vikunja_api, metadata_cache)
+
+    # Warm start: seed caches from the last snapshot, keep it up to date
+    snapshot_store = MetadataSnapshotStore(
+        hass, metadata_cache, user_cache_manager, voice_label=voice_label
+    )
+    await snapshot_store.async_load()
+    entry.async_on_unload(metadata_cache.add_listener(snapshot_store.schedule_save))
+    entry.async_on_unload(user_cache_manager.add_listener(snapshot_store.schedule_save))
+    entry.async_on_unload(voice_label.add_listener(snapshot_store.schedule_save))
+    entry.async_on_unload(snapshot_store.async_flush)
+    metadata_cache.revalidate()
+    if hass.data[DOMAIN][CONF_AUTO_VOICE_LABEL] and voice_label.label_id is None:
+        # Resolve before the first command instead of during it
+        with request_priority(PRIORITY_BACKGROUND):
+            hass.async_create_background_task(
+                voice_label.resolve(), "vikunja_resolve_voice_label"
+            )
+
+    # Optional write-ahead outbox: tasks are acknowledged once persisted and
+    # written to Vikunja by a background worker (replays survive restarts)
+    outbox = None
+    if entry.options.get(CONF_OUTBOX, False):
+        outbox = VikunjaOutbox(
+            hass, vikunja_api, breaker=vikunja_breaker, voice_label=voice_label
+        )
+        await outbox.load()
+        entry.async_on_unload(outbox.start())
+
+    # Optional cache of LLM parse results for repeated commands
+    parse_cache = None
+    parse_cache_size = entry.options.get(
+        CONF_PARSE_CACHE_SIZE, DEFAULT_PARSE_CACHE_SIZE
+    )
+    if parse_cache_size > 0:
+        if entry.options.get(CONF_PARSE_CACHE_PERSIST, False):
+            parse_cache = ParseCache.persisted(hass, parse_cache_size)
+            await parse_cache.async_load()
+            entry.async_on_unload(parse_cache.async_flush)
+        else:
+            parse_cache = ParseCache(hass, parse_cache_size)
+
+    entry.runtime_data = VikunjaRuntimeData(
+        api=vikunja_api,
+        user_cache=user_cache_manager,
+        vikunja_breaker=vikunja_breaker,
+        llm_breaker=llm_breaker,
+        outbox=outbox,
+        metadata=metadata_cache,
+        snapshot=snapshot_store,
+        webhook=webhook_processor,
+        voice_label=voice_label,
+        usage=RecentUsage(),
+        resolver=FuzzyResolver(),
+        llm_capabilities=AITaskCapabilities(),
+        fast_path=FastPathParser(),
+        parse_cache=parse_cache,
+    )
+    hass.data[DOMAIN][DATA_RUNTIME] = entry.runtime_data
+    entry.async_on_unload(_schedule_health_probes(hass, entry.runtime_data))
+
     if hass.data[DOMAIN].get(CONF_ENABLE_USER_ASSIGN):
-        user_cache_manager.schedule_periodic_refresh()
+        entry.async_on_unload(user_cache_manager.schedule_periodic_refresh())
         if not user_cache_manager.data.users:
             hass.async_create_task(user_cache_manager.refresh(force=True))
 
@@ -97,6 +272,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             DOMAIN, "refresh_user_cache", _handle_refresh_users
         )
 
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
     # Copy bundled custom sentences (all languages) into HA config dir before reload
     try:
         await hass.async_add_executor_job(copy_custom_sentences, hass)
@@ -108,6 +286,30 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     return True
 
 
+def _schedule_health_probes(hass: HomeAssistant, runtime: VikunjaRuntimeData):
+    """Periodically re-check unhealthy backends so breakers close on recovery."""
+    from homeassistant.helpers.event import async_track_time_interval
+
+    async def _probe(_now):  # noqa: D401
+        await runtime.vikunja_breaker.async_probe()
+        await runtime.llm_breaker.async_probe()
+
+    return async_track_time_interval(
+        hass, _probe, timedelta(seconds=HEALTH_PROBE_INTERVAL_SECONDS)
+    )
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so changed options (pool size, keep-alive) apply."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
-    """Unload a config entry (placeholder for future cleanup)."""
-    return True
+    """Unload a config entry; the shared client is closed via async_on_unload."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    domain_data = hass.data.get(DOMAIN, {})
+    if unload_ok and domain_data.get(DATA_RUNTIME) is getattr(
+        entry, "runtime_data", None
+    ):
+        domain_data.pop(DATA_RUNTIME, None)
+    return unload_ok
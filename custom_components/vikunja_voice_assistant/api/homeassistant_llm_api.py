@@ -1,25 +1,157 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import voluptuous as vol
 from homeassistant.core import HomeAssistant
 
+from ..const import PROMPT_ENCODING_JSON
+from ..helpers.circuit_breaker import CircuitBreaker, retry_with_backoff
+from ..helpers.fuzzy_resolver import FuzzyResolver
+from ..helpers.metadata_index import MetadataIndex
+from ..helpers.prompt_budget import RecentUsage
 from ..helpers.prompt_builder import build_task_creation_messages
+from ..helpers.task_schema import (
+    expand_short_keys,
+    normalize_structured_task,
+    task_structure,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class AITaskCapabilities:
+    """Structured-output support per AI Task entity, detected once.
+
+    Owned by the config entry so the per-command clients share it; a reload
+    (e.g. after a Home Assistant upgrade) detects again.
+    """
+
+    def __init__(self) -> None:
+        self._structured: Dict[str, bool] = {}
+
+    def structured_output(self, entity_id: str) -> Optional[bool]:
+        """True/False once known, None before the first detection."""
+        return self._structured.get(entity_id)
+
+    def set_structured_output(self, entity_id: str, supported: bool) -> None:
+        if self._structured.get(entity_id) != supported:
+            _LOGGER.debug(
+                "AI Task entity %s structured output: %s", entity_id, supported
+            )
+        self._structured[entity_id] = supported
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"structured_output": dict(self._structured)}
+
+
 class HomeAssistantLLMAPI:
     """Interface to Home Assistant's AI task pipeline."""
 
     _DEFAULT_TASK_NAME = "Generate Vikunja task"
 
-    def __init__(self, hass: HomeAssistant, entity_id: str) -> None:
+    _LLM_RETRY_ATTEMPTS = 2
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entity_id: str,
+        breaker: Optional[CircuitBreaker] = None,
+        capabilities: Optional[AITaskCapabilities] = None,
+    ) -> None:
         """Store Home Assistant instance and target AI task entity."""
         self._hass = hass
         self._entity_id = entity_id.strip()
+        self._breaker = breaker
+        self._capabilities = capabilities or AITaskCapabilities()
+
+    async def async_is_available(self) -> bool:
+        """Health probe: the AI Task entity exists and is not unavailable."""
+        state = self._hass.states.get(self._entity_id)
+        return state is not None and state.state != "unavailable"
+
+    @staticmethod
+    def _is_transient(err: BaseException) -> bool:
+        return isinstance(err, (asyncio.TimeoutError, ConnectionError))
+
+    def _supports_structured_output(self, structure: Dict[str, Any]) -> bool:
+        """Whether to send `structure`; detected once per entity.
+
+        The generate_data service schema of Home Assistant versions without
+        structured output rejects the key, so it is validated against the
+        registered schema instead of spending an LLM call on it. When the
+        schema cannot be inspected, the first call finds out.
+        """
+        known = self._capabilities.structured_output(self._entity_id)
+        if known is not None:
+            return known
+        services = getattr(self._hass.services, "async_services_for_domain", None)
+        if services is None:
+            return True
+        service = services("ai_task").get("generate_data")
+        if service is None:
+            supported = False
+        elif getattr(service, "schema", None) is None:
+            supported = True
+        else:
+            try:
+                service.schema(
+                    {
+                        "entity_id": self._entity_id,
+                        "task_name": self._DEFAULT_TASK_NAME,
+                        "instructions": self._DEFAULT_TASK_NAME,
+                        "structure": structure,
+                    }
+                )
+            except vol.Invalid as err:
+                _LOGGER.info(
+                    "ai_task.generate_data does not accept a structure (%s); "
+                    "parsing task JSON from text output",
+                    err,
+                )
+                supported = False
+            else:
+                supported = True
+        self._capabilities.set_structured_output(self._entity_id, supported)
+        return supported
+
+    async def _async_generate(self, payload: Dict[str, Any]) -> Any:
+        return await retry_with_backoff(
+            lambda: self._hass.services.async_call(
+                "ai_task",
+                "generate_data",
+                payload,
+                blocking=True,
+                return_response=True,
+            ),
+            attempts=self._LLM_RETRY_ATTEMPTS,
+            is_transient=self._is_transient,
+        )
+
+    async def _async_generate_task(
+        self, payload: Dict[str, Any], structure: Optional[Dict[str, Any]]
+    ) -> Tuple[Any, bool]:
+        """Call generate_data, with `structure` when given; (response, structured)."""
+        if structure is not None:
+            try:
+                response = await self._async_generate(
+                    {**payload, "structure": structure}
+                )
+            except vol.Invalid as err:
+                # Schema said yes but the call did not; do not try again
+                _LOGGER.warning(
+                    "AI Task entity %s rejected the task structure (%s); "
+                    "falling back to text output",
+                    self._entity_id,
+                    err,
+                )
+                self._capabilities.set_structured_output(self._entity_id, False)
+            else:
+                return response, True
+        return await self._async_generate(payload), False
 
     async def create_task_from_description(
         self,
@@ -30,8 +162,20 @@ class HomeAssistantLLMAPI:
         voice_correction: bool = False,
         users: Optional[List[Dict[str, Any]]] = None,
         enable_user_assignment: bool = False,
+        timeout: Optional[float] = None,
+        index: Optional[MetadataIndex] = None,
+        prompt_budget: int = 0,
+        usage: Optional[RecentUsage] = None,
+        resolver: Optional[FuzzyResolver] = None,
+        prompt_encoding: str = PROMPT_ENCODING_JSON,
+        compact_output: bool = False,
     ) -> Optional[Dict[str, Any]]:
-        """Use HA's LLM pipeline to transform a natural language description into task data."""
+        """Use HA's LLM pipeline to transform a natural language description into task data.
+
+        `timeout` bounds the whole generate_data call including retries; it is
+        the remaining budget of the voice command. `compact_output` asks for
+        short keys, which `_parse_llm_response` expands again.
+        """
         if not self._entity_id:
             _LOGGER.error("No AI Task entity configured for Vikunja voice assistant")
             return None
@@ -44,6 +188,12 @@ class HomeAssistantLLMAPI:
             voice_correction,
             users,
             enable_user_assignment,
+            index=index,
+            budget=prompt_budget,
+            usage=usage,
+            resolver=resolver,
+            encoding=prompt_encoding,
+            compact_output=compact_output,
         )
         prompt = self._format_messages_to_prompt(messages)
 
@@ -53,23 +203,48 @@ class HomeAssistantLLMAPI:
             "instructions": prompt,
         }
 
-        try:
-            response = await self._hass.services.async_call(
-                "ai_task",
-                "generate_data",
-                request_payload,
-                blocking=True,
-                return_response=True,
+        structure = task_structure(enable_user_assignment, compact_output)
+        if not self._supports_structured_output(structure):
+            structure = None
+
+        breaker = self._breaker
+        if breaker is not None and not breaker.allow_request():
+            _LOGGER.error(
+                "AI Task backend circuit open; retry in %.0fs", breaker.retry_in
             )
+            return None
+
+        budget = asyncio.timeout(timeout)
+        try:
+            async with budget:
+                response, structured = await self._async_generate_task(
+                    request_payload, structure
+                )
+        except asyncio.TimeoutError as err:
+            if budget.expired():
+                # The voice command ran out of time, which says nothing
+                # about the backend's health: not a breaker failure
+                _LOGGER.error(
+                    "LLM service call exceeded the remaining %.1fs", timeout or 0
+                )
+                return None
+            _LOGGER.error("LLM service call timed out: %s", err)
+            if breaker is not None:
+                breaker.record_failure(err)
+            return None
         except Exception as err:  # noqa: BLE001
             _LOGGER.error("LLM service call failed: %s", err)
+            if breaker is not None:
+                breaker.record_failure(err)
             return None
+        if breaker is not None:
+            breaker.record_success()
 
         if not response:
             _LOGGER.error("Empty response from Home Assistant LLM service")
             return None
 
-        task_data = self._parse_llm_response(response)
+        task_data = self._parse_llm_response(response, structured)
         if task_data is None:
             _LOGGER.error("Failed to extract structured task data from LLM response")
             return None
@@ -80,14 +255,35 @@ class HomeAssistantLLMAPI:
         )
         return {"task_data": task_data}
 
-    def _parse_llm_response(self, response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Extract structured task data from ai_task.generate_data response."""
+    def _parse_llm_response(
+        self, response: Dict[str, Any], structured: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Extract structured task data from ai_task.generate_data response.
+
+        With `structured`, `data` is the task itself; anything else falls
+        back to finding JSON in the text fields. Short keys of the compact
+        output contract are expanded to the Vikunja field names.
+        """
         if not response:
             return None
 
         response_block = response.get("response")
         data_block = response.get("data")
 
+        if structured:
+            if not isinstance(data_block, dict):
+                # A one-off text answer; only a rejected structure
+                # (vol.Invalid) turns structured output off
+                _LOGGER.debug(
+                    "AI Task entity %s returned unstructured data", self._entity_id
+                )
+            else:
+                task_data = expand_short_keys(data_block)
+                if "title" in task_data:
+                    return self._validate_task_data(
+                        normalize_structured_task(task_data)
+                    )
+
         # Some providers may already supply structured data.
         if isinstance(data_block, dict):
             parsed = data_block.get("parsed")
@@ -118,10 +314,13 @@ class HomeAssistantLLMAPI:
 
         return None
 
-    def _validate_task_data(self, task_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _validate_task_data(
+        self, task_data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
         """Perform minimal validation on parsed JSON payload."""
         if not isinstance(task_data, dict):
             return None
+        task_data = expand_short_keys(task_data)
         if not task_data.get("title"):
             _LOGGER.error("LLM response missing required 'title' field")
             return None
@@ -172,4 +371,4 @@ class HomeAssistantLLMAPI:
             else:
                 prefix = "User"
             segments.append(f"{prefix}: {content}")
-        return "\n\n".join(segments)
\ No newline at end of file
+        return "\n\n".join(segments)
@@ -1,167 +1,635 @@
+from __future__ import annotations
+
+import asyncio
 import logging
-import requests
+import re
 import secrets
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import aiohttp
+
+from ..const import DEFAULT_KEEPALIVE_TIMEOUT, DEFAULT_POOL_SIZE, RETRY_ATTEMPTS
+from ..helpers.circuit_breaker import CircuitBreaker, retry_with_backoff
+from ..helpers.records import (
+    LabelRecord,
+    ProjectRecord,
+    RecordStreamDecoder,
+    UserRecord,
+    json_loads,
+)
+from ..helpers.scheduler import RequestScheduler, current_priority
+from ..helpers.single_flight import SingleFlight
 
 _LOGGER = logging.getLogger(__name__)
 
+REQUEST_TIMEOUT = 30
+TOTAL_PAGES_HEADER = "x-pagination-total-pages"
+PAGE_PREFETCH = 2  # pages requested ahead of the consumer in iter_pages
+STREAM_CHUNK_SIZE = 16 * 1024
+# Older servers drop labels/assignees sent with the create call; newer ones
+# are still verified against each created task.
+EMBEDDED_CREATE_MIN_VERSION = (0, 22, 0)
+_VERSION_RE = re.compile(r"(\d+)\.(\d+)\.(\d+)")
+_UNSET = object()
+
+RecordFactory = Callable[[Any], Any]
+
+
+class VikunjaRequestError(Exception):
+    """Raised when a Vikunja request fails (transport error or error status)."""
+
+    def __init__(
+        self, message: str, status: Optional[int] = None, body: Optional[str] = None
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+    @property
+    def transient(self) -> bool:
+        """Whether retrying later may succeed (transport error, 408, 429 or 5xx)."""
+        return self.status is None or self.status in (408, 429) or self.status >= 500
+
+    @property
+    def rejected(self) -> bool:
+        """Whether the server refused the request's content (400, 404 or 422)."""
+        return self.status in (400, 404, 422)
+
+
+def _is_transient(err: BaseException) -> bool:
+    return isinstance(err, VikunjaRequestError) and err.transient
+
+
+@dataclass
+class _ConditionalEntry:
+    """Last decoded body of a GET together with its cache validators."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    data: Any
+    headers: Mapping[str, str]
+    size: int
+    decode_seconds: float
+
+    def request_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class ConditionalStats:
+    """Counters for conditional GETs on metadata endpoints."""
+
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+    decode_seconds_saved: float = 0.0
+
+    def record_hit(self, entry: _ConditionalEntry) -> None:
+        self.hits += 1
+        self.bytes_saved += entry.size
+        self.decode_seconds_saved += entry.decode_seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "bytes_saved": self.bytes_saved,
+            "decode_ms_saved": round(self.decode_seconds_saved * 1000, 2),
+        }
+
+
+@dataclass
+class EnrichmentResult:
+    """Outcome of attaching labels and assignees to a created task."""
+
+    task_id: int
+    attached_labels: List[int] = field(default_factory=list)
+    failed_labels: List[int] = field(default_factory=list)
+    assigned_users: List[int] = field(default_factory=list)
+    failed_users: List[int] = field(default_factory=list)
+    used_bulk: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed_labels and not self.failed_users
+
 
 class VikunjaAPI:
-    def __init__(self, url, vikunja_api_key):
+    """Async Vikunja REST client running on an aiohttp session."""
+
+    def __init__(
+        self,
+        hass,
+        url,
+        vikunja_api_key,
+        session: Optional[aiohttp.ClientSession] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        scheduler: Optional[RequestScheduler] = None,
+    ):
         self.url = url.rstrip("/")
         self.api_token = vikunja_api_key
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {vikunja_api_key}",
         }
+        if session is None:
+            from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-    def test_connection(self):
-        """Simple connectivity check by listing projects."""
+            session = async_get_clientsession(hass)
+        self._session = session
+        self._owns_session = False
+        self._breaker = breaker
+        self.scheduler = scheduler
+        self._timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        self._server_version: Any = _UNSET
+        # Whether create honours embedded labels/assignees; None = not yet known
+        self._embedded_create: Optional[bool] = None
+        # Bulk endpoint availability per kind ("labels" / "assignees"); None = unknown
+        self._bulk_supported: Dict[str, Optional[bool]] = {}
+        self._conditional_cache: Dict[Tuple[str, Tuple], _ConditionalEntry] = {}
+        self.conditional_stats = ConditionalStats()
+        self._single_flight = SingleFlight()
+
+    @classmethod
+    def with_connection_pool(
+        cls,
+        hass,
+        url,
+        vikunja_api_key,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        breaker: Optional[CircuitBreaker] = None,
+        scheduler: Optional[RequestScheduler] = None,
+    ) -> "VikunjaAPI":
+        """Create a client owning a dedicated keep-alive connection pool.
+
+        Connections to Vikunja are reused across calls, so the TCP/TLS
+        handshake is paid once per pooled connection rather than per request.
+        The caller must release the pool with `async_close`.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=pool_size,
+            limit_per_host=pool_size,
+            keepalive_timeout=keepalive_timeout,
+        )
+        api = cls(
+            hass,
+            url,
+            vikunja_api_key,
+            session=aiohttp.ClientSession(connector=connector),
+            breaker=breaker,
+            scheduler=scheduler,
+        )
+        api._owns_session = True
+        return api
+
+    async def async_close(self) -> None:
+        """Close the connection pool if this client owns it."""
+        if self._owns_session and not self._session.closed:
+            await self._session.close()
+
+    # --- Transport ---
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        conditional: bool = False,
+        record: Optional[RecordFactory] = None,
+    ) -> Tuple[Any, Mapping[str, str]]:
+        """Perform a request; identical concurrent GETs share one request.
+
+        Callers awaiting the same path and params get the same (read-only)
+        decoded body. Only callers of the same priority share a request, so
+        a voice command never waits behind a background refresh queued at
+        the lower priority.
+        """
+        if method != "GET":
+            return await self._send_guarded(
+                method, path, params, json, conditional, record
+            )
+        key = (
+            path,
+            tuple(sorted((params or {}).items())),
+            conditional,
+            record,
+            current_priority(),
+        )
+        return await self._single_flight.run(
+            key,
+            lambda: self._send_guarded(method, path, params, json, conditional, record),
+        )
+
+    async def _send_guarded(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        conditional: bool = False,
+        record: Optional[RecordFactory] = None,
+    ) -> Tuple[Any, Mapping[str, str]]:
+        """Perform a request through the circuit breaker.
+
+        Idempotent GETs are retried on transient failures with jittered
+        backoff. While the breaker is open the call fails immediately. Each
+        attempt is admitted by the request scheduler, if one is configured.
+        """
+        breaker = self._breaker
+        if breaker is not None and not breaker.allow_request():
+            raise VikunjaRequestError(
+                f"Vikunja circuit open; retry in {breaker.retry_in:.0f}s"
+            )
         try:
-            response = requests.get(
-                f"{self.url}/projects", headers=self.headers, timeout=30
+            result = await retry_with_backoff(
+                lambda: self._send_scheduled(
+                    method, path, params, json, conditional, record
+                ),
+                attempts=RETRY_ATTEMPTS if method == "GET" else 1,
+                is_transient=_is_transient,
             )
-            response.raise_for_status()
+        except VikunjaRequestError as err:
+            if breaker is not None:
+                if err.transient:
+                    breaker.record_failure(err)
+                else:
+                    # The server answered; a 4xx says nothing about its health.
+                    breaker.record_success()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+    async def _send_scheduled(self, *args: Any) -> Tuple[Any, Mapping[str, str]]:
+        if self.scheduler is None:
+            return await self._send_once(*args)
+        async with self.scheduler.slot():
+            return await self._send_once(*args)
+
+    async def _send_once(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        conditional: bool = False,
+        record: Optional[RecordFactory] = None,
+    ) -> Tuple[Any, Mapping[str, str]]:
+        """Perform a single request and return the decoded JSON body with headers.
+
+        With `record`, a JSON array body is streamed through
+        RecordStreamDecoder and returned as a list of `record(item)` results
+        (items mapping to None are dropped) instead of raw dicts.
+
+        With `conditional`, validators (ETag / Last-Modified) remembered from
+        the previous response for the same path and params are sent along; a
+        304 then returns the previously decoded body without re-reading it.
+        Callers must treat such bodies as read-only.
+
+        Raises VikunjaRequestError on transport errors, error statuses or
+        undecodable bodies so callers can keep their log-and-fallback style.
+        """
+        headers = self.headers
+        cache_key = None
+        cached: Optional[_ConditionalEntry] = None
+        if conditional:
+            cache_key = (path, tuple(sorted((params or {}).items())))
+            cached = self._conditional_cache.get(cache_key)
+            if cached is not None:
+                headers = {**self.headers, **cached.request_headers()}
+        try:
+            async with self._session.request(
+                method,
+                f"{self.url}{path}",
+                headers=headers,
+                params=params,
+                json=json,
+                timeout=self._timeout,
+            ) as response:
+                if response.status == 304 and cached is not None:
+                    self.conditional_stats.record_hit(cached)
+                    return cached.data, cached.headers
+                if response.status >= 400:
+                    body = await response.text()
+                    raise VikunjaRequestError(
+                        f"{response.status} {response.reason}",
+                        status=response.status,
+                        body=body,
+                    )
+                if response.status == 204:
+                    return None, response.headers
+                if record is not None:
+                    data, size, decode_seconds = await self._decode_records(
+                        response, record
+                    )
+                else:
+                    raw = await response.read()
+                    started = time.perf_counter()
+                    data = json_loads(raw) if raw else None
+                    decode_seconds = time.perf_counter() - started
+                    size = len(raw)
+                if cache_key is not None:
+                    self.conditional_stats.misses += 1
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+                    if etag or last_modified:
+                        self._conditional_cache[cache_key] = _ConditionalEntry(
+                            etag=etag,
+                            last_modified=last_modified,
+                            data=data,
+                            headers=response.headers.copy(),
+                            size=size,
+                            decode_seconds=decode_seconds,
+                        )
+                    else:
+                        self._conditional_cache.pop(cache_key, None)
+                return data, response.headers
+        except asyncio.TimeoutError as err:
+            raise VikunjaRequestError(f"Timed out after {REQUEST_TIMEOUT}s") from err
+        except (aiohttp.ClientError, ValueError) as err:
+            raise VikunjaRequestError(str(err)) from err
+
+    @staticmethod
+    async def _decode_records(
+        response: aiohttp.ClientResponse, record: RecordFactory
+    ) -> Tuple[List[Any], int, float]:
+        """Stream a response body into records; returns (records, bytes, seconds)."""
+        decoder = RecordStreamDecoder(record)
+        decode_seconds = 0.0
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            started = time.perf_counter()
+            decoder.feed(chunk)
+            decode_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        records = decoder.close()
+        decode_seconds += time.perf_counter() - started
+        return records, decoder.size, decode_seconds
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+    ) -> Any:
+        """Perform a request and return only the decoded JSON body."""
+        data, _headers = await self._send(method, path, params=params, json=json)
+        return data
+
+    # --- Pagination ---
+    async def _get_page(
+        self,
+        path: str,
+        page: int,
+        per_page: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+        record: Optional[RecordFactory] = None,
+    ) -> Tuple[List[Any], int]:
+        """Fetch one page of a list endpoint; returns (items, total_pages)."""
+        query: Dict[str, Any] = dict(params or {})
+        query["page"] = page
+        if per_page:
+            query["per_page"] = per_page
+        data, headers = await self._send(
+            "GET", path, params=query, conditional=True, record=record
+        )
+        try:
+            total_pages = int(headers.get(TOTAL_PAGES_HEADER, 1))
+        except (TypeError, ValueError):
+            total_pages = 1
+        return (data if isinstance(data, list) else []), max(total_pages, 1)
+
+    async def _get_all_pages(
+        self,
+        path: str,
+        per_page: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+        record: Optional[RecordFactory] = None,
+    ) -> List[Any]:
+        """Fetch every page of a list endpoint.
+
+        Page 1 reveals the total page count; the remaining pages are then
+        requested concurrently and concatenated in page order. Any failing
+        page fails the whole fetch so callers never see a silently truncated
+        list.
+        """
+        first, total_pages = await self._get_page(path, 1, per_page, params, record)
+        # Pages may be shared with the conditional cache; never mutate them.
+        items = list(first)
+        if total_pages <= 1:
+            return items
+        rest = await asyncio.gather(
+            *(
+                self._get_page(path, page, per_page, params, record)
+                for page in range(2, total_pages + 1)
+            )
+        )
+        for page_items, _total in rest:
+            items.extend(page_items)
+        return items
+
+    async def iter_pages(
+        self,
+        path: str,
+        per_page: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+        prefetch: int = PAGE_PREFETCH,
+        record: Optional[RecordFactory] = None,
+    ) -> AsyncIterator[List[Any]]:
+        """Yield the pages of a list endpoint in order.
+
+        At most `prefetch` pages are in flight ahead of the consumer, so large
+        tenants are streamed without holding every page in memory. Raises
+        VikunjaRequestError if a page cannot be fetched.
+        """
+        items, total_pages = await self._get_page(path, 1, per_page, params, record)
+        yield items
+        pending: Deque[asyncio.Future] = deque()
+        next_page = 2
+        try:
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < max(prefetch, 1):
+                    pending.append(
+                        asyncio.ensure_future(
+                            self._get_page(path, next_page, per_page, params, record)
+                        )
+                    )
+                    next_page += 1
+                items, _total = await pending.popleft()
+                yield items
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def iter_projects(
+        self, per_page: Optional[int] = None
+    ) -> AsyncIterator[ProjectRecord]:
+        """Stream all accessible projects page by page."""
+        async for page in self.iter_pages(
+            "/projects", per_page=per_page, record=ProjectRecord.from_json
+        ):
+            for project in page:
+                yield project
+
+    async def iter_labels(
+        self, per_page: Optional[int] = None
+    ) -> AsyncIterator[LabelRecord]:
+        """Stream all accessible labels page by page."""
+        async for page in self.iter_pages(
+            "/labels", per_page=per_page, record=LabelRecord.from_json
+        ):
+            for label in page:
+                yield label
+
+    @staticmethod
+    def _log_failure(message: str, err: VikunjaRequestError, *args: Any) -> None:
+        _LOGGER.error(message, *args, err)
+        if err.body:
+            _LOGGER.error("Response content: %s", err.body)
+
+    async def ping(self) -> bool:
+        """Lightweight health probe that bypasses the circuit breaker."""
+        try:
+            await self._send_once("GET", "/info")
             return True
-        except requests.exceptions.RequestException as err:
-            _LOGGER.error("Connection test failed: %s", err)
-            resp = getattr(err, "response", None)
-            if resp is not None and hasattr(resp, "text"):
-                _LOGGER.error("Response content: %s", resp.text)
+        except VikunjaRequestError as err:
+            _LOGGER.debug("Vikunja health probe failed: %s", err)
             return False
 
-    def get_projects(self):
-        """Return all accessible projects or [] on failure."""
+    async def test_connection(self):
+        """Simple connectivity check by listing projects."""
         try:
-            response = requests.get(
-                f"{self.url}/projects", headers=self.headers, timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
-            if isinstance(data, list):
-                return data
-            return []
-        except requests.exceptions.RequestException as err:
-            _LOGGER.error("Failed to get projects: %s", err)
-            resp = getattr(err, "response", None)
-            if resp is not None and hasattr(resp, "text"):
-                _LOGGER.error("Response content: %s", resp.text)
-            return []
+            await self._request("GET", "/projects")
+            return True
+        except VikunjaRequestError as err:
+            self._log_failure("Connection test failed: %s", err)
+            return False
+
+    async def list_projects(
+        self, per_page: Optional[int] = None
+    ) -> List[ProjectRecord]:
+        """Return all accessible projects as records; raises VikunjaRequestError."""
+        return await self._get_all_pages(
+            "/projects", per_page=per_page, record=ProjectRecord.from_json
+        )
 
-    def get_project_users(self, project_id: int):
-        """Return all users assigned to a project or [] on failure."""
+    async def list_labels(self, per_page: Optional[int] = None) -> List[LabelRecord]:
+        """Return all accessible labels as records; raises VikunjaRequestError."""
+        return await self._get_all_pages(
+            "/labels", per_page=per_page, record=LabelRecord.from_json
+        )
+
+    async def get_projects(self, per_page: Optional[int] = None):
+        """Return all accessible projects (every page) as records, [] on failure."""
         try:
-            response = requests.get(
-                f"{self.url}/projects/{project_id}/projectusers",
-                headers=self.headers,
-                timeout=30,
-            )
-            response.raise_for_status()
-            data = response.json()
-            if isinstance(data, list):
-                return data
+            return await self.list_projects(per_page)
+        except VikunjaRequestError as err:
+            self._log_failure("Failed to get projects: %s", err)
             return []
-        except requests.exceptions.RequestException as err:
-            _LOGGER.error(
-                "Failed to get users for project %s: %s", project_id, err
+
+    async def get_project_users(self, project_id: int, per_page: Optional[int] = None):
+        """Return all users assigned to a project as records, [] on failure."""
+        try:
+            return await self._get_all_pages(
+                f"/projects/{project_id}/projectusers",
+                per_page=per_page,
+                record=UserRecord.from_json,
             )
-            resp = getattr(err, "response", None)
-            if resp is not None and hasattr(resp, "text"):
-                _LOGGER.error("Response content: %s", resp.text)
+        except VikunjaRequestError as err:
+            self._log_failure("Failed to get users for project %s: %s", err, project_id)
             return []
 
-    def get_labels(self):
+    async def get_labels(self, per_page: Optional[int] = None):
+        """Return all accessible labels (every page) as records, [] on failure."""
         try:
-            response = requests.get(
-                f"{self.url}/labels", headers=self.headers, timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as err:
-            _LOGGER.error("Failed to get labels: %s", err)
-            resp = getattr(err, "response", None)
-            if resp is not None and hasattr(resp, "text"):
-                _LOGGER.error("Response content: %s", resp.text)
+            return await self.list_labels(per_page)
+        except VikunjaRequestError as err:
+            self._log_failure("Failed to get labels: %s", err)
             return []
 
-    def create_label(self, label_name):
+    async def create_label(self, label_name):
         """Create a new label with a random hex color."""
         payload = {"title": label_name, "hex_color": secrets.token_hex(3)}
         try:
-            response = requests.put(
-                f"{self.url}/labels", headers=self.headers, json=payload, timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as err:
-            _LOGGER.error("Failed to create label '%s': %s", label_name, err)
-            resp = getattr(err, "response", None)
-            if resp is not None and hasattr(resp, "text"):
-                _LOGGER.error("Response content: %s", resp.text)
+            return await self._request("PUT", "/labels", json=payload)
+        except VikunjaRequestError as err:
+            self._log_failure("Failed to create label '%s': %s", err, label_name)
             return None
 
-    def add_label_to_task(self, task_id: int, label_id: int):
+    async def add_label_to_task(self, task_id: int, label_id: int):
         """Attach existing label to a task. Returns True on success."""
         try:
-            response = requests.put(
-                f"{self.url}/tasks/{task_id}/labels",
-                headers=self.headers,
-                json={"label_id": label_id},
-                timeout=30,
+            await self._request(
+                "PUT", f"/tasks/{task_id}/labels", json={"label_id": label_id}
             )
-            response.raise_for_status()
             return True
-        except requests.exceptions.RequestException as err:
-            _LOGGER.error(
-                "Failed to attach label %s to task %s: %s", label_id, task_id, err
+        except VikunjaRequestError as err:
+            self._log_failure(
+                "Failed to attach label %s to task %s: %s", err, label_id, task_id
             )
-            resp = getattr(err, "response", None)
-            if resp is not None and hasattr(resp, "text"):
-                _LOGGER.error("Response content: %s", resp.text)
             return False
 
-    def add_task(self, task_data):
-        """Create a new task (requires title, uses project_id then removes it)."""
+    async def add_task(self, task_data, raise_errors: bool = False):
+        """Create a new task (requires title, uses project_id then removes it).
+
+        Returns None on failure, or re-raises the VikunjaRequestError with
+        `raise_errors` so callers can tell transient from permanent errors.
+        """
         project_id = task_data.get("project_id", 1)
         if not task_data.get("title"):
             _LOGGER.error("Cannot create task: missing 'title'")
             return None
         try:
-            response = requests.put(
-                f"{self.url}/projects/{project_id}/tasks",
-                headers=self.headers,
-                json=task_data,
-                timeout=30,
+            return await self._request(
+                "PUT", f"/projects/{project_id}/tasks", json=task_data
+            )
+        except VikunjaRequestError as err:
+            self._log_failure(
+                "Failed to create task in project %s: %s", err, project_id
             )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as err:
-            _LOGGER.error("Failed to create task in project %s: %s", project_id, err)
-            resp = getattr(err, "response", None)
-            if resp is not None and hasattr(resp, "text"):
-                _LOGGER.error("Response content: %s", resp.text)
+            if raise_errors:
+                raise
             return None
 
     # --- User / Assignee helpers ---
-    def search_users(self, search: str, page: int = 1):
+    async def search_users(self, search: str, page: int = 1):
         """Search users by partial string. Returns list or []."""
         try:
-            response = requests.get(
-                f"{self.url}/users",
-                params={"s": search, "page": page},
-                headers=self.headers,
-                timeout=30,
+            data = await self._request(
+                "GET", "/users", params={"s": search, "page": page}
             )
-            response.raise_for_status()
-            data = response.json()
-            # Expecting list of user objects
-            if isinstance(data, list):
-                return data
-            return []
-        except requests.exceptions.RequestException as err:
+        except VikunjaRequestError as err:
             _LOGGER.error("Failed to search users with query '%s': %s", search, err)
             return []
+        # Expecting list of user objects
+        if isinstance(data, list):
+            return data
+        return []
 
-    def assign_user_to_task(self, task_id: int, user_id: int):
+    async def assign_user_to_task(self, task_id: int, user_id: int):
         """Assign a user to a task. Returns True on success."""
         payload = {
             "max_permission": None,
@@ -170,19 +638,197 @@ class VikunjaAPI:
             "task_id": task_id,
         }
         try:
-            response = requests.put(
-                f"{self.url}/tasks/{task_id}/assignees",
-                headers=self.headers,
-                json=payload,
-                timeout=30,
-            )
-            response.raise_for_status()
+            await self._request("PUT", f"/tasks/{task_id}/assignees", json=payload)
             return True
-        except requests.exceptions.RequestException as err:
-            _LOGGER.error(
-                "Failed to assign user %s to task %s: %s", user_id, task_id, err
+        except VikunjaRequestError as err:
+            self._log_failure(
+                "Failed to assign user %s to task %s: %s", err, user_id, task_id
             )
-            resp = getattr(err, "response", None)
-            if resp is not None and hasattr(resp, "text"):
-                _LOGGER.error("Response content: %s", resp.text)
             return False
+
+    @property
+    def coalescing_stats(self) -> Dict[str, Any]:
+        """Counters of GETs served by an identical in-flight request."""
+        return self._single_flight.stats.as_dict()
+
+    def capabilities(self) -> Dict[str, Any]:
+        """Server features detected so far (for diagnostics)."""
+        version = self._server_version
+        return {
+            "server_version": (
+                ".".join(map(str, version)) if isinstance(version, tuple) else None
+            ),
+            "embedded_create": self._embedded_create,
+            "bulk_endpoints": dict(self._bulk_supported),
+        }
+
+    # --- Single round-trip creation ---
+    async def get_server_version(self) -> Optional[Tuple[int, int, int]]:
+        """Return the Vikunja server version from /info (cached), if parseable."""
+        if self._server_version is not _UNSET:
+            return self._server_version
+        try:
+            info = await self._request("GET", "/info")
+        except VikunjaRequestError as err:
+            _LOGGER.debug("Could not read Vikunja server info: %s", err)
+            return None  # not cached; retried on next call
+        match = None
+        if isinstance(info, dict):
+            match = _VERSION_RE.search(str(info.get("version", "")))
+        self._server_version = (
+            tuple(int(part) for part in match.groups()) if match else None
+        )
+        return self._server_version
+
+    async def _embedded_create_possible(self) -> bool:
+        if self._embedded_create is not None:
+            return self._embedded_create
+        version = await self.get_server_version()
+        if version is not None and version < EMBEDDED_CREATE_MIN_VERSION:
+            _LOGGER.debug(
+                "Vikunja %s predates embedded labels/assignees on create",
+                ".".join(map(str, version)),
+            )
+            self._embedded_create = False
+        # Unknown or recent versions are tried and verified per response.
+        return self._embedded_create is not False
+
+    async def add_task_with_relations(
+        self,
+        task_data,
+        label_ids: List[int],
+        assignee_ids: List[int],
+        raise_errors: bool = False,
+    ) -> Tuple[Optional[Dict[str, Any]], List[int], List[int]]:
+        """Create a task with labels and assignees embedded in the create call.
+
+        Returns (created task, label ids still to attach, assignee ids still
+        to assign). The created task is checked for the embedded relations;
+        when the server ignored them they are returned as still pending and
+        embedding is disabled for later calls, so the caller falls back to
+        `enrich_task`. When the server rejects the create (e.g. a deleted
+        label or an assignee without access to the project), the task is
+        created without relations and all of them are returned as pending,
+        so the failing ones surface per item in `enrich_task`.
+        `raise_errors` is passed on to `add_task`.
+        """
+        if (
+            not (label_ids or assignee_ids)
+            or not await self._embedded_create_possible()
+        ):
+            created = await self.add_task(task_data, raise_errors=raise_errors)
+            return created, list(label_ids), list(assignee_ids)
+
+        payload = dict(task_data)
+        if label_ids:
+            payload["labels"] = [{"id": lid} for lid in label_ids]
+        if assignee_ids:
+            payload["assignees"] = [{"id": uid} for uid in assignee_ids]
+        try:
+            created = await self.add_task(payload, raise_errors=True)
+        except VikunjaRequestError as err:
+            if not err.rejected:
+                if raise_errors:
+                    raise
+                return None, list(label_ids), list(assignee_ids)
+            _LOGGER.warning(
+                "Vikunja rejected the task with embedded labels/assignees (%s); "
+                "creating it without them",
+                err,
+            )
+            created = await self.add_task(task_data, raise_errors=raise_errors)
+            return created, list(label_ids), list(assignee_ids)
+        if not isinstance(created, dict):
+            return created, list(label_ids), list(assignee_ids)
+
+        def _ids(key: str) -> set:
+            return {
+                item.get("id")
+                for item in created.get(key) or []
+                if isinstance(item, dict)
+            }
+
+        got_labels, got_users = _ids("labels"), _ids("assignees")
+        pending_labels = [lid for lid in label_ids if lid not in got_labels]
+        pending_users = [uid for uid in assignee_ids if uid not in got_users]
+        if not (got_labels or got_users):
+            _LOGGER.debug("Vikunja ignored embedded labels/assignees; disabling")
+            self._embedded_create = False
+        elif self._embedded_create is None:
+            self._embedded_create = True
+        return created, pending_labels, pending_users
+
+    # --- Post-creation enrichment ---
+    async def enrich_task(
+        self,
+        task_id: int,
+        label_ids: List[int],
+        assignee_ids: List[int],
+        attached_labels: Sequence[int] = (),
+        attached_users: Sequence[int] = (),
+    ) -> EnrichmentResult:
+        """Attach labels and assignees to a task in as few round trips as possible.
+
+        Uses Vikunja's bulk endpoints when the server has them; otherwise
+        falls back to the per-item calls, issued concurrently. Per-item
+        failures are reported in the returned result rather than raised.
+
+        The bulk endpoints replace the task's whole set, so `attached_labels`
+        and `attached_users` (ids already on the task, e.g. embedded in the
+        create call) are sent along to keep them.
+        """
+        labels, assignees = await asyncio.gather(
+            self._enrich_many(
+                "labels", task_id, label_ids, self.add_label_to_task, attached_labels
+            ),
+            self._enrich_many(
+                "assignees",
+                task_id,
+                assignee_ids,
+                self.assign_user_to_task,
+                attached_users,
+            ),
+        )
+        return EnrichmentResult(
+            task_id=task_id,
+            attached_labels=labels[0],
+            failed_labels=labels[1],
+            assigned_users=assignees[0],
+            failed_users=assignees[1],
+            used_bulk=labels[2] or assignees[2],
+        )
+
+    async def _enrich_many(
+        self,
+        kind: str,
+        task_id: int,
+        ids: List[int],
+        single_call: Callable[[int, int], Awaitable[bool]],
+        attached: Sequence[int] = (),
+    ) -> Tuple[List[int], List[int], bool]:
+        """Apply one kind of enrichment; returns (succeeded, failed, used_bulk)."""
+        if not ids:
+            return [], [], False
+        if len(ids) > 1 and self._bulk_supported.get(kind) is not False:
+            wanted = list(dict.fromkeys([*attached, *ids]))
+            try:
+                await self._request(
+                    "POST",
+                    f"/tasks/{task_id}/{kind}/bulk",
+                    json={kind: [{"id": item} for item in wanted]},
+                )
+            except VikunjaRequestError as err:
+                if err.status in (404, 405):
+                    _LOGGER.debug("Bulk %s endpoint unavailable; using per-item", kind)
+                    self._bulk_supported[kind] = False
+                else:
+                    self._log_failure(
+                        "Bulk %s update on task %s failed: %s", err, kind, task_id
+                    )
+            else:
+                self._bulk_supported[kind] = True
+                return list(ids), [], True
+        outcomes = await asyncio.gather(*(single_call(task_id, item) for item in ids))
+        succeeded = [item for item, ok in zip(ids, outcomes) if ok]
+        failed = [item for item, ok in zip(ids, outcomes) if not ok]
+        return succeeded, failed, False
@@ -0,0 +1,68 @@
+"""Backend health binary sensors driven by the circuit breakers."""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .helpers.circuit_breaker import STATE_CLOSED, CircuitBreaker
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the backend connectivity sensors."""
+    runtime = entry.runtime_data
+    async_add_entities(
+        [
+            BackendHealthBinarySensor(
+                entry, runtime.vikunja_breaker, "vikunja_connection"
+            ),
+            BackendHealthBinarySensor(entry, runtime.llm_breaker, "ai_task_connection"),
+        ]
+    )
+
+
+def device_info(entry: ConfigEntry) -> DeviceInfo:
+    """Group the integration's entities under one service device."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=entry.title,
+        entry_type=DeviceEntryType.SERVICE,
+    )
+
+
+class BackendHealthBinarySensor(BinarySensorEntity):
+    """On while the backend's circuit breaker is closed (healthy)."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
+
+    def __init__(
+        self, entry: ConfigEntry, breaker: CircuitBreaker, translation_key: str
+    ) -> None:
+        self._breaker = breaker
+        self._attr_translation_key = translation_key
+        self._attr_unique_id = f"{entry.entry_id}_{translation_key}"
+        self._attr_device_info = device_info(entry)
+
+    @property
+    def is_on(self) -> bool:
+        return self._breaker.state == STATE_CLOSED
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        return self._breaker.as_dict()
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(self._breaker.add_listener(self.async_write_ha_state))
@@ -2,6 +2,7 @@ import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import selector  # added
 
@@ -17,10 +18,35 @@ from .const import (
     CONF_ENABLE_USER_ASSIGN,
     DUE_DATE_OPTION_LABELS,
     CONF_DETAILED_RESPONSE,
+    CONF_POOL_SIZE,
+    CONF_KEEPALIVE_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    CONF_COMMAND_TIMEOUT,
+    DEFAULT_COMMAND_TIMEOUT,
+    CONF_RATE_LIMIT,
+    CONF_RATE_BURST,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_BURST,
+    CONF_OUTBOX,
+    CONF_METADATA_TTL,
+    DEFAULT_METADATA_TTL,
+    CONF_WEBHOOK_SECRET,
+    CONF_PROMPT_BUDGET,
+    DEFAULT_PROMPT_BUDGET,
+    CONF_PROMPT_ENCODING,
+    DEFAULT_PROMPT_ENCODING,
+    PROMPT_ENCODINGS,
+    PROMPT_ENCODING_OPTION_LABELS,
+    CONF_COMPACT_OUTPUT,
+    CONF_FAST_PATH,
+    CONF_PARSE_CACHE_SIZE,
+    DEFAULT_PARSE_CACHE_SIZE,
+    CONF_PARSE_CACHE_PERSIST,
 )
 from .helpers.localization import get_language
 from .api.vikunja_api import VikunjaAPI
-from .user_cache import build_initial_user_cache_sync
+from .user_cache import async_build_initial_user_cache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -32,6 +58,10 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
     _basic_input: dict | None = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return OptionsFlow()
 
     def _build_data_schema(self, defaults):
         lang = get_language(self.hass)
@@ -61,7 +91,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call
 
         return vol.Schema(
             {
-                vol.Required(CONF_VIKUNJA_URL, default=defaults.get(CONF_VIKUNJA_URL, "")): str,
+                vol.Required(
+                    CONF_VIKUNJA_URL, default=defaults.get(CONF_VIKUNJA_URL, "")
+                ): str,
                 vol.Required(
                     CONF_VIKUNJA_API_KEY,
                     default=defaults.get(CONF_VIKUNJA_API_KEY, ""),
@@ -94,7 +126,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call
 
     def _sanitize_user_input(self, user_input):
         sanitized = dict(user_input)
-        sanitized[CONF_VIKUNJA_API_KEY] = sanitized.get(CONF_VIKUNJA_API_KEY, "").strip()
+        sanitized[CONF_VIKUNJA_API_KEY] = sanitized.get(
+            CONF_VIKUNJA_API_KEY, ""
+        ).strip()
         sanitized[CONF_AI_TASK_ENTITY] = sanitized.get(CONF_AI_TASK_ENTITY, "").strip()
 
         base_url = sanitized.get(CONF_VIKUNJA_URL, "").strip()
@@ -113,16 +147,15 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call
         if not vikunja_url or not api_key:
             return False
 
-        vikunja_api = VikunjaAPI(vikunja_url, api_key)
-        return await self.hass.async_add_executor_job(vikunja_api.test_connection)
+        vikunja_api = VikunjaAPI(self.hass, vikunja_url, api_key)
+        return await vikunja_api.test_connection()
 
     async def _ensure_user_cache(self, data):
         if not data.get(CONF_ENABLE_USER_ASSIGN):
             return
 
-        await self.hass.async_add_executor_job(
-            build_initial_user_cache_sync,
-            self.hass.config.config_dir,
+        await async_build_initial_user_cache(
+            self.hass,
             data[CONF_VIKUNJA_URL],
             data[CONF_VIKUNJA_API_KEY],
         )
@@ -196,3 +229,101 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call
             data_schema=data_schema,
             errors=errors,
         )
+
+
+class OptionsFlow(config_entries.OptionsFlow):
+    """Advanced tuning options for an existing entry."""
+
+    def _build_options_schema(self, defaults):
+        lang = get_language(self.hass)
+        encoding_selector = selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=[
+                    selector.SelectOptionDict(
+                        value=value,
+                        label=(
+                            PROMPT_ENCODING_OPTION_LABELS[value].get(lang)
+                            or PROMPT_ENCODING_OPTION_LABELS[value]["en"]
+                        ),
+                    )
+                    for value in PROMPT_ENCODINGS
+                ],
+                mode=selector.SelectSelectorMode.DROPDOWN,
+            )
+        )
+        return vol.Schema(
+            {
+                vol.Required(
+                    CONF_POOL_SIZE,
+                    default=defaults.get(CONF_POOL_SIZE, DEFAULT_POOL_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Required(
+                    CONF_KEEPALIVE_TIMEOUT,
+                    default=defaults.get(
+                        CONF_KEEPALIVE_TIMEOUT, DEFAULT_KEEPALIVE_TIMEOUT
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+                vol.Required(
+                    CONF_COMMAND_TIMEOUT,
+                    default=defaults.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=3, max=300)),
+                vol.Required(
+                    CONF_RATE_LIMIT,
+                    default=defaults.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Required(
+                    CONF_RATE_BURST,
+                    default=defaults.get(CONF_RATE_BURST, DEFAULT_RATE_BURST),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+                vol.Required(
+                    CONF_METADATA_TTL,
+                    default=defaults.get(CONF_METADATA_TTL, DEFAULT_METADATA_TTL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                vol.Required(
+                    CONF_PROMPT_BUDGET,
+                    default=defaults.get(CONF_PROMPT_BUDGET, DEFAULT_PROMPT_BUDGET),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=200000)),
+                vol.Required(
+                    CONF_PROMPT_ENCODING,
+                    default=defaults.get(CONF_PROMPT_ENCODING, DEFAULT_PROMPT_ENCODING),
+                ): encoding_selector,
+                vol.Required(
+                    CONF_COMPACT_OUTPUT,
+                    default=defaults.get(CONF_COMPACT_OUTPUT, False),
+                ): cv.boolean,
+                vol.Required(
+                    CONF_FAST_PATH,
+                    default=defaults.get(CONF_FAST_PATH, False),
+                ): cv.boolean,
+                vol.Required(
+                    CONF_PARSE_CACHE_SIZE,
+                    default=defaults.get(
+                        CONF_PARSE_CACHE_SIZE, DEFAULT_PARSE_CACHE_SIZE
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=10000)),
+                vol.Required(
+                    CONF_PARSE_CACHE_PERSIST,
+                    default=defaults.get(CONF_PARSE_CACHE_PERSIST, False),
+                ): cv.boolean,
+                vol.Required(
+                    CONF_OUTBOX,
+                    default=defaults.get(CONF_OUTBOX, False),
+                ): cv.boolean,
+                vol.Optional(
+                    CONF_WEBHOOK_SECRET,
+                    default=defaults.get(CONF_WEBHOOK_SECRET, ""),
+                ): selector.TextSelector(
+                    selector.TextSelectorConfig(type=selector.TextSelectorType.PASSWORD)
+                ),
+            }
+        )
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self._build_options_schema(dict(self.config_entry.options)),
+        )
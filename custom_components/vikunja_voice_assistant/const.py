@@ -8,10 +8,92 @@ CONF_AUTO_VOICE_LABEL = "auto_voice_label"
 CONF_ENABLE_USER_ASSIGN = "enable_user_assignment"
 USER_CACHE_FILENAME = "vikunja_users.json"
 USER_CACHE_REFRESH_HOURS = 24  # default refresh cadence
+OUTBOX_FILENAME = "vikunja_outbox.json"
+SNAPSHOT_FILENAME = "vikunja_metadata.json"
+SNAPSHOT_SAVE_DELAY_SECONDS = 5  # changes within this window share one write
+PARSE_CACHE_FILENAME = "vikunja_parse_cache.json"
+PARSE_CACHE_SAVE_DELAY_SECONDS = 30
 DUE_DATE_OPTIONS = ["none", "tomorrow", "end_of_week", "end_of_month"]
 CONF_DETAILED_RESPONSE = "detailed_response"
 """When true, detailed voice responses will include project, labels, due date, assignee, priority and repeat info automatically."""
 
+# Connection tuning (options flow)
+CONF_POOL_SIZE = "connection_pool_size"
+CONF_KEEPALIVE_TIMEOUT = "keepalive_timeout"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_KEEPALIVE_TIMEOUT = 60  # seconds an idle connection is kept open
+
+# Voice command time budget (options flow)
+CONF_COMMAND_TIMEOUT = "command_timeout"
+DEFAULT_COMMAND_TIMEOUT = 20  # seconds for the whole voice command
+ENRICHMENT_MIN_BUDGET_SECONDS = 1.0  # below this, labels/assignee attach in background
+CREATE_MIN_BUDGET_SECONDS = 5.0  # creates get this long even past the deadline
+
+# Request scheduling (options flow): token bucket in front of the Vikunja client
+CONF_RATE_LIMIT = "rate_limit"  # requests per second
+CONF_RATE_BURST = "rate_burst"
+DEFAULT_RATE_LIMIT = 10
+DEFAULT_RATE_BURST = 20
+
+# Project/label metadata cache (options flow), served stale while refreshing
+CONF_METADATA_TTL = "metadata_ttl"
+DEFAULT_METADATA_TTL = 300  # seconds before cached metadata is revalidated
+
+# Prompt context budget (options flow): projects/labels/users ranked by relevance
+CONF_PROMPT_BUDGET = "prompt_budget"  # characters of metadata in the prompt; 0 = all
+DEFAULT_PROMPT_BUDGET = 8000  # ~2000 tokens
+DEFAULT_PROJECT_ID = 1  # the prompt's fallback project, never pruned
+RECENT_USAGE_SIZE = 50  # created tasks remembered for relevance ranking
+
+# Encoding of the prompt's projects/labels/users lists (options flow)
+CONF_PROMPT_ENCODING = "prompt_encoding"
+PROMPT_ENCODING_JSON = "json"  # [{"id": 1, "name": "Inbox"}, ...]
+PROMPT_ENCODING_TABLE = "table"  # header once, then one "1|Inbox" row per entry
+PROMPT_ENCODINGS = [PROMPT_ENCODING_JSON, PROMPT_ENCODING_TABLE]
+DEFAULT_PROMPT_ENCODING = PROMPT_ENCODING_JSON
+
+# Short-key answer format ({"t": ..., "p": ...}) to cut generated tokens
+CONF_COMPACT_OUTPUT = "compact_output"
+
+# Parse simple commands locally and only send the rest to the LLM (options flow)
+CONF_FAST_PATH = "fast_path"
+
+# Reuse LLM parse results for repeated commands (options flow; 0 = off)
+CONF_PARSE_CACHE_SIZE = "parse_cache_size"
+DEFAULT_PARSE_CACHE_SIZE = 0
+CONF_PARSE_CACHE_PERSIST = "parse_cache_persist"
+
+# Local fuzzy name resolver (share of a name's trigrams found in the utterance)
+FUZZY_PIN_CONFIDENCE = 0.9  # names this certain are pointed out to the LLM
+FUZZY_PIN_MIN_LENGTH = 4  # shorter names match too easily to be pinned
+FUZZY_ASSIGNEE_CONFIDENCE = 0.75  # fallback when the assignee is not an exact match
+FUZZY_ASSIGNEE_MARGIN = 0.1  # lead over the runner-up needed to auto-assign
+
+# Vikunja webhooks (options flow): signed events update the caches in place
+CONF_WEBHOOK_ID = "webhook_id"  # generated once, stored in entry data
+CONF_WEBHOOK_SECRET = "webhook_secret"
+WEBHOOK_SIGNATURE_HEADER = "X-Vikunja-Signature"
+WEBHOOK_METADATA_TTL = 6 * 3600  # polling fallback while webhooks keep caches fresh
+WEBHOOK_USER_CACHE_REFRESH_HOURS = 7 * 24
+
+# Write-ahead outbox (options flow): queued task creation replayed in background
+CONF_OUTBOX = "use_outbox"
+OUTBOX_MAX_ATTEMPTS = 10  # per stage before an entry is dropped
+OUTBOX_RETRY_BASE_SECONDS = 5
+OUTBOX_RETRY_MAX_SECONDS = 300
+
+# Backend resilience: circuit breaker, retries and health probe
+CIRCUIT_FAILURE_THRESHOLD = 3  # consecutive transient failures before tripping
+CIRCUIT_RECOVERY_SECONDS = 30  # first fail-fast window, doubled while still down
+CIRCUIT_MAX_RECOVERY_SECONDS = 300
+RETRY_ATTEMPTS = 3  # total attempts for idempotent (GET) requests
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 2.0
+HEALTH_PROBE_INTERVAL_SECONDS = 30
+
+# hass.data[DOMAIN] key holding the per-entry runtime data (shared client, caches)
+DATA_RUNTIME = "runtime"
+
 
 DUE_DATE_OPTION_LABELS = {
     "none": {
@@ -67,3 +149,32 @@ DUE_DATE_OPTION_LABELS = {
         "de": "Ende des Monats",
     },
 }
+
+PROMPT_ENCODING_OPTION_LABELS = {
+    "json": {
+        "en": "JSON objects",
+        "fr": "Objets JSON",
+        "es": "Objetos JSON",
+        "pt": "Objetos JSON",
+        "ru": "Объекты JSON",
+        "hi": "JSON ऑब्जेक्ट",
+        "zh-Hans": "JSON 对象",
+        "ar": "كائنات JSON",
+        "bn": "JSON অবজেক্ট",
+        "id": "Objek JSON",
+        "de": "JSON-Objekte",
+    },
+    "table": {
+        "en": "Compact table (id|name)",
+        "fr": "Tableau compact (id|nom)",
+        "es": "Tabla compacta (id|nombre)",
+        "pt": "Tabela compacta (id|nome)",
+        "ru": "Компактная таблица (id|имя)",
+        "hi": "संक्षिप्त तालिका (id|नाम)",
+        "zh-Hans": "紧凑表格（id|名称）",
+        "ar": "جدول مضغوط (id|الاسم)",
+        "bn": "সংক্ষিপ্ত টেবিল (id|নাম)",
+        "id": "Tabel ringkas (id|nama)",
+        "de": "Kompakte Tabelle (id|Name)",
+    },
+}
@@ -0,0 +1,62 @@
+"""Diagnostics support for Vikunja Voice Assistant."""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_VIKUNJA_API_KEY, CONF_WEBHOOK_ID, CONF_WEBHOOK_SECRET
+from .helpers.prompt_builder import prompt_block_stats
+from .helpers.records import JSON_BACKEND
+
+TO_REDACT = {CONF_VIKUNJA_API_KEY, CONF_WEBHOOK_ID, CONF_WEBHOOK_SECRET}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    diagnostics: Dict[str, Any] = {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "options": async_redact_data(dict(entry.options), TO_REDACT),
+    }
+    runtime = getattr(entry, "runtime_data", None)
+    if runtime is None:
+        return diagnostics
+
+    diagnostics["vikunja_capabilities"] = runtime.api.capabilities()
+    diagnostics["conditional_requests"] = runtime.api.conditional_stats.as_dict()
+    diagnostics["json_backend"] = JSON_BACKEND
+    diagnostics["prompt_blocks"] = prompt_block_stats()
+    diagnostics["coalesced_requests"] = {
+        "vikunja_reads": runtime.api.coalescing_stats,
+        "user_cache_refresh": runtime.user_cache.refresh_flight.stats.as_dict(),
+    }
+    if runtime.metadata is not None:
+        diagnostics["metadata_cache"] = runtime.metadata.as_dict()
+    if runtime.snapshot is not None:
+        diagnostics["metadata_snapshot"] = runtime.snapshot.as_dict()
+    if runtime.llm_capabilities is not None:
+        diagnostics["ai_task_capabilities"] = runtime.llm_capabilities.as_dict()
+    if runtime.fast_path is not None:
+        diagnostics["fast_path"] = runtime.fast_path.as_dict()
+    if runtime.parse_cache is not None:
+        diagnostics["parse_cache"] = runtime.parse_cache.as_dict()
+    if runtime.resolver is not None:
+        diagnostics["fuzzy_resolver"] = runtime.resolver.as_dict()
+    if runtime.voice_label is not None:
+        diagnostics["voice_label"] = runtime.voice_label.as_dict()
+    if runtime.webhook is not None:
+        diagnostics["webhook"] = runtime.webhook.stats.as_dict()
+    if runtime.outbox is not None:
+        diagnostics["outbox"] = runtime.outbox.as_dict()
+    if runtime.api.scheduler is not None:
+        diagnostics["request_scheduler"] = runtime.api.scheduler.as_dict()
+    diagnostics["circuit_breakers"] = {
+        "vikunja": runtime.vikunja_breaker.as_dict(),
+        "ai_task": runtime.llm_breaker.as_dict(),
+    }
+    return diagnostics
@@ -0,0 +1,184 @@
+"""Circuit breaker and retry helpers for the Vikunja and AI Task backends.
+
+A breaker trips after a run of transient failures and then rejects calls
+immediately until its recovery window elapses, so a dead backend costs a
+voice command milliseconds instead of a full request timeout. The breaker
+state doubles as the cached health of the backend (exposed as a binary
+sensor) and can be re-checked out of band with a cheap probe.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from ..const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_MAX_RECOVERY_SECONDS,
+    CIRCUIT_RECOVERY_SECONDS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Track backend failures and short-circuit calls while it is down."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        recovery_seconds: float = CIRCUIT_RECOVERY_SECONDS,
+        max_recovery_seconds: float = CIRCUIT_MAX_RECOVERY_SECONDS,
+        probe: Optional[Callable[[], Awaitable[bool]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.max_recovery_seconds = max_recovery_seconds
+        self.probe = probe
+        self._clock = clock
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._open_count = 0
+        self._open_until = 0.0
+        self._last_error: Optional[str] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    # --------------- State ---------------
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected without reaching the backend."""
+        return self._state == STATE_OPEN and self._clock() < self._open_until
+
+    @property
+    def retry_in(self) -> float:
+        return max(self._open_until - self._clock(), 0.0)
+
+    def allow_request(self) -> bool:
+        """Return whether a call may go to the backend right now.
+
+        Once the recovery window has elapsed the breaker moves to half-open
+        and lets calls through; the next outcome closes or re-opens it.
+        """
+        if self._state != STATE_OPEN:
+            return True
+        if self._clock() < self._open_until:
+            return False
+        self._set_state(STATE_HALF_OPEN)
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._open_count = 0
+        self._last_error = None
+        if self._state != STATE_CLOSED:
+            _LOGGER.info("%s backend recovered; closing circuit", self.name)
+            self._set_state(STATE_CLOSED)
+
+    def record_failure(self, err: Any = None) -> None:
+        self._failures += 1
+        if err is not None:
+            self._last_error = str(err)
+        if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+            self._trip()
+
+    def _trip(self) -> None:
+        # Back off the recovery window exponentially while the backend stays down.
+        window = min(
+            self.recovery_seconds * (2**self._open_count), self.max_recovery_seconds
+        )
+        self._open_count += 1
+        self._open_until = self._clock() + window
+        if self._state != STATE_OPEN:
+            _LOGGER.warning(
+                "%s backend unavailable (%s); failing fast for %.0fs",
+                self.name,
+                self._last_error,
+                window,
+            )
+        self._set_state(STATE_OPEN)
+
+    # --------------- Probe ---------------
+    async def async_probe(self) -> None:
+        """Check an unhealthy backend out of band and update the state."""
+        if self._state == STATE_CLOSED or self.probe is None:
+            return
+        try:
+            healthy = await self.probe()
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.debug("%s health probe failed: %s", self.name, err)
+            healthy = False
+        if healthy:
+            self.record_success()
+        elif self._state == STATE_HALF_OPEN or not self.is_open:
+            self._trip()
+
+    # --------------- Listeners ---------------
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Register a state change callback; returns an unsubscribe callable."""
+        self._listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    def _set_state(self, state: str) -> None:
+        changed = state != self._state
+        self._state = state
+        if changed:
+            for listener in list(self._listeners):
+                listener()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "retry_in_seconds": round(self.retry_in, 1) if self.is_open else 0,
+            "last_error": self._last_error,
+        }
+
+
+async def retry_with_backoff(
+    func: Callable[[], Awaitable[T]],
+    attempts: int,
+    is_transient: Callable[[BaseException], bool],
+    base_delay: float = RETRY_BASE_DELAY,
+    max_delay: float = RETRY_MAX_DELAY,
+) -> T:
+    """Call `func`, retrying transient failures with full-jitter backoff."""
+    attempt = 1
+    while True:
+        try:
+            return await func()
+        except Exception as err:  # noqa: BLE001
+            if attempt >= attempts or not is_transient(err):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+            _LOGGER.debug(
+                "Transient failure (%s), retry %s/%s in %.2fs",
+                err,
+                attempt,
+                attempts - 1,
+                delay,
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,101 @@
+"""End-to-end time budget for a single voice command.
+
+Every stage of `process_task` runs with whatever is left of one overall
+deadline instead of its own fixed timeout, so the spoken reply arrives
+within a predictable bound no matter which backend is slow.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a stage does not finish within the remaining budget."""
+
+    def __init__(self, stage: str, budget: float) -> None:
+        super().__init__(f"Stage '{stage}' exceeded remaining budget of {budget:.2f}s")
+        self.stage = stage
+
+
+class Deadline:
+    """Track the time left for a voice command and run stages within it."""
+
+    def __init__(
+        self, total_seconds: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.total_seconds = total_seconds
+        self._clock = clock
+        self._started = clock()
+        self.stage_durations: Dict[str, float] = {}
+
+    def remaining(self) -> float:
+        return max(self.total_seconds - (self._clock() - self._started), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    async def run(self, awaitable: Awaitable[T], stage: str) -> T:
+        """Await a required stage, raising DeadlineExceeded when out of time."""
+        budget = self.remaining()
+        started = self._clock()
+        if budget <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            elif isinstance(awaitable, asyncio.Future):
+                awaitable.cancel()
+            raise DeadlineExceeded(stage, budget)
+        try:
+            return await asyncio.wait_for(awaitable, timeout=budget)
+        except asyncio.TimeoutError as err:
+            raise DeadlineExceeded(stage, budget) from err
+        finally:
+            self.stage_durations[stage] = self._clock() - started
+
+    async def run_shielded(
+        self, task: "asyncio.Future[T]", stage: str, min_budget: float = 0.0
+    ) -> T:
+        """Wait for a scheduled stage that must not be cancelled half way.
+
+        For non-idempotent writes (creating a task or label): the stage gets
+        at least `min_budget` even when the deadline is nearly spent, and is
+        never cancelled. If it is still running afterwards DeadlineExceeded
+        is raised while the task keeps going in the background.
+        """
+        budget = max(self.remaining(), min_budget)
+        started = self._clock()
+        done, _pending = await asyncio.wait({task}, timeout=budget)
+        self.stage_durations[stage] = self._clock() - started
+        if task not in done:
+            _LOGGER.debug("Stage '%s' continues in background past deadline", stage)
+            raise DeadlineExceeded(stage, budget)
+        return task.result()
+
+    async def run_optional(
+        self, task: "asyncio.Future[T]", stage: str, min_budget: float = 0.0
+    ) -> Optional[T]:
+        """Wait for an optional, already scheduled stage while budget allows.
+
+        If less than `min_budget` is left, or the task is still running when
+        the budget is spent, the task is left to finish in the background and
+        None is returned so the caller can reply right away.
+        """
+        budget = self.remaining()
+        if budget < min_budget:
+            _LOGGER.debug("Deferring stage '%s' (%.2fs left)", stage, budget)
+            return None
+        started = self._clock()
+        done, _pending = await asyncio.wait({task}, timeout=budget)
+        self.stage_durations[stage] = self._clock() - started
+        if task in done:
+            return task.result()
+        _LOGGER.debug("Stage '%s' continues in background past deadline", stage)
+        return None
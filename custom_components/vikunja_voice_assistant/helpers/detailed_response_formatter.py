@@ -3,6 +3,8 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+from .metadata_index import MetadataIndex
+
 # Optional localization imports are done lazily to avoid circulars when tests import
 # this module directly. We keep English defaults if localization module unavailable.
 try:  # pragma: no cover - defensive import
@@ -76,24 +78,20 @@ def build_detailed_response(
     assignee_username_or_name: Optional[str],
     enable_user_assignment: bool,
     lang: str | None = None,
+    index: MetadataIndex | None = None,
 ) -> str:
     """Build a (potentially) localized detailed response string.
 
     lang: language code; if None or 'en' or localization helpers missing, falls back to English.
+    index: prebuilt lookups; `projects` and `labels` are indexed here when missing.
     """
-    # Collect lookup tables
+    if index is None:
+        index = MetadataIndex.build(projects or [], labels or [])
     project_name: Optional[str] = None
     try:
         project_id = task_data.get("project_id")
         if project_id and project_id != 1:
-            proj_lookup: Dict[int, str] = {}
-            for p in projects or []:
-                if isinstance(p, dict):
-                    pid = p.get("id")
-                    pname = p.get("title") or p.get("name") or ""
-                    if pid is not None and isinstance(pname, str):
-                        proj_lookup[pid] = pname.strip()
-            raw_name = proj_lookup.get(project_id)
+            raw_name = index.project_title(project_id)
             if raw_name and raw_name.lower() not in {"other", "misc", "general"}:
                 project_name = raw_name
     except Exception:  # noqa: BLE001
@@ -102,15 +100,10 @@ def build_detailed_response(
     labels_part: Optional[str] = None
     try:
         if extracted_label_ids:
-            label_lookup = {
-                label_item.get("id"): label_item.get("title")
-                for label_item in (labels or [])
-                if isinstance(label_item, dict)
-            }
             label_names = [
-                str(label_lookup.get(lid, str(lid)))
+                str(index.label_title(lid) if lid in index.labels_by_id else lid)
                 for lid in extracted_label_ids
-                if lid in label_lookup or lid is not None
+                if lid in index.labels_by_id or lid is not None
             ]
             if label_names:
                 labels_part = ", ".join(label_names)
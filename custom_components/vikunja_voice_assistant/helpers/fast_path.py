@@ -0,0 +1,1181 @@
+"""Rule-based task parser that answers simple commands without the LLM.
+
+Commands like "buy milk tomorrow at 5pm" or "take vitamins daily" only
+need a title, a relative date or weekday, a time, a priority or recurrence
+keyword and maybe an exact project or label name. These are recognized
+here with per-language phrase tables; everything else in the utterance
+becomes the title.
+
+The parser only answers when nothing is left that it does not understand:
+leftover date words ("next", "week", month names), digits, names of
+projects, labels or users it could not attribute, conflicting keywords,
+keywords that are part of a project or label name ("the urgent label"),
+connectors or words left dangling next to a removed keyword or name, or
+a date in the past all defer the command to the LLM. Dates follow the
+prompt's conventions (UTC, 12:00 when no time is given, the default due
+date rule). The English priority and recurrence keywords are the ones the
+prompt lists (`prompt_builder.PRIORITY_KEYWORDS` / `REPEAT_SECONDS`).
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+from ..const import DEFAULT_PROJECT_ID
+from .metadata_index import MetadataIndex
+from .prompt_builder import PRIORITY_KEYWORDS, REPEAT_SECONDS, default_due_date_value
+from .records import is_metadata_item
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_TITLE_LENGTH = 80  # longer leftovers are rarely just a title
+MIN_NAME_LENGTH = 2  # shorter project/label/user names are not matched
+
+# --------------- Vocabulary ---------------
+
+# Days from today
+_RELATIVE_DAYS: Dict[int, Dict[str, Tuple[str, ...]]] = {
+    0: {
+        "en": ("today",),
+        "fr": ("aujourd'hui", "aujourd’hui"),
+        "es": ("hoy",),
+        "pt": ("hoje",),
+        "ru": ("сегодня",),
+        "hi": ("आज",),
+        "zh-Hans": ("今天", "今日"),
+        "ar": ("اليوم",),
+        "bn": ("আজ",),
+        "id": ("hari ini",),
+        "de": ("heute",),
+    },
+    1: {
+        "en": ("tomorrow",),
+        "fr": ("demain",),
+        "es": ("mañana",),
+        "pt": ("amanhã",),
+        "ru": ("завтра",),
+        "hi": ("कल",),
+        "zh-Hans": ("明天", "明日"),
+        "ar": ("غدا", "غدًا", "غداً", "بكرة"),
+        "bn": ("আগামীকাল", "কাল"),
+        "id": ("besok",),
+        "de": ("morgen",),
+    },
+    2: {
+        "en": ("the day after tomorrow", "day after tomorrow"),
+        "fr": ("après-demain", "après demain"),
+        "es": ("pasado mañana",),
+        "pt": ("depois de amanhã",),
+        "ru": ("послезавтра",),
+        "hi": ("परसों",),
+        "zh-Hans": ("后天",),
+        "ar": ("بعد غد", "بعد غدا", "بعد غدٍ"),
+        "bn": ("পরশু",),
+        "id": ("lusa",),
+        "de": ("übermorgen",),
+    },
+}
+
+# datetime.weekday() numbers
+_WEEKDAYS: Dict[int, Dict[str, Tuple[str, ...]]] = {
+    0: {
+        "en": ("monday",),
+        "fr": ("lundi",),
+        "es": ("lunes",),
+        "pt": ("segunda-feira", "segunda"),
+        "ru": ("понедельник", "понедельника"),
+        "hi": ("सोमवार",),
+        "zh-Hans": ("星期一", "礼拜一", "周一"),
+        "ar": ("الاثنين", "الإثنين"),
+        "bn": ("সোমবার", "সোমবারে"),
+        "id": ("senin",),
+        "de": ("montag",),
+    },
+    1: {
+        "en": ("tuesday",),
+        "fr": ("mardi",),
+        "es": ("martes",),
+        "pt": ("terça-feira", "terça"),
+        "ru": ("вторник", "вторника"),
+        "hi": ("मंगलवार",),
+        "zh-Hans": ("星期二", "礼拜二", "周二"),
+        "ar": ("الثلاثاء",),
+        "bn": ("মঙ্গলবার", "মঙ্গলবারে"),
+        "id": ("selasa",),
+        "de": ("dienstag",),
+    },
+    2: {
+        "en": ("wednesday",),
+        "fr": ("mercredi",),
+        "es": ("miércoles",),
+        "pt": ("quarta-feira", "quarta"),
+        "ru": ("среда", "среду", "среды"),
+        "hi": ("बुधवार",),
+        "zh-Hans": ("星期三", "礼拜三", "周三"),
+        "ar": ("الأربعاء", "الاربعاء"),
+        "bn": ("বুধবার", "বুধবারে"),
+        "id": ("rabu",),
+        "de": ("mittwoch",),
+    },
+    3: {
+        "en": ("thursday",),
+        "fr": ("jeudi",),
+        "es": ("jueves",),
+        "pt": ("quinta-feira", "quinta"),
+        "ru": ("четверг", "четверга"),
+        "hi": ("गुरुवार", "बृहस्पतिवार"),
+        "zh-Hans": ("星期四", "礼拜四", "周四"),
+        "ar": ("الخميس",),
+        "bn": ("বৃহস্পতিবার", "বৃহস্পতিবারে"),
+        "id": ("kamis",),
+        "de": ("donnerstag",),
+    },
+    4: {
+        "en": ("friday",),
+        "fr": ("vendredi",),
+        "es": ("viernes",),
+        "pt": ("sexta-feira", "sexta"),
+        "ru": ("пятница", "пятницу", "пятницы"),
+        "hi": ("शुक्रवार",),
+        "zh-Hans": ("星期五", "礼拜五", "周五"),
+        "ar": ("الجمعة",),
+        "bn": ("শুক্রবার", "শুক্রবারে"),
+        "id": ("jumat", "jum'at"),
+        "de": ("freitag",),
+    },
+    5: {
+        "en": ("saturday",),
+        "fr": ("samedi",),
+        "es": ("sábado",),
+        "pt": ("sábado",),
+        "ru": ("суббота", "субботу", "субботы"),
+        "hi": ("शनिवार",),
+        "zh-Hans": ("星期六", "礼拜六", "周六"),
+        "ar": ("السبت",),
+        "bn": ("শনিবার", "শনিবারে"),
+        "id": ("sabtu",),
+        "de": ("samstag",),
+    },
+    6: {
+        "en": ("sunday",),
+        "fr": ("dimanche",),
+        "es": ("domingo",),
+        "pt": ("domingo",),
+        "ru": ("воскресенье", "воскресенья"),
+        "hi": ("रविवार",),
+        "zh-Hans": ("星期日", "星期天", "礼拜天", "周日"),
+        "ar": ("الأحد", "الاحد"),
+        "bn": ("রবিবার", "রবিবারে", "রোববার"),
+        "id": ("minggu",),
+        "de": ("sonntag",),
+    },
+}
+
+_REPEATS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "daily": {
+        "en": ("daily", "every day", "each day"),
+        "fr": ("tous les jours", "chaque jour", "quotidiennement"),
+        "es": ("diariamente", "todos los días", "cada día"),
+        "pt": ("diariamente", "todos os dias", "todo dia", "cada dia"),
+        "ru": ("ежедневно", "каждый день"),
+        "hi": ("रोज़", "रोज", "रोजाना", "हर दिन", "प्रतिदिन"),
+        "zh-Hans": ("每天", "每日"),
+        "ar": ("يوميا", "يوميًا", "يومياً", "كل يوم"),
+        "bn": ("প্রতিদিন", "রোজ", "প্রত্যেক দিন"),
+        "id": ("setiap hari", "tiap hari", "harian"),
+        "de": ("täglich", "jeden tag"),
+    },
+    "weekly": {
+        "en": ("weekly", "every week", "each week"),
+        "fr": ("chaque semaine", "toutes les semaines"),
+        "es": ("semanalmente", "cada semana", "todas las semanas"),
+        "pt": ("semanalmente", "toda semana", "todas as semanas", "cada semana"),
+        "ru": ("еженедельно", "каждую неделю"),
+        "hi": ("हर हफ्ते", "हर हफ़्ते", "हर सप्ताह", "साप्ताहिक"),
+        "zh-Hans": ("每周", "每星期", "每个星期"),
+        "ar": ("أسبوعيا", "أسبوعيًا", "أسبوعياً", "كل أسبوع"),
+        "bn": ("প্রতি সপ্তাহে", "প্রতি সপ্তাহ", "সাপ্তাহিক"),
+        "id": ("setiap minggu", "tiap minggu", "mingguan"),
+        "de": ("wöchentlich", "jede woche"),
+    },
+    "monthly": {
+        "en": ("monthly", "every month", "each month"),
+        "fr": ("chaque mois", "tous les mois", "mensuellement"),
+        "es": ("mensualmente", "cada mes", "todos los meses"),
+        "pt": ("mensalmente", "todo mês", "todos os meses", "cada mês"),
+        "ru": ("ежемесячно", "каждый месяц"),
+        "hi": ("हर महीने", "मासिक"),
+        "zh-Hans": ("每月", "每个月"),
+        "ar": ("شهريا", "شهريًا", "شهرياً", "كل شهر"),
+        "bn": ("প্রতি মাসে", "মাসিক"),
+        "id": ("setiap bulan", "tiap bulan", "bulanan"),
+        "de": ("monatlich", "jeden monat"),
+    },
+    "yearly": {
+        "en": ("yearly", "annually", "every year", "each year"),
+        "fr": ("chaque année", "tous les ans", "annuellement"),
+        "es": ("anualmente", "cada año", "todos los años"),
+        "pt": ("anualmente", "todo ano", "todos os anos", "cada ano"),
+        "ru": ("ежегодно", "каждый год"),
+        "hi": ("हर साल", "सालाना", "वार्षिक"),
+        "zh-Hans": ("每年",),
+        "ar": ("سنويا", "سنويًا", "سنوياً", "كل سنة", "كل عام"),
+        "bn": ("প্রতি বছর", "প্রতি বছরে", "বার্ষিক"),
+        "id": ("setiap tahun", "tiap tahun", "tahunan"),
+        "de": ("jährlich", "jedes jahr"),
+    },
+}
+
+_PRIORITIES: Dict[int, Dict[str, Tuple[str, ...]]] = {
+    5: {
+        "en": PRIORITY_KEYWORDS[5] + ("urgently", "as soon as possible"),
+        "fr": ("urgent", "urgente", "critique", "d'urgence", "immédiatement"),
+        "es": ("urgente", "crítico", "crítica", "emergencia", "inmediatamente"),
+        "pt": ("urgente", "crítico", "crítica", "emergência", "imediatamente"),
+        "ru": ("срочно", "срочная", "срочный", "критично", "немедленно"),
+        "hi": ("अत्यावश्यक", "अर्जेंट", "तुरंत", "आपातकालीन"),
+        "zh-Hans": ("紧急", "立刻", "马上", "立即", "尽快"),
+        "ar": ("عاجل", "عاجلة", "طارئ", "فورا", "فورًا", "فوراً", "حالا"),
+        "bn": ("জরুরি", "জরুরী", "অবিলম্বে", "এখনই"),
+        "id": ("mendesak", "darurat", "segera", "secepatnya", "kritis"),
+        "de": ("dringend", "kritisch", "notfall", "sofort", "asap"),
+    },
+    4: {
+        "en": PRIORITY_KEYWORDS[4] + ("high priority",),
+        "fr": (
+            "important",
+            "importante",
+            "haute priorité",
+            "priorité haute",
+            "bientôt",
+        ),
+        "es": ("importante", "alta prioridad", "prioridad alta", "pronto"),
+        "pt": ("importante", "alta prioridade", "prioridade alta", "em breve"),
+        "ru": ("важно", "важная", "важный", "высокий приоритет", "скоро"),
+        "hi": ("महत्वपूर्ण", "ज़रूरी", "जरूरी", "उच्च प्राथमिकता"),
+        "zh-Hans": ("重要", "高优先级"),
+        "ar": ("مهم", "هام", "أولوية عالية"),
+        "bn": ("গুরুত্বপূর্ণ", "উচ্চ অগ্রাধিকার"),
+        "id": ("penting", "prioritas tinggi"),
+        "de": ("wichtig", "hohe priorität", "bald"),
+    },
+    3: {
+        "en": PRIORITY_KEYWORDS[3],
+        "fr": ("priorité moyenne", "si possible"),
+        "es": ("prioridad media", "cuando sea posible"),
+        "pt": ("prioridade média", "quando possível"),
+        "ru": ("средний приоритет", "по возможности"),
+        "hi": ("मध्यम प्राथमिकता", "जब संभव हो"),
+        "zh-Hans": ("中优先级", "尽可能"),
+        "ar": ("أولوية متوسطة", "عند الإمكان"),
+        "bn": ("মাঝারি অগ্রাধিকার", "সম্ভব হলে"),
+        "id": ("prioritas sedang", "jika memungkinkan"),
+        "de": ("mittlere priorität", "wenn möglich"),
+    },
+    2: {
+        "en": PRIORITY_KEYWORDS[2],
+        "fr": (
+            "priorité basse",
+            "basse priorité",
+            "pas urgent",
+            "quand tu as le temps",
+        ),
+        "es": (
+            "baja prioridad",
+            "prioridad baja",
+            "no urgente",
+            "cuando tengas tiempo",
+        ),
+        "pt": (
+            "baixa prioridade",
+            "prioridade baixa",
+            "não urgente",
+            "quando tiver tempo",
+        ),
+        "ru": ("низкий приоритет", "не срочно", "когда будет время"),
+        "hi": ("कम प्राथमिकता", "निम्न प्राथमिकता", "जल्दी नहीं"),
+        "zh-Hans": ("低优先级", "不急", "不紧急", "有空的时候"),
+        "ar": ("أولوية منخفضة", "غير عاجل", "غير عاجلة"),
+        "bn": ("কম অগ্রাধিকার", "জরুরি নয়", "সময় পেলে"),
+        "id": ("prioritas rendah", "tidak mendesak", "kalau sempat"),
+        "de": ("niedrige priorität", "nicht dringend", "wenn du zeit hast"),
+    },
+    1: {
+        "en": PRIORITY_KEYWORDS[1] + ("someday",),
+        "fr": ("un de ces jours", "pas pressé", "rien ne presse"),
+        "es": ("algún día", "sin prisa"),
+        "pt": ("algum dia", "sem pressa"),
+        "ru": ("когда-нибудь", "без спешки", "не спеша"),
+        "hi": ("कभी भी", "कभी न कभी"),
+        "zh-Hans": ("以后再说", "不着急", "有空再说"),
+        "ar": ("في وقت ما", "بلا عجلة", "لا عجلة"),
+        "bn": ("কোনো এক সময়", "তাড়া নেই"),
+        "id": ("kapan-kapan", "tidak buru-buru"),
+        "de": ("irgendwann", "keine eile"),
+    },
+}
+
+# Units of "in 10 minutes" / "in 2 hours": due dates counted from the moment
+# of speaking, which cannot be reused for a later repeat (see parse_cache)
+_DURATION_UNITS: Dict[str, Tuple[str, ...]] = {
+    "en": ("minute", "minutes", "min", "mins", "hour", "hours", "hr", "hrs"),
+    "fr": ("minute", "minutes", "heure", "heures"),
+    "es": ("minuto", "minutos", "hora", "horas"),
+    "pt": ("minuto", "minutos", "hora", "horas"),
+    "ru": ("минуту", "минуты", "минут", "час", "часа", "часов"),
+    "hi": ("मिनट", "घंटा", "घंटे"),
+    "zh-Hans": ("分钟", "小时", "钟头"),
+    "ar": ("دقيقة", "دقائق", "ساعة", "ساعات", "ساعتين"),
+    "bn": ("মিনিট", "ঘণ্টা", "ঘন্টা"),
+    "id": ("menit", "jam"),
+    "de": ("minute", "minuten", "stunde", "stunden"),
+}
+
+
+def _phrases(text: str) -> Tuple[str, ...]:
+    return tuple(text.split("|"))
+
+
+@dataclass(frozen=True)
+class _Language:
+    """Connector words and the phrases that send a command to the LLM.
+
+    `*_before` / `*_after` are optional words around a date, time, project
+    or label (`label_weak` only counts together with `label_after`).
+    `hints` left in the title mean an unhandled date or assignment;
+    `ambiguous` phrases defer the whole command.
+    """
+
+    date_before: Tuple[str, ...] = ()
+    date_after: Tuple[str, ...] = ()
+    weekday_before: Tuple[str, ...] = ()
+    time_before: Tuple[str, ...] = ()
+    time_after: Tuple[str, ...] = ()
+    am: Tuple[str, ...] = ()
+    pm: Tuple[str, ...] = ()
+    project_before: Tuple[str, ...] = ()
+    project_after: Tuple[str, ...] = ()
+    label_before: Tuple[str, ...] = ()
+    label_weak: Tuple[str, ...] = ()
+    label_after: Tuple[str, ...] = ()
+    fillers: Tuple[str, ...] = ()
+    hints: Tuple[str, ...] = ()
+    ambiguous: Tuple[str, ...] = ()
+    twelve_hour: bool = True  # bare hours 1-12 need a daypart (am/pm)
+    spaced: bool = True  # words are separated by spaces
+
+
+_LANGUAGES: Dict[str, _Language] = {
+    "en": _Language(
+        date_before=_phrases("by|for|due|until|on"),
+        weekday_before=_phrases("on|this|on this|by|for|due|until"),
+        time_before=_phrases("at|by|around"),
+        time_after=_phrases("o'clock"),
+        am=_phrases("am|a.m."),
+        pm=_phrases("pm|p.m."),
+        project_before=_phrases(
+            "in|in the|in my|in project|in the project|to|to the|to my|to project"
+            "|to the project|into|into the|on|on the|for|for the|under"
+        ),
+        project_after=_phrases("project|list"),
+        label_before=_phrases(
+            "with the label|with label|with the tag|with tag|labeled|labelled"
+            "|labeled as|tagged|tagged as|tagged with|label|tag"
+        ),
+        label_weak=_phrases("with the|with"),
+        label_after=_phrases("label|tag"),
+        fillers=_phrases(
+            "please|a task|task|a reminder to|reminder to|reminder|remind me to"
+            "|to do|todo|to"
+        ),
+        hints=_phrases(
+            "next|last|this|coming|after|before|within|every|each|week|weeks|month"
+            "|months|year|years|day|days|hour|hours|minute|minutes|tonight|morning"
+            "|afternoon|evening|noon|midnight|weekend|end of|yesterday|assign"
+            "|january|february|march|april|may|june|july|august|september|october"
+            "|november|december"
+        ),
+    ),
+    "de": _Language(
+        date_before=_phrases("bis|für|spätestens"),
+        weekday_before=_phrases("am|bis|bis zum|für|diesen|kommenden|am kommenden"),
+        time_before=_phrases("um|gegen|bis"),
+        time_after=_phrases("uhr"),
+        am=_phrases("morgens|früh|vormittags"),
+        pm=_phrases("abends|nachmittags"),
+        project_before=_phrases(
+            "in|im|ins|in die|in den|in das|in der|zu|zum|zur|für|im projekt"
+            "|ins projekt|in die liste"
+        ),
+        project_after=_phrases("projekt|liste"),
+        label_before=_phrases(
+            "mit dem label|mit label|mit dem tag|mit tag|mit dem etikett"
+            "|markiert als|getaggt mit|label|tag|etikett"
+        ),
+        label_weak=_phrases("mit dem|mit"),
+        label_after=_phrases("label|tag|etikett"),
+        fillers=_phrases(
+            "bitte|eine aufgabe|aufgabe|erinnerung|erinnere mich daran|erinnere mich"
+        ),
+        hints=_phrases(
+            "nächste|nächsten|nächster|nächstes|kommende|übernächste|letzte|diese"
+            "|dieser|jeden|jede|jedes|woche|wochen|monat|monate|monaten|jahr|jahre"
+            "|jahren|tag|tage|tagen|stunde|stunden|minute|minuten|früh|morgens"
+            "|vormittag|mittag|mittags|nachmittag|abend|abends|nacht|wochenende"
+            "|ende|gestern|zuweisen|januar|februar|märz|april|mai|juni|juli|august"
+            "|september|oktober|november|dezember"
+        ),
+        ambiguous=_phrases("heute morgen|am morgen|guten morgen"),
+        twelve_hour=False,
+    ),
+    "fr": _Language(
+        date_before=_phrases("pour|d'ici"),
+        weekday_before=_phrases("pour|d'ici|ce|pour ce"),
+        time_before=_phrases("à|a|vers|pour"),
+        time_after=_phrases("h|heures|heure"),
+        am=_phrases("du matin"),
+        pm=_phrases("du soir|de l'après-midi"),
+        project_before=_phrases(
+            "dans|dans le|dans la|dans les|dans le projet|dans la liste|au"
+            "|au projet|à|à la liste|en|pour|pour le|pour la"
+        ),
+        label_before=_phrases(
+            "avec l'étiquette|avec étiquette|avec le tag|avec le label|étiqueté"
+            "|étiquetée|étiquette|tag|label"
+        ),
+        label_weak=_phrases("avec"),
+        fillers=_phrases(
+            "s'il te plaît|s'il vous plaît|une tâche|tâche|rappel|rappelle-moi de"
+            "|rappelle-moi d'"
+        ),
+        hints=_phrases(
+            "prochain|prochaine|dernier|dernière|cette|chaque|tous les|toutes les"
+            "|semaine|semaines|mois|an|ans|année|années|jour|jours|heure|heures"
+            "|minute|minutes|ce soir|soir|matin|midi|minuit|après-midi|week-end|fin"
+            "|dans une|dans un|hier|assigner|attribuer|janvier|février|mars|avril"
+            "|mai|juin|juillet|août|septembre|octobre|novembre|décembre"
+        ),
+        twelve_hour=False,
+    ),
+    "es": _Language(
+        date_before=_phrases("para|hasta"),
+        weekday_before=_phrases("el|para el|este|hasta el"),
+        time_before=_phrases("a las|a la|sobre las|hacia las"),
+        time_after=_phrases("h|horas"),
+        am=_phrases("de la mañana"),
+        pm=_phrases("de la tarde|de la noche"),
+        project_before=_phrases(
+            "en|en el|en la|en el proyecto|en la lista|a|al|al proyecto|a la"
+            "|a la lista|para|para el"
+        ),
+        label_before=_phrases(
+            "con la etiqueta|con etiqueta|etiquetado|etiquetada|etiquetado como"
+            "|etiqueta|con el tag|tag"
+        ),
+        label_weak=_phrases("con"),
+        fillers=_phrases(
+            "por favor|una tarea|tarea|recordatorio para|recordatorio"
+            "|recuérdame que|recuérdame"
+        ),
+        hints=_phrases(
+            "próximo|próxima|siguiente|que viene|este|esta|cada|todos los|todas las"
+            "|semana|semanas|mes|meses|año|años|día|días|hora|horas|minuto|minutos"
+            "|noche|tarde|mediodía|medianoche|fin de semana|fin de|dentro de|ayer"
+            "|asignar|enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre"
+            "|octubre|noviembre|diciembre"
+        ),
+        ambiguous=_phrases("por la mañana|de la mañana|en la mañana|esta mañana"),
+    ),
+    "pt": _Language(
+        date_before=_phrases("para|até"),
+        weekday_before=_phrases("na|no|para|para a|para o|até|até a|até o|nesta|neste"),
+        time_before=_phrases("às|as|à|por volta das"),
+        time_after=_phrases("h|horas"),
+        am=_phrases("da manhã"),
+        pm=_phrases("da tarde|da noite"),
+        project_before=_phrases("em|no|na|no projeto|na lista|para|para o|para a|ao|à"),
+        label_before=_phrases(
+            "com a etiqueta|com etiqueta|etiqueta|com a tag|com tag|tag"
+            "|marcado como|com o rótulo|rótulo"
+        ),
+        label_weak=_phrases("com"),
+        fillers=_phrases(
+            "por favor|uma tarefa|tarefa|lembrete para|lembrete|lembrar de"
+            "|me lembre de|lembre-me de"
+        ),
+        hints=_phrases(
+            "próximo|próxima|que vem|este|esta|cada|todo|todos|todas|semana|semanas"
+            "|mês|meses|ano|anos|dia|dias|hora|horas|minuto|minutos|manhã|tarde"
+            "|noite|meio-dia|meia-noite|fim de semana|fim de|daqui a|depois|ontem"
+            "|atribuir|janeiro|fevereiro|março|abril|maio|junho|julho|agosto"
+            "|setembro|outubro|novembro|dezembro"
+        ),
+    ),
+    "ru": _Language(
+        date_before=_phrases("на|до|к"),
+        weekday_before=_phrases("в|во|на|до|к|в этот|в эту|в это"),
+        time_before=_phrases("в|к|около"),
+        time_after=_phrases("часов|часа|час|ч"),
+        am=_phrases("утра"),
+        pm=_phrases("вечера|дня"),
+        project_before=_phrases("в|во|в проект|в проекте|в список|для|к"),
+        label_before=_phrases(
+            "с меткой|с тегом|с ярлыком|метка|тег|ярлык|меткой|тегом"
+        ),
+        fillers=_phrases(
+            "пожалуйста|задача|задачу|напоминание|напомни мне|напомни|напомнить"
+        ),
+        hints=_phrases(
+            "следующий|следующей|следующую|следующее|следующем|ближайший|ближайшую"
+            "|этот|эту|через|после|каждый|каждую|каждое|неделя|неделю|недели|месяц"
+            "|месяца|год|года|лет|день|дня|дней|час|часа|часов|минут|минуту|утром"
+            "|днём|днем|вечером|ночью|полдень|полночь|выходные|конец|конце|вчера"
+            "|назначить|январь|января|февраль|февраля|март|марта|апрель|апреля|май"
+            "|мая|июнь|июня|июль|июля|август|августа|сентябрь|сентября|октябрь"
+            "|октября|ноябрь|ноября|декабрь|декабря"
+        ),
+        twelve_hour=False,
+    ),
+    "hi": _Language(
+        date_after=_phrases("तक|को"),
+        time_after=_phrases("बजे"),
+        am=_phrases("सुबह"),
+        pm=_phrases("शाम|रात|दोपहर"),
+        project_after=_phrases("में|प्रोजेक्ट में|सूची में|के लिए|प्रोजेक्ट"),
+        label_before=_phrases("लेबल|टैग"),
+        label_after=_phrases("लेबल|लेबल के साथ|टैग|टैग के साथ"),
+        fillers=_phrases("कृपया|एक टास्क|टास्क|कार्य|रिमाइंडर|याद दिलाना|याद दिलाओ"),
+        hints=_phrases(
+            "अगले|अगला|अगली|पिछले|इस|हर|प्रत्येक|हफ्ते|हफ़्ते|सप्ताह|महीने|महीना"
+            "|साल|वर्ष|दिन|दिनों|घंटे|मिनट|सुबह|शाम|रात|दोपहर|बाद|पहले|सौंपें|सौंपो"
+            "|जनवरी|फ़रवरी|फरवरी|मार्च|अप्रैल|मई|जून|जुलाई|अगस्त|सितंबर|अक्टूबर"
+            "|नवंबर|दिसंबर"
+        ),
+    ),
+    "zh-Hans": _Language(
+        date_before=_phrases("在|到"),
+        date_after=_phrases("前|之前"),
+        weekday_before=_phrases("这|这个|本"),
+        time_before=_phrases("在"),
+        time_after=_phrases("点钟|点"),
+        am=_phrases("上午|早上|早晨"),
+        pm=_phrases("下午|晚上|傍晚"),
+        project_before=_phrases("添加到|加到|放到|到|在"),
+        project_after=_phrases("项目|列表|里|中"),
+        label_before=_phrases("标签|标记为|带标签"),
+        label_after=_phrases("标签"),
+        fillers=_phrases("请|一个任务|任务|提醒我|提醒"),
+        hints=_phrases(
+            "下周|下个|下星期|下礼拜|下月|每|周|星期|月|年|天|小时|分钟|号|日|后|以后|之后|早上|上午|中午|下午|晚上|今晚|明早"
+            "|周末"
+        ),
+        spaced=False,
+    ),
+    "ar": _Language(
+        date_before=_phrases("حتى|بحلول"),
+        weekday_before=_phrases("يوم|في يوم|حتى|بحلول|هذا"),
+        time_before=_phrases("الساعة|في الساعة|على الساعة"),
+        am=_phrases("صباحا|صباحًا|صباحاً"),
+        pm=_phrases("مساء|مساءً|مساءا|ظهرا|ظهرًا"),
+        project_before=_phrases(
+            "في|في مشروع|في قائمة|إلى|إلى مشروع|إلى قائمة|الى|ضمن|لمشروع"
+        ),
+        label_before=_phrases(
+            "مع تصنيف|مع التصنيف|بتصنيف|بالتصنيف|تصنيف|وسم|بوسم|مع الوسم"
+        ),
+        label_weak=_phrases("مع"),
+        fillers=_phrases("من فضلك|رجاء|مهمة|تذكير|ذكرني أن|ذكرني"),
+        hints=_phrases(
+            "القادم|القادمة|المقبل|المقبلة|بعد|قبل|كل|أسبوع|الأسبوع|أسابيع|شهر"
+            "|الشهر|أشهر|سنة|السنة|عام|العام|يوم|أيام|ساعة|ساعات|دقيقة|دقائق|صباح"
+            "|الصباح|مساء|المساء|الليلة|الظهر|منتصف|نهاية|عطلة|أمس|تعيين|يناير"
+            "|فبراير|مارس|أبريل|مايو|يونيو|يوليو|أغسطس|سبتمبر|أكتوبر|نوفمبر|ديسمبر"
+        ),
+    ),
+    "bn": _Language(
+        date_after=_phrases("এর মধ্যে"),
+        time_after=_phrases("টার সময়|টায়|টা"),
+        am=_phrases("সকাল"),
+        pm=_phrases("বিকেল|সন্ধ্যা|রাত|দুপুর"),
+        project_after=_phrases("এ|তে|প্রজেক্টে|প্রকল্পে|তালিকায়"),
+        label_before=_phrases("লেবেল|ট্যাগ"),
+        label_after=_phrases("লেবেল|লেবেল দিয়ে|ট্যাগ|ট্যাগ দিয়ে"),
+        fillers=_phrases("দয়া করে|অনুগ্রহ করে|টাস্ক|রিমাইন্ডার|মনে করিয়ে দাও"),
+        hints=_phrases(
+            "পরের|আগামী|এই|প্রতি|সপ্তাহ|সপ্তাহে|মাস|মাসে|বছর|বছরে|দিন|দিনে|ঘণ্টা"
+            "|মিনিট|সকাল|সকালে|দুপুর|বিকেল|বিকেলে|সন্ধ্যা|সন্ধ্যায়|রাত|রাতে|পরে"
+            "|আগে|গতকাল|জানুয়ারি|ফেব্রুয়ারি|মার্চ|এপ্রিল|মে|জুন|জুলাই|আগস্ট"
+            "|সেপ্টেম্বর|অক্টোবর|নভেম্বর|ডিসেম্বর"
+        ),
+    ),
+    "id": _Language(
+        date_before=_phrases("untuk|sampai|hingga|paling lambat"),
+        weekday_before=_phrases("hari|pada|pada hari|untuk|sampai"),
+        time_before=_phrases("jam|pukul|pada jam|pada pukul"),
+        am=_phrases("pagi"),
+        pm=_phrases("siang|sore|malam"),
+        project_before=_phrases(
+            "di|ke|ke dalam|dalam|di proyek|ke proyek|di daftar|ke daftar|untuk"
+        ),
+        label_before=_phrases("dengan label|berlabel|label|dengan tag|tag"),
+        label_weak=_phrases("dengan"),
+        fillers=_phrases(
+            "tolong|mohon|sebuah tugas|tugas|pengingat|ingatkan saya untuk"
+            "|ingatkan aku untuk|ingatkan"
+        ),
+        hints=_phrases(
+            "depan|berikutnya|lalu|setiap|tiap|minggu|bulan|tahun|hari|jam|menit"
+            "|pagi|siang|sore|malam|nanti|akhir|kemarin|tugaskan|januari|februari"
+            "|maret|april|mei|juni|juli|agustus|september|oktober|november|desember"
+        ),
+    ),
+}
+
+# --------------- Pattern compilation ---------------
+
+_PUNCTUATION = "\\s,.;:!?¡¿\"'«»()“”„،।，。！？"
+_LEFT = f"(?<![^{_PUNCTUATION}])"
+_RIGHT = f"(?![^{_PUNCTUATION}])"
+
+
+def _fold(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _alternation(phrases: Iterable[str], spaced: bool = True) -> str:
+    """Regex alternation of phrases, longest first, any whitespace between words."""
+    gap = r"\s+" if spaced else r"\s*"
+    ordered = sorted({_fold(p) for p in phrases if p}, key=len, reverse=True)
+    return "|".join(gap.join(map(re.escape, p.split())) for p in ordered)
+
+
+def _optional(phrases: Sequence[str], spaced: bool, before: bool) -> str:
+    if not phrases:
+        return ""
+    gap = r"\s+" if spaced else r"\s*"
+    body = _alternation(phrases, spaced)
+    return f"(?:(?:{body}){gap})?" if before else f"(?:{gap}(?:{body}))?"
+
+
+def _words(table: Dict[Any, Dict[str, Tuple[str, ...]]], lang: str) -> Dict[str, Any]:
+    return {_fold(p): key for key, langs in table.items() for p in langs.get(lang, ())}
+
+
+@dataclass(frozen=True)
+class _Patterns:
+    lang: _Language
+    left: str
+    right: str
+    relative_days: Dict[str, int]
+    weekdays: Dict[str, int]
+    repeats: Dict[str, str]
+    priorities: Dict[str, int]
+    meridiem: Dict[str, str]
+    date: Pattern[str]
+    weekday: Pattern[str]
+    time: Pattern[str]
+    repeat: Optional[Pattern[str]]
+    priority: Optional[Pattern[str]]
+    hints: Optional[Pattern[str]]
+    ambiguous: Optional[Pattern[str]]
+    fillers: Optional[Pattern[str]]
+    durations: Optional[Pattern[str]]
+
+
+def _phrase_pattern(phrases: Iterable[str], lang: _Language, left: str, right: str):
+    body = _alternation(phrases, lang.spaced)
+    if not body:
+        return None
+    return re.compile(f"{left}(?P<w>{body}){right}", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _patterns(code: str) -> _Patterns:
+    lang = _LANGUAGES[code]
+    left, right = (_LEFT, _RIGHT) if lang.spaced else ("", "")
+    relative_days = _words(_RELATIVE_DAYS, code)
+    weekdays = _words(_WEEKDAYS, code)
+    repeats = _words(_REPEATS, code)
+    priorities = _words(_PRIORITIES, code)
+    meridiem = {_fold(p): "am" for p in lang.am}
+    meridiem.update({_fold(p): "pm" for p in lang.pm})
+    gap = r"\s*"
+
+    def dated(words: Dict[str, Any], before: Sequence[str]) -> Pattern[str]:
+        return re.compile(
+            f"{left}{_optional(before, lang.spaced, True)}"
+            f"(?P<w>{_alternation(words, lang.spaced)})"
+            f"{_optional(lang.date_after, lang.spaced, False)}{right}",
+            re.IGNORECASE,
+        )
+
+    daypart = _alternation(meridiem, lang.spaced)
+    daypart_before = f"(?:(?P<dp1>{daypart}){gap})?" if daypart else ""
+    daypart_after = f"(?:{gap}(?P<dp2>{daypart}))?" if daypart else ""
+    time_before = (
+        f"(?:(?P<pre>{_alternation(lang.time_before, lang.spaced)}){gap})?"
+        if lang.time_before
+        else ""
+    )
+    time_after = (
+        f"(?:{gap}(?P<suf>{_alternation(lang.time_after, lang.spaced)}))?"
+        if lang.time_after
+        else ""
+    )
+    time_pattern = re.compile(
+        f"{left}{time_before}{daypart_before}"
+        r"(?<!\d)(?P<h>\d{1,2})(?:[:.h点](?P<m>\d{2})分?)?(?!\d)"
+        f"{time_after}{daypart_after}{right}",
+        re.IGNORECASE,
+    )
+    return _Patterns(
+        lang=lang,
+        left=left,
+        right=right,
+        relative_days=relative_days,
+        weekdays=weekdays,
+        repeats=repeats,
+        priorities=priorities,
+        meridiem=meridiem,
+        date=dated(relative_days, lang.date_before),
+        weekday=dated(weekdays, lang.date_before + lang.weekday_before),
+        time=time_pattern,
+        repeat=_phrase_pattern(repeats, lang, left, right),
+        priority=_phrase_pattern(priorities, lang, left, right),
+        hints=_phrase_pattern(lang.hints, lang, left, right),
+        ambiguous=_phrase_pattern(lang.ambiguous, lang, left, right),
+        fillers=_phrase_pattern(lang.fillers, lang, left, right),
+        durations=_phrase_pattern(_DURATION_UNITS.get(code, ()), lang, left, right),
+    )
+
+
+# --------------- Parser ---------------
+
+
+class _Defer(Exception):
+    """The command needs the LLM; args[0] is the reason."""
+
+
+@dataclass
+class FastPathStats:
+    attempts: int = 0
+    hits: int = 0
+    deferred: Dict[str, int] = field(default_factory=dict)
+    total_ms: float = 0.0
+    last_ms: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.attempts, 3) if self.attempts else None,
+            "deferred": dict(self.deferred),
+            "avg_ms": round(self.total_ms / self.attempts, 3)
+            if self.attempts
+            else None,
+            "last_ms": self.last_ms,
+        }
+
+
+# Left where a keyword (or a name introduced only by a connector) was
+# removed, so the words around it can be checked; never in the title
+_KEYWORD_MARK = "\x00"
+_NAME_MARK = "\x01"
+
+
+def _remove(text: str, match: "re.Match[str]", mark: str = "") -> str:
+    return f"{text[: match.start()]} {mark} {text[match.end():]}"
+
+
+def _single(
+    pattern: Optional[Pattern[str]], text: str, values: Dict[str, Any], what: str
+):
+    """The one value `pattern` finds in `text` and the text without it."""
+    if pattern is None:
+        return None, text
+    matches = list(pattern.finditer(text))
+    if not matches:
+        return None, text
+    found = {values[_fold(m.group("w"))] for m in matches}
+    if len(found) > 1:
+        raise _Defer(f"conflicting_{what}")
+    for match in reversed(matches):
+        text = _remove(text, match, _KEYWORD_MARK)
+    return found.pop(), text
+
+
+def days_until(now: datetime, weekday: int) -> int:
+    """Days to the next `weekday` after `now` (1-7; a weekday means the next one)."""
+    return (weekday - now.weekday()) % 7 or 7
+
+
+def relative_date(text: str, lang: str) -> Tuple[Optional[int], Optional[int]]:
+    """The (day offset, weekday) named in `text`, read as the fast path does.
+
+    Each is None when absent or named several times with different values.
+    """
+    patterns = _patterns(lang if lang in _LANGUAGES else "en")
+    found: List[Optional[int]] = []
+    for pattern, values in (
+        (patterns.date, patterns.relative_days),
+        (patterns.weekday, patterns.weekdays),
+    ):
+        try:
+            value, _rest = _single(pattern, text, values, "date")
+        except _Defer:
+            value = None
+        found.append(value)
+    return found[0], found[1]
+
+
+def counts_from_now(text: str, lang: str) -> bool:
+    """Whether `text` names minutes or hours, as in "in 10 minutes"."""
+    pattern = _patterns(lang if lang in _LANGUAGES else "en").durations
+    return pattern is not None and pattern.search(text) is not None
+
+
+def _names(items: Iterable[Any], fields: Sequence[str]) -> List[Tuple[Any, str]]:
+    names = []
+    for item in items or []:
+        if not is_metadata_item(item) or item.get("id") is None:
+            continue
+        for name in dict.fromkeys(str(item.get(f) or "").strip() for f in fields):
+            if len(name) >= MIN_NAME_LENGTH:
+                names.append((item.get("id"), name))
+    # Longest first, so "Work Stuff" is claimed before "Work"
+    return sorted(names, key=lambda pair: -len(pair[1]))
+
+
+class FastPathParser:
+    """Create `task_data` locally for simple commands, or defer (None)."""
+
+    def __init__(self) -> None:
+        self.stats = FastPathStats()
+
+    def parse(
+        self,
+        text: str,
+        lang: str,
+        index: MetadataIndex,
+        default_due_date: str = "none",
+        users: Sequence[Any] = (),
+        now: Optional[datetime] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Task data for `text` when it is fully understood, else None."""
+        started = time.perf_counter()
+        self.stats.attempts += 1
+        try:
+            task = self._parse(
+                text or "",
+                lang if lang in _LANGUAGES else "en",
+                index,
+                default_due_date,
+                users,
+                now or datetime.now(timezone.utc),
+            )
+        except _Defer as defer:
+            reason = defer.args[0]
+            self.stats.deferred[reason] = self.stats.deferred.get(reason, 0) + 1
+            _LOGGER.debug("Fast path deferred '%s' to the LLM: %s", text, reason)
+            task = None
+        else:
+            self.stats.hits += 1
+            _LOGGER.debug("Fast path parsed '%s' as %s", text, task)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats.total_ms += elapsed
+        self.stats.last_ms = round(elapsed, 3)
+        return task
+
+    def as_dict(self) -> Dict[str, Any]:
+        return self.stats.as_dict()
+
+    # --------------- Steps ---------------
+    def _parse(
+        self,
+        text: str,
+        lang: str,
+        index: MetadataIndex,
+        default_due_date: str,
+        users: Sequence[Any],
+        now: datetime,
+    ) -> Dict[str, Any]:
+        patterns = _patterns(lang)
+        text = " ".join(text.split())
+        if not text:
+            raise _Defer("empty")
+
+        clock, text = self._time(patterns, text)
+        if patterns.ambiguous is not None and patterns.ambiguous.search(text):
+            raise _Defer("ambiguous")
+        self._check_keywords_in_names(patterns, text, index)
+        repeat, text = _single(patterns.repeat, text, patterns.repeats, "repeat")
+        priority, text = _single(
+            patterns.priority, text, patterns.priorities, "priority"
+        )
+        offset, text = _single(patterns.date, text, patterns.relative_days, "date")
+        weekday, text = _single(patterns.weekday, text, patterns.weekdays, "date")
+        if offset is not None and weekday is not None:
+            raise _Defer("conflicting_date")
+        project_id, text = self._project(patterns, text, index)
+        label_ids, text = self._labels(patterns, text, index)
+        self._check_leftovers(patterns, text, index, users)
+        title = self._title(patterns, text)
+
+        task: Dict[str, Any] = {
+            "title": title,
+            "project_id": DEFAULT_PROJECT_ID if project_id is None else project_id,
+        }
+        due = self._due(now, offset, weekday, clock)
+        if due is not None:
+            task["due_date"] = due.strftime("%Y-%m-%dT%H:%M:%SZ")
+        elif project_id is None:
+            # Same rule as the prompt: the default applies unless a project is named
+            default = default_due_date_value(default_due_date, now)
+            if default:
+                task["due_date"] = default
+        if priority is not None:
+            task["priority"] = priority
+        if repeat is not None:
+            task["repeat_after"] = REPEAT_SECONDS[repeat]
+        if label_ids:
+            task["label_ids"] = label_ids
+        return task
+
+    def _time(self, patterns: _Patterns, text: str):
+        matches = [
+            m
+            for m in patterns.time.finditer(text)
+            if any(
+                m.group(g)
+                for g in ("pre", "m", "suf", "dp1", "dp2")
+                if g in m.re.groupindex
+            )
+        ]
+        if not matches:
+            return None, text
+        if len(matches) > 1:
+            raise _Defer("conflicting_time")
+        match = matches[0]
+        groups = match.groupdict()
+        hour, minute = int(groups["h"]), int(groups.get("m") or 0)
+        daypart = groups.get("dp1") or groups.get("dp2")
+        meridiem = patterns.meridiem.get(_fold(daypart)) if daypart else None
+        if meridiem is None and patterns.lang.twelve_hour and 0 < hour <= 12:
+            raise _Defer("ambiguous_time")  # "at 5" could be 5am or 5pm
+        if meridiem == "pm" and hour < 12:
+            hour += 12
+        elif meridiem == "am" and hour == 12:
+            hour = 0
+        if hour > 23 or minute > 59:
+            raise _Defer("invalid_time")
+        return (hour, minute), _remove(text, match)
+
+    def _find_name(
+        self,
+        patterns: _Patterns,
+        text: str,
+        names: List[Tuple[Any, str]],
+        before: Sequence[str],
+        after: Sequence[str],
+        weak: Sequence[str] = (),
+    ):
+        """Names with a connector word next to them: ids and text without them."""
+        lang = patterns.lang
+        gap = r"\s+" if lang.spaced else r"\s*"
+        folded = text.casefold()
+        found: List[Any] = []
+        for item_id, name in names:
+            if _fold(name) not in folded:
+                continue
+            parts = []
+            if before:
+                parts.append(f"(?P<pre>{_alternation(before, lang.spaced)}){gap}")
+            if weak:
+                parts.append(f"(?P<weak>{_alternation(weak, lang.spaced)}){gap}")
+            prefix = f"(?:{'|'.join(parts)})?" if parts else ""
+            suffix = (
+                f"(?:{gap}(?P<post>{_alternation(after, lang.spaced)}))?"
+                if after
+                else ""
+            )
+            pattern = re.compile(
+                f"{patterns.left}{prefix}(?P<name>{_alternation([name], lang.spaced)})"
+                f"{suffix}{patterns.right}",
+                re.IGNORECASE,
+            )
+            for match in pattern.finditer(text):
+                groups = match.groupdict()
+                post = groups.get("post")
+                if not (groups.get("pre") or post) or (groups.get("weak") and not post):
+                    continue
+                found.append(item_id)
+                # Only a connector before it: what follows must not be a
+                # word that could belong to the name ("in work stuff")
+                text = _remove(text, match, "" if post else _NAME_MARK)
+                folded = text.casefold()
+                break
+        return found, text
+
+    def _project(self, patterns: _Patterns, text: str, index: MetadataIndex):
+        found, text = self._find_name(
+            patterns,
+            text,
+            _names(index.projects, ("title",)),
+            patterns.lang.project_before,
+            patterns.lang.project_after,
+        )
+        if len(set(found)) > 1:
+            raise _Defer("conflicting_project")
+        return (found[0] if found else None), text
+
+    def _labels(self, patterns: _Patterns, text: str, index: MetadataIndex):
+        found, text = self._find_name(
+            patterns,
+            text,
+            _names(index.labels, ("title",)),
+            patterns.lang.label_before,
+            patterns.lang.label_after,
+            patterns.lang.label_weak,
+        )
+        return list(dict.fromkeys(found)), text
+
+    def _name_pattern(self, patterns: _Patterns, name: str) -> Pattern[str]:
+        return re.compile(
+            f"{patterns.left}(?:{_alternation([name], patterns.lang.spaced)})"
+            f"{patterns.right}",
+            re.IGNORECASE,
+        )
+
+    def _check_keywords_in_names(
+        self, patterns: _Patterns, text: str, index: MetadataIndex
+    ) -> None:
+        """Defer when a keyword is (part of) a project or label name mentioned."""
+        folded = text.casefold()
+        spans = [
+            match.span()
+            for _id, name in _names(index.projects, ("title",))
+            + _names(index.labels, ("title",))
+            if _fold(name) in folded
+            for match in self._name_pattern(patterns, name).finditer(text)
+        ]
+        if not spans:
+            return
+        for pattern in (
+            patterns.repeat,
+            patterns.priority,
+            patterns.date,
+            patterns.weekday,
+        ):
+            if pattern is None:
+                continue
+            for match in pattern.finditer(text):
+                start, end = match.span("w")
+                if any(
+                    start < span_end and span_start < end
+                    for span_start, span_end in spans
+                ):
+                    raise _Defer("keyword_in_name")
+
+    def _check_dangling(self, patterns: _Patterns, text: str) -> None:
+        lang = patterns.lang
+        gap = r"\s+" if lang.spaced else r"\s*"
+        if re.search(
+            f"{_NAME_MARK}\\s*[^\\s{_KEYWORD_MARK}{_NAME_MARK}{_PUNCTUATION}]", text
+        ):
+            raise _Defer("dangling_name")  # "in work stuff" without that project
+        before = _alternation(
+            lang.project_before + lang.label_before + lang.label_weak, lang.spaced
+        )
+        after = _alternation(lang.project_after + lang.label_after, lang.spaced)
+        if (
+            before
+            and re.search(
+                f"{patterns.left}(?:{before}){gap}{_KEYWORD_MARK}", text, re.IGNORECASE
+            )
+        ) or (
+            after
+            and re.search(
+                f"{_KEYWORD_MARK}{gap}(?:{after}){patterns.right}", text, re.IGNORECASE
+            )
+        ):
+            raise _Defer("dangling_connector")  # "in the daily project"
+
+    def _check_leftovers(
+        self,
+        patterns: _Patterns,
+        text: str,
+        index: MetadataIndex,
+        users: Sequence[Any],
+    ) -> None:
+        self._check_dangling(patterns, text)
+        text = text.replace(_KEYWORD_MARK, " ").replace(_NAME_MARK, " ")
+        if re.search(r"\d", text):
+            raise _Defer("digits")
+        if patterns.hints is not None and patterns.hints.search(text):
+            raise _Defer("unhandled_words")
+        folded = text.casefold()
+        candidates = (
+            ("name", _names(index.projects, ("title",))),
+            ("name", _names(index.labels, ("title",))),
+            ("user", _names(users, ("name", "username"))),
+        )
+        for reason, names in candidates:
+            for _id, name in names:
+                if _fold(name) in folded and self._name_pattern(patterns, name).search(
+                    text
+                ):
+                    # e.g. a project named without "in", or an assignee
+                    raise _Defer(reason)
+
+    def _title(self, patterns: _Patterns, text: str) -> str:
+        title = text.replace(_KEYWORD_MARK, " ").replace(_NAME_MARK, " ")
+        if patterns.fillers is not None:
+            # Only at the edges: "remind me to call mom" -> "call mom"
+            while True:
+                stripped = title.strip(" ,.;:!?-–—")
+                match = patterns.fillers.match(stripped)
+                if match is not None:
+                    stripped = stripped[match.end() :]
+                else:
+                    tail = None
+                    for tail in patterns.fillers.finditer(stripped):
+                        pass
+                    if tail is not None and tail.end() == len(stripped):
+                        stripped = stripped[: tail.start()]
+                if stripped.strip(" ,.;:!?-–—") == title.strip(" ,.;:!?-–—"):
+                    break
+                title = stripped
+        title = " ".join(title.split()).strip(" ,.;:!?-–—")
+        if not title:
+            raise _Defer("empty_title")
+        if len(title) > MAX_TITLE_LENGTH:
+            raise _Defer("long_title")
+        return title[0].upper() + title[1:]
+
+    @staticmethod
+    def _due(
+        now: datetime,
+        offset: Optional[int],
+        weekday: Optional[int],
+        clock: Optional[Tuple[int, int]],
+    ) -> Optional[datetime]:
+        if offset is None and weekday is None and clock is None:
+            return None
+        hour, minute = clock if clock is not None else (12, 0)
+        today = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if offset is not None:
+            due = today + timedelta(days=offset)
+        elif weekday is not None:
+            due = today + timedelta(days=days_until(now, weekday))
+        else:
+            # A time alone means its next occurrence
+            due = today if today > now else today + timedelta(days=1)
+        if due <= now:
+            raise _Defer("past_date")
+        return due
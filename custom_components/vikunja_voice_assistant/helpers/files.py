@@ -0,0 +1,22 @@
+"""Small file helpers for state kept under the Home Assistant config dir."""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+
+def write_json_atomic(path: str, payload: Any) -> None:
+    """Write JSON to `path` so readers see either the old or the new file.
+
+    The data goes to a temporary sibling first, is flushed to disk and then
+    renamed over the target; a crash mid-write never leaves a torn file.
+    Runs blocking I/O, so call it from the executor.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,210 @@
+"""Local fuzzy matching of project, label and user names.
+
+Every project title, label title, user name and username is stored as a
+row of character trigram ids (a sparse row matrix). Scoring an utterance
+marks its trigrams in a vocabulary mask and sums the hits of all rows in
+one pass, vectorized with NumPy when it is installed. A row's confidence
+is the share of its trigrams found in the utterance, so a name spoken
+verbatim scores 1.0 regardless of what else was said. When the text is
+only the name (a spoken assignee), the symmetric Dice score is used
+instead, so a short fragment does not fully match every longer name.
+
+Rows are kept in one segment per kind; `sync` rebuilds only the segments
+whose source data changed since the last call.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .metadata_index import MetadataIndex
+from .prompt_budget import KIND_LABEL, KIND_PROJECT, KIND_USER, trigrams
+from .records import is_metadata_item
+
+try:  # Optional vectorized backend
+    import numpy as np  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on environment
+    np = None
+
+VECTOR_BACKEND = "numpy" if np is not None else "python"
+
+
+@dataclass(frozen=True)
+class FuzzyMatch:
+    kind: str
+    id: Any
+    name: str
+    confidence: float
+
+
+@dataclass
+class _Segment:
+    """Rows of one kind: (id, name) keys and their trigram ids."""
+
+    source: Any = None
+    keys: List[Tuple[Any, str]] = field(default_factory=list)
+    grams: List[frozenset] = field(default_factory=list)  # python backend
+    columns: Any = None  # numpy: concatenated trigram ids of all rows
+    offsets: Any = None  # numpy: start of each row in `columns`
+    sizes: Any = None  # numpy: trigram count per row
+
+
+class FuzzyResolver:
+    """Rank projects, labels and users by how well an utterance names them."""
+
+    def __init__(self) -> None:
+        self._vocabulary: Dict[str, int] = {}
+        self._segments: Dict[str, _Segment] = {
+            kind: _Segment() for kind in (KIND_PROJECT, KIND_LABEL, KIND_USER)
+        }
+        self.rebuilds: Dict[str, int] = {kind: 0 for kind in self._segments}
+        self.queries = 0
+        self.last_query_ms: Optional[float] = None
+
+    # --------------- Index maintenance ---------------
+    def sync(self, index: MetadataIndex, users: Sequence[Any] = ()) -> bool:
+        """Rebuild the segments whose data changed; True if any did."""
+        user_rows = tuple(
+            (u.get("id"), u.get("name") or "", u.get("username") or "")
+            for u in users or []
+            if is_metadata_item(u) and u.get("id") is not None
+        )
+        sources = {
+            KIND_PROJECT: (index.projects_json, index.projects, ("title",)),
+            KIND_LABEL: (index.labels_json, index.labels, ("title",)),
+            KIND_USER: (user_rows, (), ()),
+        }
+        changed = False
+        for kind, (source, items, fields) in sources.items():
+            segment = self._segments[kind]
+            if segment.source == source:
+                continue
+            if kind == KIND_USER:
+                keys = [
+                    (user_id, name)
+                    for user_id, *names in user_rows
+                    for name in dict.fromkeys(names)
+                    if name
+                ]
+            else:
+                keys = [
+                    (item.get("id"), item.get(fields[0]) or "")
+                    for item in items
+                    if item.get(fields[0])
+                ]
+            self._segments[kind] = self._build(source, keys)
+            self.rebuilds[kind] += 1
+            changed = True
+        return changed
+
+    def _build(self, source: Any, keys: List[Tuple[Any, str]]) -> _Segment:
+        grams = [trigrams(name) for _id, name in keys]
+        # The vocabulary only grows; stale trigrams are harmless
+        for row in grams:
+            for gram in row:
+                self._vocabulary.setdefault(gram, len(self._vocabulary))
+        segment = _Segment(source=source, keys=keys)
+        if np is None:
+            segment.grams = grams
+            return segment
+        sizes = [len(row) for row in grams]
+        segment.columns = np.fromiter(
+            (self._vocabulary[gram] for row in grams for gram in row),
+            dtype=np.int32,
+            count=sum(sizes),
+        )
+        segment.sizes = np.asarray(sizes, dtype=np.float32)
+        segment.offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+        return segment
+
+    # --------------- Queries ---------------
+    def _score_segment(
+        self, segment: _Segment, query: frozenset, mask, symmetric: bool = False
+    ) -> List[float]:
+        if not segment.keys:
+            return []
+        if np is None:
+            if symmetric:
+                return [
+                    2 * len(row & query) / (len(row) + len(query))
+                    for row in segment.grams
+                ]
+            return [len(row & query) / len(row) for row in segment.grams]
+        hits = np.add.reduceat(
+            mask[segment.columns].astype(np.float32), segment.offsets
+        )
+        if symmetric:
+            return (2 * hits / (segment.sizes + len(query))).tolist()
+        return (hits / segment.sizes).tolist()
+
+    def match(
+        self,
+        text: str,
+        kinds: Optional[Iterable[str]] = None,
+        limit: int = 5,
+        min_confidence: float = 0.0,
+        symmetric: bool = False,
+    ) -> List[FuzzyMatch]:
+        """Best candidates across `kinds` (all by default), highest first.
+
+        `symmetric` scores with the Dice coefficient, for text that is
+        nothing but the name.
+        """
+        started = time.perf_counter()
+        query = trigrams(text or "")
+        mask = None
+        if np is not None:
+            mask = np.zeros(len(self._vocabulary), dtype=bool)
+            known = [self._vocabulary[g] for g in query if g in self._vocabulary]
+            mask[known] = True
+        best: Dict[Tuple[str, Any], FuzzyMatch] = {}
+        for kind in kinds or self._segments:
+            segment = self._segments[kind]
+            scores = self._score_segment(segment, query, mask, symmetric)
+            for (item_id, name), score in zip(segment.keys, scores):
+                if score < min_confidence or score <= 0.0:
+                    continue
+                current = best.get((kind, item_id))
+                if current is None or score > current.confidence:
+                    best[(kind, item_id)] = FuzzyMatch(
+                        kind, item_id, name, round(float(score), 3)
+                    )
+        ranked = sorted(best.values(), key=lambda m: -m.confidence)
+        self.queries += 1
+        self.last_query_ms = round((time.perf_counter() - started) * 1000, 3)
+        return ranked[:limit] if limit else ranked
+
+    def scores(self, text: str) -> Dict[Tuple[str, Any], float]:
+        """Confidence of every candidate, for prompt pruning."""
+        return {(m.kind, m.id): m.confidence for m in self.match(text, limit=0)}
+
+    def best(
+        self,
+        kind: str,
+        text: str,
+        min_confidence: float,
+        margin: float = 0.0,
+        symmetric: bool = False,
+    ) -> Optional[FuzzyMatch]:
+        """Single best candidate of one kind, if confident enough.
+
+        None when the runner-up scores within `margin` of it (ambiguous).
+        """
+        matches = self.match(text, kinds=(kind,), limit=2, symmetric=symmetric)
+        if not matches or matches[0].confidence < min_confidence:
+            return None
+        if len(matches) > 1 and matches[0].confidence - matches[1].confidence <= margin:
+            return None  # ambiguous
+        return matches[0]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "backend": VECTOR_BACKEND,
+            "rows": {kind: len(seg.keys) for kind, seg in self._segments.items()},
+            "vocabulary": len(self._vocabulary),
+            "rebuilds": dict(self.rebuilds),
+            "queries": self.queries,
+            "last_query_ms": self.last_query_ms,
+        }
@@ -51,6 +51,19 @@ _BASE: Dict[str, Dict[str, str]] = {
         "id": "Tugas ditambahkan: {title}",
         "de": "Aufgabe erfolgreich hinzugefügt: {title}",
     },
+    "task_still_creating": {
+        "en": "Vikunja is slow to respond; the task {title} is still being added.",
+        "fr": "Vikunja répond lentement ; la tâche {title} est en cours d'ajout.",
+        "es": "Vikunja tarda en responder; la tarea {title} se está añadiendo.",
+        "pt": "O Vikunja está lento; a tarefa {title} ainda está sendo adicionada.",
+        "ru": "Vikunja отвечает медленно; задача {title} ещё добавляется.",
+        "hi": "Vikunja धीमा है; कार्य {title} अभी जोड़ा जा रहा है।",
+        "zh-Hans": "Vikunja 响应较慢；任务 {title} 仍在添加中。",
+        "ar": "يستجيب Vikunja ببطء؛ لا تزال المهمة {title} قيد الإضافة.",
+        "bn": "Vikunja ধীরে সাড়া দিচ্ছে; টাস্ক {title} এখনও যোগ করা হচ্ছে।",
+        "id": "Vikunja lambat merespons; tugas {title} masih ditambahkan.",
+        "de": "Vikunja antwortet langsam; die Aufgabe {title} wird noch hinzugefügt.",
+    },
     "config_error": {
         "en": "Configuration error. Please check your Vikunja and Home Assistant AI settings.",
         "fr": "Erreur de configuration. Vérifiez les paramètres Vikunja et de l'IA Home Assistant.",
@@ -0,0 +1,125 @@
+"""Immutable, indexed view of the Vikunja projects and labels.
+
+Every voice command used to rescan the raw lists: the task handler for the
+"voice" label and the valid label ids, the prompt builder for its name
+projections, the response formatter for its id lookups. A `MetadataIndex`
+is built once per metadata change and shared by reference instead.
+
+`version` is a digest of the JSON prompt projections, so it is stable
+across restarts and changes exactly when the data the LLM sees changes.
+The same data is also kept in the compact table encoding.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from ..const import PROMPT_ENCODING_JSON, PROMPT_ENCODING_TABLE
+from .prompt_encoding import NAME_COLUMNS, encode_entries, encode_entry
+from .records import is_metadata_item
+
+
+def _casefold(title: Any) -> str:
+    return str(title or "").strip().casefold()
+
+
+def _index_items(
+    items: Iterable[Any],
+) -> Tuple[Tuple[Any, ...], Dict[Any, Any], Dict[str, Any]]:
+    kept, by_id, by_title = [], {}, {}
+    for item in items or []:
+        if not is_metadata_item(item) or item.get("id") is None:
+            continue
+        kept.append(item)
+        by_id.setdefault(item.get("id"), item)
+        # First match wins, as the previous linear scans did
+        by_title.setdefault(_casefold(item.get("title")), item.get("id"))
+    return tuple(kept), by_id, by_title
+
+
+def _project(items: Tuple[Any, ...], encoding: str) -> str:
+    return encode_entries(
+        (
+            encode_entry((item.get("id"), item.get("title")), NAME_COLUMNS, encoding)
+            for item in items
+        ),
+        encoding,
+    )
+
+
+@dataclass(frozen=True)
+class MetadataIndex:
+    """Read-only projects/labels with id and title lookups; never mutate."""
+
+    version: str
+    projects: Tuple[Any, ...]
+    labels: Tuple[Any, ...]
+    projects_by_id: Mapping[Any, Any]
+    labels_by_id: Mapping[Any, Any]
+    project_ids_by_title: Mapping[str, Any]
+    label_ids_by_title: Mapping[str, Any]
+    # Prompt-ready projections in both encodings (see prompt_encoding)
+    projects_json: str
+    labels_json: str
+    projects_table: str
+    labels_table: str
+
+    @classmethod
+    def build(cls, projects: Iterable[Any], labels: Iterable[Any]) -> "MetadataIndex":
+        project_items, projects_by_id, project_titles = _index_items(projects)
+        label_items, labels_by_id, label_titles = _index_items(labels)
+        projects_json, projects_table = (
+            _project(project_items, encoding)
+            for encoding in (PROMPT_ENCODING_JSON, PROMPT_ENCODING_TABLE)
+        )
+        labels_json, labels_table = (
+            _project(label_items, encoding)
+            for encoding in (PROMPT_ENCODING_JSON, PROMPT_ENCODING_TABLE)
+        )
+        version = hashlib.blake2b(
+            f"{projects_json}\n{labels_json}".encode(), digest_size=8
+        ).hexdigest()
+        return cls(
+            version=version,
+            projects=project_items,
+            labels=label_items,
+            projects_by_id=MappingProxyType(projects_by_id),
+            labels_by_id=MappingProxyType(labels_by_id),
+            project_ids_by_title=MappingProxyType(project_titles),
+            label_ids_by_title=MappingProxyType(label_titles),
+            projects_json=projects_json,
+            labels_json=labels_json,
+            projects_table=projects_table,
+            labels_table=labels_table,
+        )
+
+    def projections(self, encoding: str) -> Tuple[str, str]:
+        """Encoded (projects, labels) lists for the prompt."""
+        if encoding == PROMPT_ENCODING_TABLE:
+            return self.projects_table, self.labels_table
+        return self.projects_json, self.labels_json
+
+    def project_id(self, title: str) -> Optional[Any]:
+        """Id of the project with this title (case-insensitive), if any."""
+        return self.project_ids_by_title.get(_casefold(title))
+
+    def label_id(self, title: str) -> Optional[Any]:
+        """Id of the label with this title (case-insensitive), if any."""
+        return self.label_ids_by_title.get(_casefold(title))
+
+    def project_title(self, project_id: Any) -> Optional[str]:
+        project = self.projects_by_id.get(project_id)
+        if project is None:
+            return None
+        title = project.get("title") or project.get("name") or ""
+        return title.strip() if isinstance(title, str) else None
+
+    def label_title(self, label_id: Any) -> Optional[str]:
+        label = self.labels_by_id.get(label_id)
+        return None if label is None else label.get("title")
+
+
+EMPTY_INDEX = MetadataIndex.build((), ())
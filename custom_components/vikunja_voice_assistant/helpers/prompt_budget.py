@@ -0,0 +1,202 @@
+"""Fit the prompt's projects, labels and users into a size budget.
+
+Large tenants have hundreds of projects and labels; sending all of them on
+every command makes the LLM call slower and more expensive. When the
+metadata exceeds the configured budget, entries are ranked by lexical
+similarity to the utterance (character trigram overlap) plus how recently
+they were used for created tasks, and the best ones are kept until the
+budget is spent. The default project is always kept.
+
+Under the budget nothing is pruned, so the metadata block stays identical
+across commands and provider prompt caching keeps working.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from ..const import DEFAULT_PROJECT_ID, PROMPT_ENCODING_JSON, RECENT_USAGE_SIZE
+from .prompt_encoding import (
+    NAME_COLUMNS,
+    USER_COLUMNS,
+    encode_entries,
+    encode_entry,
+    entry_separator_length,
+)
+from .records import is_metadata_item
+
+_LOGGER = logging.getLogger(__name__)
+
+KIND_PROJECT = "project"
+KIND_LABEL = "label"
+KIND_USER = "user"
+
+USAGE_WEIGHT = 0.5  # relative to a perfect lexical match (1.0)
+CHARS_PER_TOKEN = 4  # rough estimate used for logging
+
+
+@lru_cache(maxsize=4096)
+def trigrams(text: str) -> frozenset:
+    """Character trigrams of the case-folded, space-padded text."""
+    padded = f" {' '.join(str(text).casefold().split())} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(utterance: str, name: str) -> float:
+    """Share of the name's trigrams found in the utterance (0..1)."""
+    folded = " ".join(str(name).casefold().split())
+    if not folded:
+        return 0.0
+    if folded in utterance.casefold():
+        return 1.0
+    grams = trigrams(folded)
+    return len(grams & trigrams(utterance)) / len(grams)
+
+
+class RecentUsage:
+    """Projects, labels and users of the most recently created tasks."""
+
+    def __init__(self, size: int = RECENT_USAGE_SIZE) -> None:
+        self._events: Deque[Tuple[str, Any]] = deque(maxlen=size)
+
+    def record(self, kind: str, ids: Iterable[Any]) -> None:
+        for item_id in ids:
+            if item_id is not None:
+                self._events.append((kind, item_id))
+
+    def weights(self) -> Dict[Tuple[str, Any], float]:
+        """Recency-weighted use counts, scaled so the top entry is 1.0."""
+        weights: Dict[Tuple[str, Any], float] = {}
+        for position, event in enumerate(self._events, start=1):
+            weights[event] = weights.get(event, 0.0) + position
+        top = max(weights.values(), default=0.0)
+        return {key: value / top for key, value in weights.items()} if top else {}
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+@dataclass
+class PruneStats:
+    pruned_commands: int = 0
+    last: Dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"pruned_commands": self.pruned_commands, "last": dict(self.last)}
+
+
+PRUNE_STATS = PruneStats()
+
+
+@dataclass(frozen=True)
+class PrunedMetadata:
+    """Encoded lists of the entries that were kept."""
+
+    projects: str
+    labels: str
+    users: str
+
+
+def _entries(
+    kind: str, items: Iterable[Any], encoding: str
+) -> List[Tuple[str, Any, str, Tuple[str, ...]]]:
+    entries = []
+    for item in items or []:
+        if not is_metadata_item(item) or item.get("id") is None:
+            continue
+        if kind == KIND_USER:
+            values = (item.get("id"), item.get("name"), item.get("username"))
+            text = encode_entry(values, USER_COLUMNS, encoding)
+            names = (item.get("name") or "", item.get("username") or "")
+        else:
+            values = (item.get("id"), item.get("title"))
+            text = encode_entry(values, NAME_COLUMNS, encoding)
+            names = (item.get("title") or "",)
+        entries.append((kind, item.get("id"), text, names))
+    return entries
+
+
+def prune_metadata(
+    utterance: str,
+    projects: Iterable[Any],
+    labels: Iterable[Any],
+    users: Iterable[Any],
+    budget: int,
+    usage: Optional[RecentUsage] = None,
+    scores: Optional[Dict[Tuple[str, Any], float]] = None,
+    encoding: str = PROMPT_ENCODING_JSON,
+) -> PrunedMetadata:
+    """Keep the most relevant entries whose encoding fits in `budget` chars.
+
+    `scores` are precomputed lexical scores by (kind, id), e.g. from the
+    fuzzy resolver; without them each name is scored here.
+    """
+    groups = {
+        KIND_PROJECT: _entries(KIND_PROJECT, projects, encoding),
+        KIND_LABEL: _entries(KIND_LABEL, labels, encoding),
+        KIND_USER: _entries(KIND_USER, users, encoding),
+    }
+    separator = entry_separator_length(encoding)
+    weights = usage.weights() if usage is not None else {}
+    ranked = []
+    for order, entry in enumerate(e for group in groups.values() for e in group):
+        kind, item_id, text, names = entry
+        if kind == KIND_PROJECT and item_id == DEFAULT_PROJECT_ID:
+            score = float("inf")
+        else:
+            if scores is not None:
+                score = scores.get((kind, item_id), 0.0)
+            else:
+                score = max(similarity(utterance, name) for name in names)
+            score += USAGE_WEIGHT * weights.get((kind, item_id), 0.0)
+        ranked.append((-score, order, entry))
+    ranked.sort(key=lambda ranked_entry: ranked_entry[:2])
+
+    kept = set()
+    spent = 0
+    for neg_score, order, (_kind, _id, text, _names) in ranked:
+        cost = len(text) + separator
+        if spent + cost > budget and neg_score != float("-inf"):
+            continue
+        kept.add(order)
+        spent += cost
+
+    result, counts, order = {}, {}, 0
+    chars_before = 0
+    for kind, entries in groups.items():
+        chosen = []
+        for entry in entries:
+            chars_before += len(entry[2]) + separator
+            if order in kept:
+                chosen.append(entry[2])
+            order += 1
+        result[kind] = encode_entries(chosen, encoding)
+        counts[kind] = [len(chosen), len(entries)]
+
+    PRUNE_STATS.pruned_commands += 1
+    PRUNE_STATS.last = {
+        "kept": counts,
+        "chars_before": chars_before,
+        "chars_after": spent,
+        "budget": budget,
+    }
+    _LOGGER.debug(
+        "Pruned prompt metadata to %s/%s projects, %s/%s labels, %s/%s users: "
+        "%s -> %s chars (~%s -> ~%s tokens)",
+        *counts[KIND_PROJECT],
+        *counts[KIND_LABEL],
+        *counts[KIND_USER],
+        chars_before,
+        spent,
+        chars_before // CHARS_PER_TOKEN,
+        spent // CHARS_PER_TOKEN,
+    )
+    return PrunedMetadata(
+        projects=result[KIND_PROJECT],
+        labels=result[KIND_LABEL],
+        users=result[KIND_USER] if groups[KIND_USER] else "",
+    )
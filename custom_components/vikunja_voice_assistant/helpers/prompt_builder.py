@@ -1,5 +1,263 @@
-import json
+"""Prompt construction for the AI Task call.
+
+The prompt is laid out so providers can cache its prefix:
+
+1. a static instruction block that only depends on the entry settings and
+   is byte-identical across commands,
+2. a metadata block (projects, labels, users) re-rendered only when the
+   metadata index version or the user list changes,
+3. a small volatile tail (current time, default due date, utterance) sent
+   as the user message.
+
+Both cached blocks are memoized; `prompt_block_stats` reports their sizes.
+When a size budget is set and the metadata exceeds it, the metadata block
+is instead pruned per utterance (see `prompt_budget`).
+"""
+
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+from ..const import (
+    FUZZY_PIN_CONFIDENCE,
+    FUZZY_PIN_MIN_LENGTH,
+    PROMPT_ENCODING_JSON,
+)
+from .fuzzy_resolver import FuzzyResolver
+from .metadata_index import MetadataIndex
+from .prompt_budget import (
+    KIND_LABEL,
+    KIND_PROJECT,
+    KIND_USER,
+    PRUNE_STATS,
+    RecentUsage,
+    prune_metadata,
+)
+from .prompt_encoding import USER_COLUMNS, encode_entries, encode_entry, render_metadata
+from .records import is_metadata_item
+
+_DEFAULT_DUE_DATE_RULE = """DEFAULT DUE DATE RULE:
+- If no specific project or due date is mentioned in the task, use the default due date given with the request
+- If a specific project is mentioned, do not set any due date unless the user explicitly mentions one
+- If a specific due date is mentioned by the user, always use that instead of the default
+- Even if a recurring task instruction is given, if no due date is mentioned, set it to the default due date"""
+
+_NO_DEFAULT_DUE_DATE_RULE = """DEFAULT DUE DATE RULE:
+- No default due date configured"""
+
+_VOICE_CORRECTION = """SPEECH RECOGNITION CORRECTION:
+- Task came from voice command - expect speech recognition errors
+- Correct misheard project names, label names, dates, and common speech-to-text errors
+- Ensure the task title is logically consistent with the project name, labels etc. If something doesn't make sense, attempt to find the most likely intended word/phrase based on context"""
+
+_USER_ASSIGNMENT = """USER ASSIGNMENT:
+- You can optionally include an assignee by username or name if clearly specified in the user's description.
+- Output field: assignee (string) MUST be an existing username (preferred) or exact name match from the available users.
+- Only include assignee field if explicitly stated (e.g. 'assign to Alice', 'for william', 'give this to bob').
+- Do not guess if unclear."""
+
+# Shared with the local fast path (see fast_path), which also translates them
+PRIORITY_KEYWORDS = {
+    5: ("urgent", "critical", "emergency", "ASAP", "immediately"),
+    4: ("important", "soon", "priority", "needs attention"),
+    3: ("medium priority", "when possible", "moderately important"),
+    2: ("low priority", "when you have time", "not urgent"),
+    1: ("sometime", "eventually", "no rush"),
+}
+REPEAT_SECONDS = {
+    "daily": 86400,
+    "weekly": 604800,
+    "monthly": 2592000,
+    "yearly": 31536000,
+}
+
+_CORE_INSTRUCTIONS = """CORE OUTPUT REQUIREMENTS:
+- Output ONLY valid JSON with these fields (only include optional fields when applicable):
+    * title (string): Main task title (REQUIRED, MUST NOT BE EMPTY)
+    * description (string, optional): Only include if the user explicitly asks for additional notes/context.
+    * project_id (number): Project ID (always required, use 1 if no project specified)
+    * due_date (string, optional): Due date in YYYY-MM-DDTHH:MM:SSZ format
+    * priority (number, optional): Priority level 1-5, only when explicitly mentioned
+    * repeat_after (number, optional): Repeat interval in seconds, only for recurring tasks
+    * label_ids (array, optional): Array of existing label IDs
+    * assignee (string, optional): Username (preferred) or exact name of assignee (ONLY if explicitly stated)
+
+TASK FORMATTING:
+- Extract clear, concise titles.
+- Avoid redundant words implied by project context
+- Remove date/time info from title (use due_date field) if confidently parsed.
+- Remove label references from title (handled via label_ids).
+- Remove project names from title (handled via project_id).
+- Remove priority references from title (handled via priority field).
+- Remove unnecessary qualifiers (e.g. "task", "to do", "reminder")
+- Remove recurring task keywords from title (handled via repeat_after).
+
+DATE HANDLING:
+- Calculate future dates based on the current date given with the request
+- Use ISO format with 'Z' timezone: YYYY-MM-DDTHH:MM:SSZ
+- Default time: 12:00:00 (unless specific time mentioned)
+- NEVER set past dates - always use future dates for ambiguous references
+
+PRIORITY LEVELS (only when explicitly mentioned):
+{priority_levels}
+
+RECURRING TASKS (only when explicitly mentioned):
+- Daily: {daily} seconds | Weekly: {weekly} seconds
+- Monthly: {monthly} seconds | Yearly: {yearly} seconds
+- Keywords: daily, weekly, monthly, yearly, every day/week, recurring, repeat...""".format(
+    priority_levels="\n".join(
+        f"- {level}: {', '.join(words)}" for level, words in PRIORITY_KEYWORDS.items()
+    ),
+    **REPEAT_SECONDS,
+)
+
+_EXAMPLES = """EXAMPLES:
+Input: "Reminder to pick up groceries tomorrow"
+Output: {"title": "Pick up groceries", "project_id": 1, "due_date": "2023-06-09T12:00:00Z"}
+
+Input: "URGENT: finish the report for work by Friday at 5pm tagged as urgent"
+Output: {"title": "Finish work report", "project_id": 1, "due_date": "2023-06-09T17:00:00Z", "priority": 5}
+
+Input: "Take vitamins daily with health"
+Output: {"title": "Take vitamins", "project_id": 1, "repeat_after": 86400}
+
+Input: "Add buy milk with the grocery label for next week"
+(Assuming a label with name 'grocery' has id 7)
+Output: {"title": "Buy milk", "project_id": 1, "label_ids": [7], "due_date": "2023-06-16T12:00:00Z"}
+
+Input: "Schedule annual dentist appointment next March"
+Output: {"title": "Schedule dentist appointment", "project_id": 1, "due_date": "2023-03-01T12:00:00Z"}
+
+Input: "Finish the project report"
+(assuming you have default due date settings set up)
+Output: {"title": "Finish project report", "project_id": 1, "due_date": "2023-06-10T12:00:00Z"}
+
+Input: "Assign prepare slides to William for next week"
+Output: {"title": "Prepare slides", "project_id": 1, "due_date": "2023-06-16T12:00:00Z", "assignee": "william"}"""
+
+# Short keys cut the generated tokens; expanded again by `expand_short_keys`
+_COMPACT_OUTPUT = """COMPACT OUTPUT KEYS:
+- Write the JSON with these short keys instead of the field names above:
+    t=title, n=description, p=project_id, d=due_date, r=repeat_after, l=label_ids, a=assignee
+- d: YYYY-MM-DDTHH:MM (UTC, no seconds, no 'Z')
+- r: d (daily), w (weekly), m (monthly) or y (yearly); seconds for any other interval
+- No spaces or line breaks in the JSON
+
+EXAMPLES:
+Input: "Reminder to pick up groceries tomorrow"
+Output: {"t":"Pick up groceries","p":1,"d":"2023-06-09T12:00"}
+
+Input: "URGENT: finish the report for work by Friday at 5pm tagged as urgent"
+Output: {"t":"Finish work report","p":1,"d":"2023-06-09T17:00","priority":5}
+
+Input: "Take vitamins daily with health"
+Output: {"t":"Take vitamins","p":1,"r":"d"}
+
+Input: "Add buy milk with the grocery label for next week"
+(Assuming a label with name 'grocery' has id 7)
+Output: {"t":"Buy milk","p":1,"l":[7],"d":"2023-06-16T12:00"}
+
+Input: "Finish the project report"
+(assuming you have default due date settings set up)
+Output: {"t":"Finish project report","p":1,"d":"2023-06-10T12:00"}
+
+Input: "Assign prepare slides to William for next week"
+Output: {"t":"Prepare slides","p":1,"d":"2023-06-16T12:00","a":"william"}"""
+
+_last_sizes: Dict[str, int] = {"static": 0, "metadata": 0, "volatile": 0}
+
+# Rendered metadata blocks by (index version, encoding, users); the version
+# stands for the project and label lists, which are never hashed per call
+_METADATA_MEMO_SIZE = 8
+_metadata_memo: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+_metadata_memo_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+
+@lru_cache(maxsize=8)
+def _static_block(
+    default_due_date: str,
+    voice_correction: bool,
+    enable_user_assignment: bool,
+    compact_output: bool = False,
+) -> str:
+    """Instructions shared by every command of an entry (settings-dependent)."""
+    sections = [
+        "You are an assistant that helps create tasks in Vikunja.\n"
+        "Given a task description, you will create a JSON payload for the Vikunja API.",
+        _NO_DEFAULT_DUE_DATE_RULE
+        if default_due_date == "none"
+        else _DEFAULT_DUE_DATE_RULE,
+    ]
+    if voice_correction:
+        sections.append(_VOICE_CORRECTION)
+    sections.append(_CORE_INSTRUCTIONS)
+    sections.append(_COMPACT_OUTPUT if compact_output else _EXAMPLES)
+    if enable_user_assignment:
+        sections.append(_USER_ASSIGNMENT)
+    return "\n\n".join(sections)
+
+
+def _metadata_block(index: MetadataIndex, encoding: str, users: str) -> str:
+    """Projects, labels and users; keyed by the metadata index version."""
+    key = (index.version, encoding, users)
+    block = _metadata_memo.get(key)
+    if block is not None:
+        _metadata_memo.move_to_end(key)
+        _metadata_memo_stats["hits"] += 1
+        return block
+    _metadata_memo_stats["misses"] += 1
+    projects, labels = index.projections(encoding)
+    block = render_metadata(projects, labels, users, encoding)
+    _metadata_memo[key] = block
+    if len(_metadata_memo) > _METADATA_MEMO_SIZE:
+        _metadata_memo.popitem(last=False)
+    return block
+
+
+def _encode_users(users, encoding: str) -> str:
+    if not users or not isinstance(users, list):
+        return ""
+    entries = [
+        encode_entry(
+            (u.get("id"), u.get("name"), u.get("username")), USER_COLUMNS, encoding
+        )
+        for u in users
+        if is_metadata_item(u) and u.get("id") is not None
+    ]
+    return encode_entries(entries, encoding) if entries else ""
+
+
+def default_due_date_value(
+    default_due_date: str, now: datetime, compact_output: bool = False
+) -> str:
+    """The configured default due date at `now`; "" when there is none."""
+    if default_due_date == "tomorrow":
+        due = (now + timedelta(days=1)).replace(hour=12)
+    elif default_due_date == "end_of_week":
+        due = (now + timedelta(days=7)).replace(hour=17)
+    elif default_due_date == "end_of_month":
+        due = (now + timedelta(days=30)).replace(hour=17)
+    else:
+        return ""
+    due = due.replace(minute=0, second=0, microsecond=0)
+    return due.strftime("%Y-%m-%dT%H:%M" if compact_output else "%Y-%m-%dT%H:%M:%SZ")
+
+
+def _pinned_names(
+    resolver: FuzzyResolver, task_description: str, enable_user_assignment: bool
+) -> str:
+    kinds = [KIND_PROJECT, KIND_LABEL]
+    if enable_user_assignment:
+        kinds.append(KIND_USER)
+    matches = resolver.match(
+        task_description, kinds=kinds, min_confidence=FUZZY_PIN_CONFIDENCE
+    )
+    return "; ".join(
+        f'{m.kind} "{m.name}" (id {m.id})'
+        for m in matches
+        if len(m.name) >= FUZZY_PIN_MIN_LENGTH
+    )
 
 
 def build_task_creation_messages(
@@ -10,176 +268,89 @@ def build_task_creation_messages(
     voice_correction: bool = False,
     users=None,
     enable_user_assignment: bool = False,
+    index: MetadataIndex | None = None,
+    budget: int = 0,
+    usage: RecentUsage | None = None,
+    resolver: FuzzyResolver | None = None,
+    encoding: str = PROMPT_ENCODING_JSON,
+    compact_output: bool = False,
 ):
     """Build OpenAI chat messages to create a Vikunja task from a description.
 
+    Pass `index` to reuse its prebuilt projections; `projects` and `labels`
+    are only indexed here when it is missing. `budget` caps the characters
+    spent on projects, labels and users (0 = no limit); `usage` feeds the
+    recency part of the relevance ranking. With a synced `resolver`, its
+    scores drive the pruning and names it is sure about are pointed out in
+    the request. `encoding` selects how those lists are written (see
+    `prompt_encoding`). `compact_output` asks for the short-key answer
+    format (see `task_schema.expand_short_keys`).
+
     Returns a list of messages suitable for the OpenAI Chat Completions API.
     """
-    project_names = [
-        {"id": p.get("id"), "name": p.get("title")} for p in (projects or [])
-    ]
-    label_names = [
-        {"id": label_obj.get("id"), "name": label_obj.get("title")}
-        for label_obj in (labels or [])
-        if isinstance(label_obj, dict) and label_obj.get("id") is not None
-    ]
+    if index is None:
+        index = MetadataIndex.build(projects, labels)
+    projects_text, labels_text = index.projections(encoding)
+    users_text = _encode_users(users, encoding) if enable_user_assignment else ""
 
-    # Current date/time context
-    now = datetime.now(timezone.utc)
-    current_timestamp = now.strftime("%Y-%m-%dT%H:%M:%SZ")
-    current_date = now.strftime("%Y-%m-%d")
-
-    # Default due date helper values
-    tomorrow = (
-        (now + timedelta(days=1))
-        .replace(hour=12, minute=0, second=0, microsecond=0)
-        .strftime("%Y-%m-%dT%H:%M:%SZ")
-    )
-    end_of_week = (
-        (now + timedelta(days=7))
-        .replace(hour=17, minute=0, second=0, microsecond=0)
-        .strftime("%Y-%m-%dT%H:%M:%SZ")
+    static = _static_block(
+        default_due_date,
+        bool(voice_correction),
+        bool(enable_user_assignment),
+        bool(compact_output),
     )
-    end_of_month = (
-        (now + timedelta(days=30))
-        .replace(hour=17, minute=0, second=0, microsecond=0)
-        .strftime("%Y-%m-%dT%H:%M:%SZ")
+    metadata_chars = len(projects_text) + len(labels_text) + len(users_text)
+    if budget and metadata_chars > budget:
+        pruned = prune_metadata(
+            task_description,
+            index.projects,
+            index.labels,
+            users if enable_user_assignment else [],
+            budget,
+            usage,
+            scores=resolver.scores(task_description) if resolver else None,
+            encoding=encoding,
+        )
+        metadata = render_metadata(
+            pruned.projects, pruned.labels, pruned.users, encoding
+        )
+    else:
+        metadata = _metadata_block(index, encoding, users_text)
+
+    now = datetime.now(timezone.utc)
+    tail = [
+        f"Current date/time: {now.strftime('%Y-%m-%dT%H:%M:%SZ')} "
+        f"(today is {now.strftime('%Y-%m-%d')})"
+    ]
+    due_value = default_due_date_value(default_due_date, now, compact_output)
+    if due_value:
+        tail.append(f"Default due date: {due_value}")
+    if resolver is not None:
+        pinned = _pinned_names(resolver, task_description, enable_user_assignment)
+        if pinned:
+            tail.append(f"Names recognized in the request: {pinned}")
+    tail.append(f"Create task: {task_description}")
+    volatile = "\n".join(tail)
+
+    _last_sizes.update(
+        static=len(static.encode()),
+        metadata=len(metadata.encode()),
+        volatile=len(volatile.encode()),
     )
+    return [
+        {"role": "system", "content": f"{static}\n\n{metadata}"},
+        {"role": "user", "content": volatile},
+    ]
 
-    default_due_date_instructions = ""
-    if default_due_date != "none":
-        default_due_date_value = ""
-        if default_due_date == "tomorrow":
-            default_due_date_value = tomorrow
-        elif default_due_date == "end_of_week":
-            default_due_date_value = end_of_week
-        elif default_due_date == "end_of_month":
-            default_due_date_value = end_of_month
-
-        default_due_date_instructions = f"""
-        IMPORTANT DEFAULT DUE DATE RULE:
-        - If no specific project or due date is mentioned in the task, use this default due date: {default_due_date_value}
-        - If a specific project is mentioned, do not set any due date unless the user explicitly mentions one
-        - If a specific due date is mentioned by the user, always use that instead of the default
-        - Even if a recurring task instruction is given, if no due date is mentioned, set it to {default_due_date_value}
-        """
-
-    voice_correction_instructions = ""
-    if voice_correction:
-        voice_correction_instructions = """
-        SPEECH RECOGNITION CORRECTION:
-        - Task came from voice command - expect speech recognition errors
-        - Correct misheard project names, label names, dates, and common speech-to-text errors
-        - Ensure the task title is logically consistent with the project name, labels etc. If something doesn't make sense, attempt to find the most likely intended word/phrase based on context
-        """
-
-    user_list = []
-    if users and isinstance(users, list):
-        for u in users:
-            if isinstance(u, dict) and u.get("id") is not None:
-                user_list.append(
-                    {
-                        "id": u.get("id"),
-                        "name": u.get("name"),
-                        "username": u.get("username"),
-                    }
-                )
-
-    assignment_instructions = ""
-    if enable_user_assignment and user_list:
-        assignment_instructions = f"""
-        USER ASSIGNMENT:
-        - You can optionally include an assignee by username or name if clearly specified in the user's description.
-        - Output field: assignee (string) MUST be an existing username (preferred) or exact name match from available users.
-        - Available users: {json.dumps(user_list)}
-        - Only include assignee field if explicitly stated (e.g. 'assign to Alice', 'for william', 'give this to bob').
-        - Do not guess if unclear.
-        """
-
-    system_message = {
-        "role": "system",
-        "content": f"""
-        You are an assistant that helps create tasks in Vikunja.
-        Given a task description, you will create a JSON payload for the Vikunja API.
-
-        Available projects: {json.dumps(project_names)}
-        Available labels: {json.dumps(label_names)}
-
-        DEFAULT DUE DATE RULE:
-        {default_due_date_instructions.strip() if default_due_date_instructions else "- No default due date configured"}
-
-        {voice_correction_instructions.strip() if voice_correction_instructions else ""}
-
-        CORE OUTPUT REQUIREMENTS:
-        - Output ONLY valid JSON with these fields (only include optional fields when applicable):
-            * title (string): Main task title (REQUIRED, MUST NOT BE EMPTY)
-            * description (string, optional): Only include if the user explicitly asks for additional notes/context.
-            * project_id (number): Project ID (always required, use 1 if no project specified)
-            * due_date (string, optional): Due date in YYYY-MM-DDTHH:MM:SSZ format
-            * priority (number, optional): Priority level 1-5, only when explicitly mentioned
-            * repeat_after (number, optional): Repeat interval in seconds, only for recurring tasks
-            * label_ids (array, optional): Array of existing label IDs
-            * assignee (string, optional): Username (preferred) or exact name of assignee (ONLY if explicitly stated)
-
-        TASK FORMATTING:
-        - Extract clear, concise titles.
-        - Avoid redundant words implied by project context
-        - Remove date/time info from title (use due_date field) if confidently parsed.
-        - Remove label references from title (handled via label_ids).
-        - Remove project names from title (handled via project_id).
-        - Remove priority references from title (handled via priority field).
-        - Remove unnecessary qualifiers (e.g. "task", "to do", "reminder")
-        - Remove recurring task keywords from title (handled via repeat_after).
-
-        DATE HANDLING (Current: {current_timestamp}):
-        - Calculate future dates based on current date: {current_date}
-        - Use ISO format with 'Z' timezone: YYYY-MM-DDTHH:MM:SSZ
-        - Default time: 12:00:00 (unless specific time mentioned)
-        - NEVER set past dates - always use future dates for ambiguous references
-
-        PRIORITY LEVELS (only when explicitly mentioned):
-        - 5: urgent, critical, emergency, ASAP, immediately
-        - 4: important, soon, priority, needs attention
-        - 3: medium priority, when possible, moderately important
-        - 2: low priority, when you have time, not urgent
-        - 1: sometime, eventually, no rush
-
-        RECURRING TASKS (only when explicitly mentioned):
-        - Daily: 86400 seconds | Weekly: 604800 seconds
-        - Monthly: 2592000 seconds | Yearly: 31536000 seconds
-        - Keywords: daily, weekly, monthly, yearly, every day/week, recurring, repeat...
-
-        EXAMPLES:
-        Input: "Reminder to pick up groceries tomorrow"
-        Output: {{"title": "Pick up groceries", "project_id": 1, "due_date": "2023-06-09T12:00:00Z"}}
-
-        Input: "URGENT: finish the report for work by Friday at 5pm tagged as urgent"
-        Output: {{"title": "Finish work report", "project_id": 1, "due_date": "2023-06-09T17:00:00Z", "priority": 5}}
-
-        Input: "Take vitamins daily with health"
-        Output: {{"title": "Take vitamins", "project_id": 1, "repeat_after": 86400}}
-
-        Input: "Add buy milk with the grocery label for next week"
-        (Assuming a label with name 'grocery' has id 7)
-        Output: {{"title": "Buy milk", "project_id": 1, "label_ids": [7], "due_date": "2023-06-16T12:00:00Z"}}
-
-        Input: "Schedule annual dentist appointment next March"
-        Output: {{"title": "Schedule dentist appointment", "project_id": 1, "due_date": "2023-03-01T12:00:00Z"}}
-
-    Input: "Finish the project report"
-        (assuming you have default due date settings set up)
-        Output: {{"title": "Finish project report", "project_id": 1, "due_date": "2023-06-10T12:00:00Z"}}
-
-    Input: "Assign prepare slides to William for next week"
-    Output: {{"title": "Prepare slides", "project_id": 1, "due_date": "2023-06-16T12:00:00Z", "assignee": "william"}}
-
-    {assignment_instructions}
-        """,
-    }
 
-    user_message = {
-        "role": "user",
-        "content": f"Create task: {task_description}",
+def prompt_block_stats() -> Dict[str, Any]:
+    """Sizes (bytes) of the last rendered prompt blocks and memo hit counts."""
+    static_info = _static_block.cache_info()
+    return {
+        "bytes": dict(_last_sizes),
+        "static_hits": static_info.hits,
+        "static_misses": static_info.misses,
+        "metadata_hits": _metadata_memo_stats["hits"],
+        "metadata_misses": _metadata_memo_stats["misses"],
+        "pruning": PRUNE_STATS.as_dict(),
     }
-
-    return [system_message, user_message]
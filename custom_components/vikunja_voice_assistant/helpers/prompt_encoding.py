@@ -0,0 +1,63 @@
+"""Encodings for the projects, labels and users listed in the prompt.
+
+`json` is a list of objects (`[{"id": 1, "name": "Inbox"}, ...]`) and
+repeats every key name per entry. `table` writes a header once and one
+`id|name` row per entry, which takes roughly half the tokens for the same
+data. `scripts/measure_prompt_encoding.py` compares both on a snapshot.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, Sequence
+
+from ..const import PROMPT_ENCODING_JSON, PROMPT_ENCODING_TABLE
+
+NAME_COLUMNS = ("id", "name")
+USER_COLUMNS = ("id", "name", "username")
+
+
+def _cell(value: Any) -> str:
+    text = "" if value is None else str(value)
+    # Keep one entry per line and the column separator unambiguous
+    return " ".join(text.split()).replace("|", "/")
+
+
+def encode_entry(values: Sequence[Any], columns: Sequence[str], encoding: str) -> str:
+    """One entry as a JSON object or a table row."""
+    if encoding == PROMPT_ENCODING_TABLE:
+        return "|".join(_cell(value) for value in values)
+    return json.dumps(dict(zip(columns, values)))
+
+
+def encode_entries(entries: Iterable[str], encoding: str) -> str:
+    """Join entries produced by `encode_entry` into one list."""
+    if encoding == PROMPT_ENCODING_TABLE:
+        return "\n".join(entries)
+    return f"[{', '.join(entries)}]"
+
+
+def entry_separator_length(encoding: str) -> int:
+    return 1 if encoding == PROMPT_ENCODING_TABLE else 2
+
+
+def render_metadata(
+    projects: str, labels: str, users: str, encoding: str = PROMPT_ENCODING_JSON
+) -> str:
+    """The metadata block of the prompt from already encoded lists.
+
+    `users` is empty when user assignment is off.
+    """
+    if encoding == PROMPT_ENCODING_TABLE:
+        header = "|".join(NAME_COLUMNS)
+        block = (
+            f"Available projects ({header}):\n{projects or '(none)'}\n"
+            f"Available labels ({header}):\n{labels or '(none)'}"
+        )
+        if users:
+            block += f"\nAvailable users ({'|'.join(USER_COLUMNS)}):\n{users}"
+        return block
+    block = f"Available projects: {projects}\nAvailable labels: {labels}"
+    if users:
+        block += f"\nAvailable users: {users}"
+    return block
@@ -0,0 +1,178 @@
+"""Compact typed records for Vikunja metadata and a streaming decoder.
+
+Vikunja list endpoints return full objects (nested `created_by` users,
+timestamps, colors, ...) while the integration only ever reads ids, titles
+and user names. Responses are decoded element by element straight into
+slotted records, so the full JSON objects never pile up in memory.
+
+Records expose a read-only `get()` so helpers written against raw dicts
+(prompt builder, response formatter, tests) keep working with either.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, List, Optional, TypeVar
+
+try:  # Optional fast JSON backend
+    import orjson  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+json_loads: Callable[[Any], Any] = orjson.loads if orjson is not None else json.loads
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class Record:
+    """Base for metadata records; mapping-style read access."""
+
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+
+def is_metadata_item(obj: Any) -> bool:
+    """True for raw Vikunja dicts and decoded records alike."""
+    return isinstance(obj, (dict, Record))
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectRecord(Record):
+    id: int
+    title: str
+
+    @classmethod
+    def from_json(cls, obj: Any) -> Optional["ProjectRecord"]:
+        if not isinstance(obj, dict) or _as_int(obj.get("id")) is None:
+            return None
+        return cls(id=int(obj["id"]), title=str(obj.get("title") or ""))
+
+
+@dataclass(frozen=True, slots=True)
+class LabelRecord(Record):
+    id: int
+    title: str
+
+    @classmethod
+    def from_json(cls, obj: Any) -> Optional["LabelRecord"]:
+        if not isinstance(obj, dict) or _as_int(obj.get("id")) is None:
+            return None
+        return cls(id=int(obj["id"]), title=str(obj.get("title") or ""))
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord(Record):
+    id: int
+    username: str
+    name: str
+
+    @classmethod
+    def from_json(cls, obj: Any) -> Optional["UserRecord"]:
+        if not isinstance(obj, dict) or _as_int(obj.get("id")) is None:
+            return None
+        return cls(
+            id=int(obj["id"]),
+            username=str(obj.get("username") or ""),
+            name=str(obj.get("name") or ""),
+        )
+
+
+R = TypeVar("R")
+
+
+class RecordStreamDecoder(Generic[R]):
+    """Incrementally decode a top-level JSON array into records.
+
+    Feed raw body chunks as they arrive; each array element is decoded and
+    projected through `factory` as soon as it is complete, and only the
+    resulting record is kept. With orjson installed the body is decoded in
+    one pass by orjson instead (faster than element-wise stdlib decoding)
+    and projected immediately. Non-array bodies yield no records.
+    """
+
+    def __init__(self, factory: Callable[[Any], Optional[R]]) -> None:
+        self._factory = factory
+        self.records: List[R] = []
+        self.size = 0
+        self._chunks: List[bytes] = []
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"  # start -> items -> done | invalid
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if orjson is not None:
+            self._chunks.append(chunk)
+            return
+        if self._state in ("done", "invalid"):
+            return
+        self._buffer = self._buffer[self._pos :] + self._utf8.decode(chunk)
+        self._pos = 0
+        self._consume(final=False)
+
+    def close(self) -> List[R]:
+        if orjson is not None:
+            data = orjson.loads(b"".join(self._chunks)) if self._chunks else None
+            self._chunks = []
+            if isinstance(data, list):
+                self._project(data)
+            return self.records
+        self._buffer = self._buffer[self._pos :] + self._utf8.decode(b"", final=True)
+        self._pos = 0
+        self._consume(final=True)
+        if self._state == "items":
+            raise ValueError("Truncated JSON array in response body")
+        return self.records
+
+    def _project(self, items: List[Any]) -> None:
+        for item in items:
+            record = self._factory(item)
+            if record is not None:
+                self.records.append(record)
+
+    def _consume(self, final: bool) -> None:
+        buffer = self._buffer
+        while self._state in ("start", "items"):
+            self._pos = _WHITESPACE.match(buffer, self._pos).end()
+            if self._pos >= len(buffer):
+                return
+            char = buffer[self._pos]
+            if self._state == "start":
+                self._state = "items" if char == "[" else "invalid"
+                self._pos += 1
+                if self._state == "invalid":
+                    return
+                continue
+            if char == "]":
+                self._state = "done"
+                return
+            if char == ",":
+                self._pos += 1
+                continue
+            try:
+                obj, end = self._decoder.raw_decode(buffer, self._pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                return  # element incomplete; wait for more data
+            if end >= len(buffer) and not final:
+                return  # cannot yet tell whether the element is complete
+            self._pos = end
+            record = self._factory(obj)
+            if record is not None:
+                self.records.append(record)
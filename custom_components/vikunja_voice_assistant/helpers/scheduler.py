@@ -0,0 +1,198 @@
+"""Priority-aware request scheduler with a token-bucket rate limit.
+
+Every Vikunja request takes a token from a shared bucket and an in-flight
+slot before it is sent. When either runs out, waiting requests are released
+strictly by priority class, so an interactive voice command never queues
+behind the periodic user-cache refresh or other background traffic.
+
+The priority of a request is taken from the calling context; background
+jobs wrap their work in `request_priority(PRIORITY_BACKGROUND)` and every
+request they issue (including from gathered sub-tasks) inherits it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+}
+
+_request_priority: ContextVar[int] = ContextVar(
+    "vikunja_request_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Run the enclosed requests (and tasks spawned inside) at `priority`."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def current_priority() -> int:
+    return _request_priority.get()
+
+
+@dataclass
+class _ClassStats:
+    granted: int = 0
+    queued: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def record(self, waited: float, queued: bool) -> None:
+        self.granted += 1
+        if queued:
+            self.queued += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def as_dict(self, depth: int) -> Dict[str, Any]:
+        return {
+            "queue_depth": depth,
+            "granted": self.granted,
+            "queued": self.queued,
+            "avg_wait_ms": (
+                round(self.wait_seconds / self.queued * 1000, 2) if self.queued else 0.0
+            ),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+        }
+
+
+class RequestScheduler:
+    """Admit requests by priority under a rate and concurrency limit.
+
+    `rate` tokens per second refill a bucket holding at most `burst`
+    tokens; at most `max_concurrent` admitted requests run at once.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_concurrent: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = max(float(rate), 0.001)
+        self.burst = max(int(burst), 1)
+        self.max_concurrent = max(int(max_concurrent), 1)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._refilled = clock()
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats: Dict[int, _ClassStats] = {
+            priority: _ClassStats() for priority in PRIORITY_NAMES
+        }
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._refilled) * self.rate
+        )
+        self._refilled = now
+
+    def _can_admit(self) -> bool:
+        return self._tokens >= 1 and self._in_flight < self.max_concurrent
+
+    def _admit(self) -> None:
+        self._tokens -= 1
+        self._in_flight += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None) -> AsyncIterator[None]:
+        """Hold an admitted slot for the duration of one request."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: Optional[int] = None) -> float:
+        """Wait until admitted; returns the seconds spent queued."""
+        if priority is None:
+            priority = current_priority()
+        stats = self._stats.setdefault(priority, _ClassStats())
+        self._refill()
+        if not self._pending() and self._can_admit():
+            self._admit()
+            stats.record(0.0, queued=False)
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        started = self._clock()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled; hand the slot back.
+                self.release()
+            raise
+        waited = self._clock() - started
+        stats.record(waited, queued=True)
+        return waited
+
+    def release(self) -> None:
+        self._in_flight = max(self._in_flight - 1, 0)
+        self._dispatch()
+
+    def _pending(self) -> bool:
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        return bool(self._waiters)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill()
+        while self._pending() and self._can_admit():
+            _priority, _seq, future = heapq.heappop(self._waiters)
+            self._admit()
+            future.set_result(None)
+        if self._pending() and self._in_flight < self.max_concurrent:
+            # Out of tokens; wake up when the next one has been refilled.
+            delay = (1 - self._tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def queue_depth(self, priority: Optional[int] = None) -> int:
+        return sum(
+            1
+            for prio, _seq, future in self._waiters
+            if not future.done() and (priority is None or prio == priority)
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Rate-limit settings plus per-class queue depth and wait times."""
+        self._refill()
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "max_concurrent": self.max_concurrent,
+            "tokens_available": round(self._tokens, 2),
+            "in_flight": self._in_flight,
+            "classes": {
+                PRIORITY_NAMES.get(priority, str(priority)): stats.as_dict(
+                    self.queue_depth(priority)
+                )
+                for priority, stats in self._stats.items()
+            },
+        }
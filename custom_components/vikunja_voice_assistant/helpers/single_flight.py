@@ -0,0 +1,64 @@
+"""Coalesce identical concurrent operations into one in-flight call.
+
+When two satellites fire at once, both voice commands ask Vikunja for the
+same project and label pages. Callers sharing a key await the one request
+already in flight instead of issuing their own.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    coalesced: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": (
+                round(self.coalesced / self.calls, 3) if self.calls else None
+            ),
+        }
+
+
+class SingleFlight:
+    """Share one in-flight awaitable among callers using the same key.
+
+    The shared work runs in its own task, so a caller being cancelled (for
+    example by its command deadline) does not cancel it for the others.
+    Results and exceptions are delivered to every caller; the key is
+    released as soon as the work finishes, so later calls start afresh.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = SingleFlightStats()
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        self.stats.calls += 1
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+        else:
+            future = asyncio.ensure_future(factory())
+            self._in_flight[key] = future
+            future.add_done_callback(partial(self._release, key))
+        return await asyncio.shield(future)
+
+    def _release(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            future.exception()  # mark retrieved when every caller went away
+
+    def in_flight(self) -> int:
+        return len(self._in_flight)
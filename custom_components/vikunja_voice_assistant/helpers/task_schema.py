@@ -0,0 +1,151 @@
+"""Task schema for structured `ai_task.generate_data` output.
+
+Passed as the `structure` of the service call so the entity returns the
+task fields as `data` instead of JSON embedded in text. Field types are HA
+selectors; numbers come back as floats and are normalized by
+`normalize_structured_task`.
+
+The optional compact output contract names the fields with single letters
+and shortens dates and recurrence, which cuts the tokens the model has to
+generate; `expand_short_keys` maps answers back to the Vikunja fields.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Optional
+
+SHORT_KEYS = {
+    "t": "title",
+    "n": "description",
+    "p": "project_id",
+    "d": "due_date",
+    "r": "repeat_after",
+    "l": "label_ids",
+    "a": "assignee",
+}
+_LONG_KEYS = {name: key for key, name in SHORT_KEYS.items()}
+REPEAT_UNITS = {"d": 86400, "w": 604800, "m": 2592000, "y": 31536000}
+_COMPACT_DATE = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:[T ](\d{2}):(\d{2}))?$")
+
+_BASE_STRUCTURE: Dict[str, Dict[str, Any]] = {
+    "title": {
+        "description": "Task title without date, project, label, priority or recurrence words",
+        "required": True,
+        "selector": {"text": {}},
+    },
+    "project_id": {
+        "description": "Project ID; 1 if no project is specified",
+        "required": True,
+        "selector": {"number": {"mode": "box"}},
+    },
+    "due_date": {
+        "description": "Due date in YYYY-MM-DDTHH:MM:SSZ format",
+        "selector": {"text": {}},
+    },
+    "priority": {
+        "description": "Priority 1-5, only when explicitly mentioned",
+        "selector": {"number": {"min": 1, "max": 5, "mode": "box"}},
+    },
+    "repeat_after": {
+        "description": "Repeat interval in seconds, only for recurring tasks",
+        "selector": {"number": {"min": 0, "mode": "box"}},
+    },
+    "label_ids": {
+        "description": "IDs of existing labels",
+        "selector": {"text": {"multiple": True}},
+    },
+}
+
+_ASSIGNEE_FIELD = {
+    "assignee": {
+        "description": "Username or exact name of the assignee, only if explicitly stated",
+        "selector": {"text": {}},
+    }
+}
+
+
+def _compact(structure: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    fields = dict(structure)
+    fields["due_date"] = {
+        **fields["due_date"],
+        "description": "Due date as YYYY-MM-DDTHH:MM in UTC",
+    }
+    # Same contract as the compact prompt: a unit letter or seconds
+    fields["repeat_after"] = {
+        "description": "Recurrence, only for recurring tasks: d (daily), "
+        "w (weekly), m (monthly) or y (yearly); seconds for any other interval",
+        "selector": {"text": {}},
+    }
+    return {_LONG_KEYS.get(name, name): field for name, field in fields.items()}
+
+
+TASK_STRUCTURE = _BASE_STRUCTURE
+TASK_STRUCTURE_WITH_ASSIGNEE = {**_BASE_STRUCTURE, **_ASSIGNEE_FIELD}
+_STRUCTURES = {
+    (False, False): TASK_STRUCTURE,
+    (True, False): TASK_STRUCTURE_WITH_ASSIGNEE,
+    (False, True): _compact(TASK_STRUCTURE),
+    (True, True): _compact(TASK_STRUCTURE_WITH_ASSIGNEE),
+}
+
+_INTEGER_FIELDS = ("project_id", "priority", "repeat_after")
+
+
+def task_structure(
+    enable_user_assignment: bool, compact_output: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """The `structure` for a generate_data call."""
+    return _STRUCTURES[(bool(enable_user_assignment), bool(compact_output))]
+
+
+def expand_short_keys(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Task fields of a compact answer under their Vikunja names.
+
+    Answers that already use the full names pass through unchanged; when
+    both forms of a field are present, the full name wins.
+    """
+    task = {
+        SHORT_KEYS.get(key, key): value
+        for key, value in data.items()
+        if key not in SHORT_KEYS or SHORT_KEYS[key] not in data
+    }
+    due = task.get("due_date")
+    if isinstance(due, str):
+        match = _COMPACT_DATE.match(due.strip())
+        if match:
+            day, hour, minute = match.groups()
+            # Date only means the prompt's default time
+            task["due_date"] = f"{day}T{hour or '12'}:{minute or '00'}:00Z"
+    repeat = task.get("repeat_after")
+    if isinstance(repeat, str) and repeat.strip().lower() in REPEAT_UNITS:
+        task["repeat_after"] = REPEAT_UNITS[repeat.strip().lower()]
+    return task
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_structured_task(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Task payload from structured `data`: integer ids, empty fields dropped."""
+    task: Dict[str, Any] = {}
+    for key, value in data.items():
+        if value is None or value == "" or value == []:
+            continue
+        if key in _INTEGER_FIELDS:
+            value = _to_int(value)
+            if value is None:
+                continue
+        elif key == "label_ids":
+            values = value if isinstance(value, list) else [value]
+            value = [i for i in (_to_int(v) for v in values) if i is not None]
+            if not value:
+                continue
+        elif isinstance(value, str):
+            value = value.strip()
+        task[key] = value
+    return task
@@ -0,0 +1,291 @@
+"""Per-entry stale-while-revalidate cache of Vikunja projects and labels.
+
+`process_task` needs the project and label lists for every prompt. They
+change rarely, so they are served from memory: fresh entries directly,
+entries older than the TTL also directly while a background refresh
+fetches new data. Only the very first request (or one after a forced
+invalidation) waits for Vikunja.
+
+`get_index` hands out a `MetadataIndex` over both lists, rebuilt only when
+one of them changed. Cached lists are replaced, never mutated, so list
+identity tells whether the current index is still valid.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .api.vikunja_api import VikunjaRequestError
+from .const import DEFAULT_METADATA_TTL
+from .helpers.metadata_index import MetadataIndex
+from .helpers.scheduler import PRIORITY_BACKGROUND, request_priority
+
+_LOGGER = logging.getLogger(__name__)
+
+KIND_PROJECTS = "projects"
+KIND_LABELS = "labels"
+METADATA_KINDS = (KIND_PROJECTS, KIND_LABELS)
+
+
+@dataclass
+class _CacheSlot:
+    value: Optional[List[Any]] = None
+    fetched_at: float = 0.0
+    refresh: Optional[asyncio.Future] = None
+    generation: int = 0  # bumped on invalidation; older refreshes are discarded
+
+
+@dataclass
+class MetadataCacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    refresh_failures: int = 0
+    refresh_seconds: float = 0.0
+    last_refresh_seconds: Optional[float] = None
+    index_builds: int = 0
+    per_kind: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def record(self, kind: str, outcome: str) -> None:
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        counts = self.per_kind.setdefault(kind, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.stale_hits + self.misses
+        done = self.refreshes - self.refresh_failures
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                round((self.hits + self.stale_hits) / total, 3) if total else None
+            ),
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "avg_refresh_ms": (
+                round(self.refresh_seconds / done * 1000, 2) if done > 0 else None
+            ),
+            "last_refresh_ms": (
+                round(self.last_refresh_seconds * 1000, 2)
+                if self.last_refresh_seconds is not None
+                else None
+            ),
+            "per_kind": self.per_kind,
+            "index_builds": self.index_builds,
+        }
+
+
+class MetadataCache:
+    """Serve projects and labels from memory, revalidating in the background."""
+
+    def __init__(
+        self,
+        hass,
+        api,
+        ttl: float = DEFAULT_METADATA_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.hass = hass
+        self.api = api
+        self.ttl = ttl
+        self._clock = clock
+        self._slots: Dict[str, _CacheSlot] = {
+            kind: _CacheSlot() for kind in METADATA_KINDS
+        }
+        self._fetchers: Dict[str, Callable[[], Awaitable[List[Any]]]] = {
+            KIND_PROJECTS: api.list_projects,
+            KIND_LABELS: api.list_labels,
+        }
+        self.stats = MetadataCacheStats()
+        self._listeners: List[Callable[[], None]] = []
+        self._index: Optional[MetadataIndex] = None
+        self._index_sources: Tuple[Any, Any] = (None, None)
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call `listener` whenever cached data changes; returns an unsubscribe."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def get_projects(self) -> List[Any]:
+        """Cached projects; [] if they were never fetched successfully."""
+        return await self._get(KIND_PROJECTS)
+
+    async def get_labels(self) -> List[Any]:
+        """Cached labels; [] if they were never fetched successfully."""
+        return await self._get(KIND_LABELS)
+
+    async def get_index(self) -> MetadataIndex:
+        """Indexed view of the cached projects and labels."""
+        projects, labels = await asyncio.gather(self.get_projects(), self.get_labels())
+        sources = self._index_sources
+        if (
+            self._index is None
+            or sources[0] is not projects
+            or sources[1] is not labels
+        ):
+            self._index = MetadataIndex.build(projects, labels)
+            self._index_sources = (projects, labels)
+            self.stats.index_builds += 1
+        return self._index
+
+    async def _get(self, kind: str) -> List[Any]:
+        slot = self._slots[kind]
+        if slot.value is None:
+            self.stats.record(kind, "misses")
+            await asyncio.shield(self._start_refresh(kind))
+            return slot.value if slot.value is not None else []
+        if self._clock() - slot.fetched_at < self.ttl:
+            self.stats.record(kind, "hits")
+        else:
+            self.stats.record(kind, "stale_hits")
+            self._start_refresh(kind, background=True)
+        return slot.value
+
+    def _start_refresh(self, kind: str, background: bool = False) -> asyncio.Future:
+        """Start (or join) the refresh of one kind."""
+        slot = self._slots[kind]
+        if slot.refresh is None or slot.refresh.done():
+            if background:
+                # Revalidation must not hold up live voice commands.
+                with request_priority(PRIORITY_BACKGROUND):
+                    slot.refresh = self.hass.async_create_background_task(
+                        self._refresh(kind), f"vikunja_refresh_{kind}"
+                    )
+            else:
+                slot.refresh = asyncio.ensure_future(self._refresh(kind))
+        return slot.refresh
+
+    async def _refresh(self, kind: str) -> None:
+        slot = self._slots[kind]
+        generation = slot.generation
+        self.stats.refreshes += 1
+        started = self._clock()
+        try:
+            value = await self._fetchers[kind]()
+        except VikunjaRequestError as err:
+            # Keep serving what we have; the next stale read retries.
+            self.stats.refresh_failures += 1
+            _LOGGER.error("Failed to refresh cached %s: %s", kind, err)
+            return
+        elapsed = self._clock() - started
+        self.stats.refresh_seconds += elapsed
+        self.stats.last_refresh_seconds = elapsed
+        if generation != slot.generation:
+            return  # invalidated while in flight; the data may predate the change
+        slot.fetched_at = self._clock()
+        _LOGGER.debug("Refreshed %s %s in %.3fs", len(value), kind, elapsed)
+        if value != slot.value:
+            # Unchanged data keeps its list so the built index stays valid
+            slot.value = value
+            for listener in list(self._listeners):
+                listener()
+
+    def seed(self, kind: str, value: List[Any]) -> None:
+        """Pre-fill an empty slot (e.g. from the on-disk snapshot).
+
+        Seeded data counts as stale: it is served right away and revalidated
+        on first use.
+        """
+        slot = self._slots[kind]
+        if slot.value is None:
+            slot.value = list(value)
+            slot.fetched_at = self._clock() - self.ttl
+
+    def apply_upsert(self, kind: str, record: Any) -> bool:
+        """Insert or replace one record (webhook update); True if data changed.
+
+        The cached list is replaced, never mutated, since readers may still
+        hold the previous one. Nothing happens while the kind is not cached;
+        the next read fetches the full list anyway.
+        """
+        slot = self._slots[kind]
+        if slot.value is None:
+            return False
+        items = list(slot.value)
+        for index, item in enumerate(items):
+            if item.get("id") == record.id:
+                if item == record:
+                    return False
+                items[index] = record
+                break
+        else:
+            items.append(record)
+        self._replace(slot, items)
+        return True
+
+    def apply_delete(self, kind: str, record_id: Any) -> bool:
+        """Drop one record by id (webhook update); True if data changed."""
+        slot = self._slots[kind]
+        if slot.value is None:
+            return False
+        items = [item for item in slot.value if item.get("id") != record_id]
+        if len(items) == len(slot.value):
+            return False
+        self._replace(slot, items)
+        return True
+
+    def _replace(self, slot: _CacheSlot, items: List[Any]) -> None:
+        slot.value = items
+        # A refresh already in flight may have read the pre-update state.
+        slot.generation += 1
+        slot.refresh = None
+        for listener in list(self._listeners):
+            listener()
+
+    def is_fresh(self, kind: str) -> bool:
+        """Whether the cached data was fetched from Vikunja within the TTL."""
+        slot = self._slots[kind]
+        return slot.value is not None and self._clock() - slot.fetched_at < self.ttl
+
+    async def async_ensure_fresh(self, kind: str) -> bool:
+        """Refetch stale or missing data now; True once it is fresh.
+
+        Unlike `async_refresh`, cached data stays in use if the fetch fails.
+        """
+        if not self.is_fresh(kind):
+            await asyncio.shield(self._start_refresh(kind))
+        return self.is_fresh(kind)
+
+    def peek(self, kind: str) -> Optional[List[Any]]:
+        """Currently cached data without touching stats or refreshing."""
+        return self._slots[kind].value
+
+    def revalidate(self) -> None:
+        """Refresh every kind in the background, keeping cached data in use."""
+        for kind in METADATA_KINDS:
+            self._start_refresh(kind, background=True)
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """Drop cached data so the next read waits for fresh data."""
+        for name in (kind,) if kind else METADATA_KINDS:
+            slot = self._slots[name]
+            slot.value = None
+            slot.fetched_at = 0.0
+            slot.generation += 1
+            slot.refresh = None
+
+    async def async_refresh(self, kind: Optional[str] = None) -> None:
+        """Invalidate and refetch now (used by the refresh_metadata service)."""
+        kinds = (kind,) if kind else METADATA_KINDS
+        self.invalidate(kind)
+        await asyncio.gather(*(self._start_refresh(name) for name in kinds))
+
+    def as_dict(self) -> Dict[str, Any]:
+        now = self._clock()
+        return {
+            "ttl_seconds": self.ttl,
+            "index_version": self._index.version if self._index else None,
+            **self.stats.as_dict(),
+            "age_seconds": {
+                kind: (
+                    round(now - slot.fetched_at, 1) if slot.value is not None else None
+                )
+                for kind, slot in self._slots.items()
+            },
+        }
@@ -0,0 +1,318 @@
+"""Durable write-ahead outbox for task creation.
+
+With the outbox enabled, `process_task` appends the parsed task here and
+answers right away. A background worker replays the queue in order:
+create the task (with embedded relations), then attach whatever labels and
+assignees are still pending, retrying with backoff while Vikunja is down.
+Entries Vikunja rejects for good (400/404/422, e.g. a deleted project)
+are dropped at once instead of holding up the queue behind them. Auth
+errors (401/403, e.g. a rotated API token) are the token's fault, not the
+entry's: those entries stay queued and are retried until it is fixed.
+The queue is persisted under the HA config dir after every change, so
+queued tasks survive restarts. Delivery is at-least-once: a crash between
+a successful create and the following save can create a task twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from .const import (
+    OUTBOX_FILENAME,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETRY_BASE_SECONDS,
+    OUTBOX_RETRY_MAX_SECONDS,
+)
+from .api.vikunja_api import VikunjaRequestError
+from .helpers.files import write_json_atomic
+from .helpers.scheduler import PRIORITY_BACKGROUND, request_priority
+
+_LOGGER = logging.getLogger(__name__)
+
+OUTBOX_VERSION = 1
+
+
+@dataclass
+class OutboxEntry:
+    """A parsed task waiting to be written to Vikunja."""
+
+    id: str
+    task_data: Dict[str, Any]
+    label_ids: List[int] = field(default_factory=list)
+    assignee_ids: List[int] = field(default_factory=list)
+    # Already on the created task; kept when bulk-attaching the rest
+    attached_label_ids: List[int] = field(default_factory=list)
+    attached_assignee_ids: List[int] = field(default_factory=list)
+    queued_at: str = ""
+    task_id: Optional[int] = None  # set once the create call succeeded
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> Optional["OutboxEntry"]:
+        try:
+            return cls(
+                id=str(raw["id"]),
+                task_data=dict(raw["task_data"]),
+                label_ids=list(raw.get("label_ids") or []),
+                assignee_ids=list(raw.get("assignee_ids") or []),
+                attached_label_ids=list(raw.get("attached_label_ids") or []),
+                attached_assignee_ids=list(raw.get("attached_assignee_ids") or []),
+                queued_at=str(raw.get("queued_at") or ""),
+                task_id=raw.get("task_id"),
+                attempts=int(raw.get("attempts") or 0),
+                last_error=raw.get("last_error"),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+class VikunjaOutbox:
+    """Persisted FIFO of task creations replayed by a background worker."""
+
+    def __init__(
+        self,
+        hass,
+        api,
+        breaker=None,
+        path: Optional[str] = None,
+        voice_label=None,
+    ) -> None:
+        self.hass = hass
+        self.api = api
+        self.breaker = breaker
+        self.voice_label = voice_label
+        self.path = path or os.path.join(hass.config.config_dir, OUTBOX_FILENAME)
+        self.entries: List[OutboxEntry] = []
+        self._wake = asyncio.Event()
+        self._save_lock = asyncio.Lock()
+        self._worker: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    # --------------- Persistence ---------------
+    def _load_sync(self) -> List[OutboxEntry]:
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.error("Failed loading outbox: %s", err)
+            return []
+        entries = []
+        for item in raw.get("entries", []) if isinstance(raw, dict) else []:
+            entry = OutboxEntry.from_dict(item) if isinstance(item, dict) else None
+            if entry is None:
+                _LOGGER.warning("Skipping malformed outbox entry: %s", item)
+                continue
+            entries.append(entry)
+        return entries
+
+    async def load(self) -> None:
+        self.entries = await self.hass.async_add_executor_job(self._load_sync)
+        if self.entries:
+            _LOGGER.info("Outbox holds %s queued task(s)", len(self.entries))
+
+    async def _async_save(self, raise_errors: bool = False) -> None:
+        payload = {
+            "version": OUTBOX_VERSION,
+            "entries": [asdict(entry) for entry in self.entries],
+        }
+        # Serialize writes so an older snapshot never replaces a newer one
+        async with self._save_lock:
+            try:
+                await self.hass.async_add_executor_job(
+                    write_json_atomic, self.path, payload
+                )
+            except Exception as err:  # noqa: BLE001
+                _LOGGER.error("Failed saving outbox: %s", err)
+                if raise_errors:
+                    raise
+
+    # --------------- Queue ---------------
+    @property
+    def backlog(self) -> int:
+        return len(self.entries)
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call `listener` whenever the backlog changes; returns an unsubscribe."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
+
+    async def enqueue(
+        self,
+        task_data: Dict[str, Any],
+        label_ids: List[int],
+        assignee_ids: List[int],
+    ) -> OutboxEntry:
+        """Persist a parsed task; it is written to Vikunja in the background.
+
+        Raises when the queue could not be saved: the task is then not
+        queued and must not be acknowledged.
+        """
+        entry = OutboxEntry(
+            id=uuid.uuid4().hex,
+            task_data=dict(task_data),
+            label_ids=list(label_ids),
+            assignee_ids=list(assignee_ids),
+            queued_at=datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        )
+        self.entries.append(entry)
+        try:
+            await self._async_save(raise_errors=True)
+        except Exception:
+            self.entries.remove(entry)
+            raise
+        self._notify()
+        self._wake.set()
+        return entry
+
+    # --------------- Worker ---------------
+    def start(self) -> Callable[[], None]:
+        """Start the replay worker; returns a callback stopping it."""
+        self._worker = self.hass.async_create_background_task(
+            self._run(), "vikunja_outbox_worker"
+        )
+
+        def _stop() -> None:
+            if self._worker is not None:
+                self._worker.cancel()
+                self._worker = None
+
+        return _stop
+
+    async def _run(self) -> None:
+        # Replays are deferred writes; let live voice commands go first.
+        with request_priority(PRIORITY_BACKGROUND):
+            while True:
+                if not self.entries:
+                    self._wake.clear()
+                    await self._wake.wait()
+                    continue
+                entry = self.entries[0]
+                if self.breaker is not None and self.breaker.is_open:
+                    await asyncio.sleep(max(self.breaker.retry_in, 1.0))
+                    continue
+                permanent = unauthorized = False
+                try:
+                    done = await self._process(entry)
+                except VikunjaRequestError as err:
+                    entry.last_error = str(err)
+                    permanent = err.rejected
+                    unauthorized = err.status in (401, 403)
+                    done = False
+                except Exception as err:  # noqa: BLE001
+                    entry.last_error = str(err)
+                    done = False
+                if done:
+                    await self._finish(entry)
+                    continue
+                entry.attempts += 1
+                if permanent or (
+                    entry.attempts >= OUTBOX_MAX_ATTEMPTS and not unauthorized
+                ):
+                    self._give_up(entry)
+                    await self._finish(entry)
+                    continue
+                await self._async_save()
+                await asyncio.sleep(
+                    min(
+                        OUTBOX_RETRY_BASE_SECONDS * 2 ** (entry.attempts - 1),
+                        OUTBOX_RETRY_MAX_SECONDS,
+                    )
+                )
+
+    async def _process(self, entry: OutboxEntry) -> bool:
+        """Advance one entry; returns True once it is fully written."""
+        if entry.task_id is None:
+            (
+                created,
+                pending_labels,
+                pending_users,
+            ) = await self.api.add_task_with_relations(
+                dict(entry.task_data),
+                entry.label_ids,
+                entry.assignee_ids,
+                raise_errors=True,
+            )
+            task_id = created.get("id") if isinstance(created, dict) else None
+            if task_id is None:
+                entry.last_error = "Task creation failed"
+                return False
+            _LOGGER.info(
+                "Created queued Vikunja task '%s'", entry.task_data.get("title")
+            )
+            entry.task_id = task_id
+            entry.attached_label_ids = [
+                lid for lid in entry.label_ids if lid not in pending_labels
+            ]
+            entry.attached_assignee_ids = [
+                uid for uid in entry.assignee_ids if uid not in pending_users
+            ]
+            entry.label_ids = pending_labels
+            entry.assignee_ids = pending_users
+            entry.attempts = 0
+            entry.last_error = None
+            await self._async_save()
+        if entry.label_ids or entry.assignee_ids:
+            result = await self.api.enrich_task(
+                entry.task_id,
+                entry.label_ids,
+                entry.assignee_ids,
+                attached_labels=entry.attached_label_ids,
+                attached_users=entry.attached_assignee_ids,
+            )
+            entry.attached_label_ids += result.attached_labels
+            entry.attached_assignee_ids += result.assigned_users
+            entry.label_ids = result.failed_labels
+            entry.assignee_ids = result.failed_users
+            if self.voice_label is not None:
+                for label_id in result.failed_labels:
+                    self.voice_label.attach_failed(label_id)
+            if not result.ok:
+                entry.last_error = "Attaching labels/assignees failed"
+                return False
+        return True
+
+    def _give_up(self, entry: OutboxEntry) -> None:
+        if entry.task_id is None:
+            _LOGGER.error(
+                "Dropping queued task '%s' after %s attempts: %s",
+                entry.task_data.get("title"),
+                entry.attempts,
+                entry.last_error,
+            )
+        else:
+            _LOGGER.error(
+                "Giving up attaching labels %s / assignees %s to task %s: %s",
+                entry.label_ids,
+                entry.assignee_ids,
+                entry.task_id,
+                entry.last_error,
+            )
+
+    async def _finish(self, entry: OutboxEntry) -> None:
+        if entry in self.entries:
+            self.entries.remove(entry)
+        await self._async_save()
+        self._notify()
+
+    def as_dict(self) -> Dict[str, Any]:
+        head = self.entries[0] if self.entries else None
+        return {
+            "backlog": self.backlog,
+            "oldest_queued_at": head.queued_at if head else None,
+            "head_attempts": head.attempts if head else 0,
+            "last_error": head.last_error if head else None,
+        }
@@ -0,0 +1,315 @@
+"""LRU cache of LLM parse results for repeated voice commands.
+
+People repeat the same commands ("take out the trash", "water the plants")
+and each repeat would pay for a full LLM call. Results are cached under the
+normalized utterance, the metadata version (`MetadataIndex.version`, so a
+renamed project or label is a miss) and the settings that shape the answer
+(default due date, voice correction, user assignment).
+
+Due dates are not cached as timestamps: a date the utterance names
+relatively ("tomorrow", "on Friday") or the default due date is stored as a
+symbol and resolved again on every hit, so a cached "tomorrow" never points
+at yesterday's tomorrow. A due date that cannot be expressed that way is
+only reused later on the day it was parsed, while it is still ahead; one
+counted from the moment of speaking ("in 10 minutes") is not cached.
+
+The cache is bounded to `max_entries` (least recently used entries go
+first) and optionally persisted to a file under the HA config dir, with
+saves coalesced like the metadata snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from .const import PARSE_CACHE_FILENAME, PARSE_CACHE_SAVE_DELAY_SECONDS
+from .helpers.fast_path import counts_from_now, days_until, relative_date
+from .helpers.files import write_json_atomic
+from .helpers.prompt_builder import default_due_date_value
+
+_LOGGER = logging.getLogger(__name__)
+
+PARSE_CACHE_VERSION = 1
+
+_PUNCTUATION = str.maketrans({c: " " for c in ',.;:!?¡¿"«»()“”„،।，。！？'})
+
+
+def normalize_utterance(text: str) -> str:
+    """Case, punctuation and spacing differences do not change the command."""
+    return " ".join(str(text or "").casefold().translate(_PUNCTUATION).split())
+
+
+def _parse_due(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        due = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return due.replace(tzinfo=due.tzinfo or timezone.utc)
+
+
+def resolve_due(
+    symbol: Dict[str, Any], default_due_date: str, now: datetime
+) -> Optional[str]:
+    """The due date `symbol` stands for at `now`; None when it no longer applies."""
+    if "on" in symbol:
+        due = _parse_due(symbol["on"])
+        if symbol.get("day") != now.date().isoformat() or due is None or due <= now:
+            return None
+        return symbol["on"]
+    if symbol.get("default"):
+        return default_due_date_value(default_due_date, now) or None
+    hour, minute, second = (int(part) for part in symbol["time"].split(":"))
+    due = now.replace(hour=hour, minute=minute, second=second, microsecond=0)
+    if "days" in symbol:
+        due += timedelta(days=symbol["days"])
+    else:
+        due += timedelta(days=days_until(now, symbol["weekday"]))
+    if due <= now:
+        return None  # e.g. "today at 8am" repeated in the afternoon
+    return due.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def symbolic_due(
+    due: Any, text: str, lang: str, default_due_date: str, now: datetime
+) -> Optional[Dict[str, Any]]:
+    """How to store `due`, the answer to `text` at `now`, so it can be re-resolved.
+
+    A symbol is only used when resolving it at `now` gives `due` back;
+    otherwise the date is kept as is and only reused later the same day
+    while it is still ahead. None when the date counts from the moment of
+    speaking ("in 10 minutes") and cannot be reused at all.
+    """
+    parsed = _parse_due(due)
+    if parsed is not None:
+        offset, weekday = relative_date(text, lang)
+        clock = parsed.strftime("%H:%M:%S")
+        candidates = []
+        if offset is not None:
+            candidates.append({"days": offset, "time": clock})
+        if weekday is not None:
+            candidates.append({"weekday": weekday, "time": clock})
+        if offset is None and weekday is None:
+            candidates.append({"default": True})
+        for symbol in candidates:
+            resolved = resolve_due(symbol, default_due_date, now)
+            if resolved is not None and _parse_due(resolved) == parsed:
+                return symbol
+    if counts_from_now(text, lang):
+        return None
+    return {"on": due, "day": now.date().isoformat()}
+
+
+class ParseCache:
+    """Bounded LRU map of cache key -> task data with a symbolic due date."""
+
+    def __init__(
+        self,
+        hass=None,
+        max_entries: int = 100,
+        path: Optional[str] = None,
+        delay: float = PARSE_CACHE_SAVE_DELAY_SECONDS,
+    ) -> None:
+        self.hass = hass
+        self.max_entries = max(1, int(max_entries))
+        self.path = path
+        self.delay = delay
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._save_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.stores = 0
+        self.evictions = 0
+        self.skipped = 0
+        self.saves = 0
+
+    @classmethod
+    def persisted(cls, hass, max_entries: int) -> "ParseCache":
+        return cls(
+            hass,
+            max_entries,
+            path=os.path.join(hass.config.config_dir, PARSE_CACHE_FILENAME),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(
+        text: str,
+        lang: str,
+        metadata_version: str,
+        default_due_date: str,
+        voice_correction: bool,
+        enable_user_assignment: bool,
+    ) -> str:
+        raw = json.dumps(
+            [
+                normalize_utterance(text),
+                lang,
+                metadata_version,
+                default_due_date,
+                bool(voice_correction),
+                bool(enable_user_assignment),
+            ],
+            ensure_ascii=False,
+        )
+        return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+    # --------------- Lookups ---------------
+    def get(
+        self, key: str, default_due_date: str, now: Optional[datetime] = None
+    ) -> Optional[Dict[str, Any]]:
+        """A fresh copy of the cached task data with its due date resolved for now."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        task = copy.deepcopy(entry["task"])
+        symbol = entry.get("due")
+        if symbol is not None:
+            due = resolve_due(
+                symbol, default_due_date, now or datetime.now(timezone.utc)
+            )
+            if due is None:
+                # The parse is still right, but not its date; ask again
+                self.stale += 1
+                self.misses += 1
+                return None
+            task["due_date"] = due
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return task
+
+    def put(
+        self,
+        key: str,
+        text: str,
+        lang: str,
+        task_data: Dict[str, Any],
+        default_due_date: str,
+        now: Optional[datetime] = None,
+    ) -> None:
+        """Remember the task data parsed from `text`."""
+        if not isinstance(task_data, dict) or not task_data.get("title"):
+            return
+        task = copy.deepcopy(task_data)
+        due = task.pop("due_date", None)
+        symbol = None
+        if due:
+            symbol = symbolic_due(
+                due, text, lang, default_due_date, now or datetime.now(timezone.utc)
+            )
+            if symbol is None:
+                self.skipped += 1
+                return
+        self._entries[key] = {"task": task, "due": symbol}
+        self._entries.move_to_end(key)
+        self.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        if self.path is not None:
+            self.schedule_save()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    # --------------- Persistence ---------------
+    def _load_sync(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.error("Failed loading parse cache: %s", err)
+            return None
+
+    async def async_load(self) -> None:
+        """Restore persisted entries (no-op without a path)."""
+        if self.path is None:
+            return
+        raw = await self.hass.async_add_executor_job(self._load_sync)
+        if raw is None:
+            return
+        if not isinstance(raw, dict) or raw.get("version") != PARSE_CACHE_VERSION:
+            _LOGGER.info("Ignoring outdated or malformed parse cache")
+            return
+        for item in raw.get("entries", [])[-self.max_entries :]:
+            try:
+                key, entry = item
+                if isinstance(entry.get("task"), dict):
+                    self._entries[str(key)] = {
+                        "task": entry["task"],
+                        "due": entry.get("due"),
+                    }
+            except (AttributeError, TypeError, ValueError):
+                continue
+        _LOGGER.debug("Loaded %s cached parse results", len(self._entries))
+
+    def _payload(self) -> Dict[str, Any]:
+        return {
+            "version": PARSE_CACHE_VERSION,
+            "entries": [[key, entry] for key, entry in self._entries.items()],
+        }
+
+    def schedule_save(self) -> None:
+        """Request a save; requests within the delay window share one write."""
+        if self._timer is not None:
+            return
+        self._timer = asyncio.get_running_loop().call_later(
+            self.delay, self._start_save
+        )
+
+    def _start_save(self) -> None:
+        self._timer = None
+        self.hass.async_create_background_task(
+            self.async_save(), "vikunja_parse_cache_save"
+        )
+
+    async def async_save(self) -> None:
+        async with self._save_lock:
+            try:
+                await self.hass.async_add_executor_job(
+                    write_json_atomic, self.path, self._payload()
+                )
+            except Exception as err:  # noqa: BLE001
+                _LOGGER.error("Failed saving parse cache: %s", err)
+                return
+        self.saves += 1
+
+    async def async_flush(self) -> None:
+        """Write a pending save right away (on unload)."""
+        if self._timer is None:
+            return
+        self._timer.cancel()
+        self._timer = None
+        await self.async_save()
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "persisted": self.path is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "stale_dates": self.stale,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "not_cacheable": self.skipped,
+            "saves": self.saves,
+        }
@@ -0,0 +1,53 @@
+"""Per-config-entry runtime data shared by intents, services and caches."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from .const import DATA_RUNTIME, DOMAIN
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .api.homeassistant_llm_api import AITaskCapabilities
+    from .api.vikunja_api import VikunjaAPI
+    from .helpers.circuit_breaker import CircuitBreaker
+    from .helpers.fast_path import FastPathParser
+    from .helpers.fuzzy_resolver import FuzzyResolver
+    from .helpers.prompt_budget import RecentUsage
+    from .metadata_cache import MetadataCache
+    from .outbox import VikunjaOutbox
+    from .parse_cache import ParseCache
+    from .snapshot import MetadataSnapshotStore
+    from .user_cache import VikunjaUserCacheManager
+    from .voice_label import VoiceLabelResolver
+    from .webhook import VikunjaWebhookProcessor
+
+
+@dataclass
+class VikunjaRuntimeData:
+    """Long-lived objects owned by a loaded config entry.
+
+    Stored as `entry.runtime_data` and referenced from `hass.data[DOMAIN]` so
+    code paths that only receive `hass` (intents, services) reach the same
+    client instead of building their own.
+    """
+
+    api: "VikunjaAPI"
+    user_cache: "VikunjaUserCacheManager"
+    vikunja_breaker: "CircuitBreaker"
+    llm_breaker: "CircuitBreaker"
+    outbox: Optional["VikunjaOutbox"] = None
+    metadata: Optional["MetadataCache"] = None
+    snapshot: Optional["MetadataSnapshotStore"] = None
+    webhook: Optional["VikunjaWebhookProcessor"] = None
+    voice_label: Optional["VoiceLabelResolver"] = None
+    usage: Optional["RecentUsage"] = None
+    resolver: Optional["FuzzyResolver"] = None
+    llm_capabilities: Optional["AITaskCapabilities"] = None
+    fast_path: Optional["FastPathParser"] = None
+    parse_cache: Optional["ParseCache"] = None
+
+
+def get_runtime_data(hass) -> Optional[VikunjaRuntimeData]:
+    """Return the runtime data of the loaded entry, if any."""
+    return hass.data.get(DOMAIN, {}).get(DATA_RUNTIME)
@@ -0,0 +1,50 @@
+"""Outbox backlog sensor (only when the write-ahead outbox is enabled)."""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .binary_sensor import device_info
+from .outbox import VikunjaOutbox
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the outbox backlog sensor."""
+    outbox = entry.runtime_data.outbox
+    if outbox is not None:
+        async_add_entities([OutboxBacklogSensor(entry, outbox)])
+
+
+class OutboxBacklogSensor(SensorEntity):
+    """Number of queued tasks not yet fully written to Vikunja."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_translation_key = "outbox_backlog"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:tray-full"
+
+    def __init__(self, entry: ConfigEntry, outbox: VikunjaOutbox) -> None:
+        self._outbox = outbox
+        self._attr_unique_id = f"{entry.entry_id}_outbox_backlog"
+        self._attr_device_info = device_info(entry)
+
+    @property
+    def native_value(self) -> int:
+        return self._outbox.backlog
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        attributes = self._outbox.as_dict()
+        attributes.pop("backlog", None)
+        return attributes
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(self._outbox.add_listener(self.async_write_ha_state))
@@ -4,11 +4,15 @@ import logging
 import voluptuous as vol
 from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.helpers import config_validation as cv
-from .const import DOMAIN, CONF_VIKUNJA_URL, CONF_VIKUNJA_API_KEY
-from .api.vikunja_api import VikunjaAPI
+from .const import DOMAIN
+from .runtime import get_runtime_data
 
 _LOGGER = logging.getLogger(__name__)
 
+REFRESH_METADATA_SCHEMA = vol.Schema(
+    {vol.Optional("kind"): vol.In(["projects", "labels"])}
+)
+
 CREATE_TASK_SCHEMA = vol.Schema(
     {
         vol.Required("title"): cv.string,
@@ -20,24 +24,17 @@ CREATE_TASK_SCHEMA = vol.Schema(
 
 
 def setup_services(hass: HomeAssistant):
-    """Register the create_task service."""
-    domain_config = hass.data.get(DOMAIN, {})
-    vikunja_url = domain_config.get(CONF_VIKUNJA_URL)
-    vikunja_api_key = domain_config.get(CONF_VIKUNJA_API_KEY)
-
-    if not all([vikunja_url, vikunja_api_key]):
-        _LOGGER.error("Missing configuration for Vikunja voice assistant")
-        return
-
-    vikunja_api = VikunjaAPI(vikunja_url, vikunja_api_key)
+    """Register the create_task and refresh_metadata services."""
 
     async def create_task(call: ServiceCall):
         """Create a task in Vikunja."""
+        runtime = get_runtime_data(hass)
+        if runtime is None:
+            _LOGGER.error("Missing configuration for Vikunja voice assistant")
+            raise Exception("Vikunja voice assistant is not set up")
         task_data = call.data.copy()
 
-        result = await hass.async_add_executor_job(
-            lambda: vikunja_api.add_task(task_data)
-        )
+        result = await runtime.api.add_task(task_data)
 
         if result:
             _LOGGER.info(
@@ -54,3 +51,15 @@ def setup_services(hass: HomeAssistant):
     hass.services.async_register(
         DOMAIN, "create_task", create_task, schema=CREATE_TASK_SCHEMA
     )
+
+    async def refresh_metadata(call: ServiceCall):
+        """Drop cached projects/labels and fetch them again now."""
+        runtime = get_runtime_data(hass)
+        if runtime is None or runtime.metadata is None:
+            _LOGGER.error("Missing configuration for Vikunja voice assistant")
+            raise Exception("Vikunja voice assistant is not set up")
+        await runtime.metadata.async_refresh(call.data.get("kind"))
+
+    hass.services.async_register(
+        DOMAIN, "refresh_metadata", refresh_metadata, schema=REFRESH_METADATA_SCHEMA
+    )
@@ -0,0 +1,221 @@
+"""Versioned on-disk snapshot of Vikunja metadata for warm starts.
+
+After a restart the metadata cache is empty, so the first voice command
+would wait for cold fetches of projects and labels. The snapshot keeps
+the last known projects, labels, users and voice label id in one compact
+file under the HA config dir; `async_setup_entry` loads it to seed the
+caches, which then revalidate in the background.
+
+Records are stored as positional rows (`[id, title]`) rather than objects
+to keep the file small. Writes are coalesced: any number of changes within
+SNAPSHOT_SAVE_DELAY_SECONDS produce a single atomic write.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .const import SNAPSHOT_FILENAME, SNAPSHOT_SAVE_DELAY_SECONDS
+from .helpers.files import write_json_atomic
+from .helpers.records import LabelRecord, ProjectRecord, is_metadata_item
+from .metadata_cache import KIND_LABELS, KIND_PROJECTS
+
+_LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+@dataclass
+class MetadataSnapshot:
+    """Decoded snapshot contents."""
+
+    projects: List[ProjectRecord] = field(default_factory=list)
+    labels: List[LabelRecord] = field(default_factory=list)
+    users: List[Dict[str, Any]] = field(default_factory=list)
+    users_refreshed: Optional[str] = None
+    voice_label_id: Optional[int] = None
+    saved_at: Optional[str] = None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": self.saved_at,
+            "projects": [[p.id, p.title] for p in self.projects],
+            "labels": [[lbl.id, lbl.title] for lbl in self.labels],
+            "users": [
+                [u.get("id"), u.get("username") or "", u.get("name") or ""]
+                for u in self.users
+            ],
+            "users_refreshed": self.users_refreshed,
+            "voice_label_id": self.voice_label_id,
+        }
+
+    @classmethod
+    def from_json(cls, raw: Any) -> Optional["MetadataSnapshot"]:
+        """Decode a snapshot; None when missing fields or of another version."""
+        if not isinstance(raw, dict) or raw.get("version") != SNAPSHOT_VERSION:
+            return None
+        try:
+            return cls(
+                projects=[ProjectRecord(int(i), str(t)) for i, t in raw["projects"]],
+                labels=[LabelRecord(int(i), str(t)) for i, t in raw["labels"]],
+                users=[
+                    {"id": int(i), "username": username, "name": name}
+                    for i, username, name in raw.get("users", [])
+                ],
+                users_refreshed=raw.get("users_refreshed"),
+                voice_label_id=raw.get("voice_label_id"),
+                saved_at=raw.get("saved_at"),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+def _find_voice_label_id(labels: List[Any]) -> Optional[int]:
+    for label in labels:
+        if is_metadata_item(label) and str(label.get("title", "")).lower() == "voice":
+            return label.get("id")
+    return None
+
+
+class MetadataSnapshotStore:
+    """Load and save the snapshot for one config entry."""
+
+    def __init__(
+        self,
+        hass,
+        metadata_cache,
+        user_cache,
+        path: Optional[str] = None,
+        delay: float = SNAPSHOT_SAVE_DELAY_SECONDS,
+        voice_label=None,
+    ) -> None:
+        self.hass = hass
+        self.metadata_cache = metadata_cache
+        self.user_cache = user_cache
+        self.voice_label = voice_label
+        self.path = path or os.path.join(hass.config.config_dir, SNAPSHOT_FILENAME)
+        self.delay = delay
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._save_lock = asyncio.Lock()
+        self._last_written: Optional[Dict[str, Any]] = None
+        self.saves = 0
+        self.coalesced = 0
+
+    # --------------- Loading ---------------
+    def _load_sync(self) -> Optional[MetadataSnapshot]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.error("Failed loading metadata snapshot: %s", err)
+            return None
+        snapshot = MetadataSnapshot.from_json(raw)
+        if snapshot is None:
+            _LOGGER.info("Ignoring outdated or malformed metadata snapshot")
+        return snapshot
+
+    async def async_load(self) -> Optional[MetadataSnapshot]:
+        """Read the snapshot and seed the metadata and user caches from it."""
+        snapshot = await self.hass.async_add_executor_job(self._load_sync)
+        if snapshot is None:
+            return None
+        self.metadata_cache.seed(KIND_PROJECTS, snapshot.projects)
+        self.metadata_cache.seed(KIND_LABELS, snapshot.labels)
+        if not self.user_cache.data.users and snapshot.users:
+            self.user_cache.data.users = snapshot.users
+            self.user_cache.data.last_refresh = snapshot.users_refreshed
+        if self.voice_label is not None:
+            self.voice_label.seed(snapshot.voice_label_id)
+        self._last_written = snapshot.to_json()
+        _LOGGER.debug(
+            "Loaded metadata snapshot from %s (%s projects, %s labels, %s users)",
+            snapshot.saved_at,
+            len(snapshot.projects),
+            len(snapshot.labels),
+            len(snapshot.users),
+        )
+        return snapshot
+
+    # --------------- Saving ---------------
+    def _current(self) -> MetadataSnapshot:
+        labels = self.metadata_cache.peek(KIND_LABELS) or []
+        voice_label_id = None
+        if self.voice_label is not None:
+            voice_label_id = self.voice_label.label_id
+        if voice_label_id is None:
+            voice_label_id = _find_voice_label_id(labels)
+        return MetadataSnapshot(
+            projects=[
+                p
+                for p in self.metadata_cache.peek(KIND_PROJECTS) or []
+                if isinstance(p, ProjectRecord)
+            ],
+            labels=[lbl for lbl in labels if isinstance(lbl, LabelRecord)],
+            users=list(self.user_cache.data.users),
+            users_refreshed=self.user_cache.data.last_refresh,
+            voice_label_id=voice_label_id,
+        )
+
+    def schedule_save(self) -> None:
+        """Request a save; requests within the delay window share one write."""
+        if self._timer is not None:
+            self.coalesced += 1
+            return
+        self._timer = asyncio.get_running_loop().call_later(
+            self.delay, self._start_save
+        )
+
+    def _start_save(self) -> None:
+        self._timer = None
+        self.hass.async_create_background_task(
+            self.async_save(), "vikunja_metadata_snapshot_save"
+        )
+
+    async def async_save(self) -> None:
+        """Write the current state now if it differs from the last write."""
+        payload = self._current().to_json()
+        if self._last_written is not None and all(
+            payload[key] == self._last_written.get(key)
+            for key in payload
+            if key != "saved_at"
+        ):
+            return
+        payload["saved_at"] = (
+            datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        )
+        async with self._save_lock:
+            try:
+                await self.hass.async_add_executor_job(
+                    write_json_atomic, self.path, payload
+                )
+            except Exception as err:  # noqa: BLE001
+                _LOGGER.error("Failed saving metadata snapshot: %s", err)
+                return
+        self._last_written = payload
+        self.saves += 1
+
+    async def async_flush(self) -> None:
+        """Write a pending save right away (on unload)."""
+        if self._timer is None:
+            return
+        self._timer.cancel()
+        self._timer = None
+        await self.async_save()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": (self._last_written or {}).get("saved_at"),
+            "saves": self.saves,
+            "coalesced_requests": self.coalesced,
+            "pending": self._timer is not None,
+        }
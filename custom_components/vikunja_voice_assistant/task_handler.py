@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence
 
 from .const import (
     DOMAIN,
@@ -14,10 +14,25 @@ from .const import (
     CONF_AUTO_VOICE_LABEL,
     CONF_ENABLE_USER_ASSIGN,
     CONF_DETAILED_RESPONSE,
+    CONF_COMMAND_TIMEOUT,
+    DEFAULT_COMMAND_TIMEOUT,
+    CONF_PROMPT_BUDGET,
+    DEFAULT_PROMPT_BUDGET,
+    FUZZY_ASSIGNEE_CONFIDENCE,
+    FUZZY_ASSIGNEE_MARGIN,
+    CONF_PROMPT_ENCODING,
+    DEFAULT_PROMPT_ENCODING,
+    CONF_COMPACT_OUTPUT,
+    CONF_FAST_PATH,
+    CREATE_MIN_BUDGET_SECONDS,
+    ENRICHMENT_MIN_BUDGET_SECONDS,
 )
-from .api.vikunja_api import VikunjaAPI
+from .runtime import get_runtime_data
 from .api.homeassistant_llm_api import HomeAssistantLLMAPI
+from .helpers.deadline import Deadline, DeadlineExceeded
 from .helpers.detailed_response_formatter import build_detailed_response
+from .helpers.metadata_index import EMPTY_INDEX, MetadataIndex
+from .helpers.prompt_budget import KIND_LABEL, KIND_PROJECT, KIND_USER
 from .helpers.localization import (
     get_language,
     L,
@@ -46,43 +61,114 @@ async def process_task(
     detailed_response = domain_config.get(CONF_DETAILED_RESPONSE, True)
     # Granular include flags removed; when detailed_response is true we include all available metadata.
     lang = get_language(hass)
-    if not all([vikunja_url, vikunja_api_key, ai_task_entity]):
+    runtime = get_runtime_data(hass)
+    if not all([vikunja_url, vikunja_api_key, ai_task_entity]) or runtime is None:
         _LOGGER.error("Missing configuration for Vikunja voice assistant")
         return False, L("config_error", lang), ""
 
-    vikunja_api = VikunjaAPI(vikunja_url, vikunja_api_key)
-    projects, labels = await asyncio.gather(
-        hass.async_add_executor_job(vikunja_api.get_projects),
-        hass.async_add_executor_job(vikunja_api.get_labels),
+    # Fail fast on the cached backend health instead of waiting for timeouts.
+    # With the outbox, tasks are still accepted and written once Vikunja is back.
+    outbox = runtime.outbox
+    if runtime.vikunja_breaker.is_open and outbox is None:
+        _LOGGER.warning("Vikunja circuit open; rejecting voice command")
+        return False, L("vikunja_add_error", lang), ""
+    # Simple or repeated commands may not need the LLM; with the fast path or
+    # the parse cache on, the AI Task circuit is only checked once they miss.
+    fast_path = runtime.fast_path if domain_config.get(CONF_FAST_PATH, False) else None
+    parse_cache = runtime.parse_cache
+    if runtime.llm_breaker.is_open and fast_path is None and parse_cache is None:
+        _LOGGER.warning("AI Task circuit open; rejecting voice command")
+        return False, L("llm_conn_error", lang), ""
+
+    deadline = Deadline(
+        domain_config.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT)
     )
+    vikunja_api = runtime.api
+    try:
+        index = await deadline.run(
+            _get_metadata_index(runtime.metadata, vikunja_api), "metadata"
+        )
+    except DeadlineExceeded as err:
+        _LOGGER.error("Fetching Vikunja metadata timed out: %s", err)
+        if outbox is None:
+            return False, L("vikunja_add_error", lang), ""
+        index = EMPTY_INDEX
 
     voice_label_id = None
-    if auto_voice_label:
-        try:
-            for lbl in labels or []:
-                if isinstance(lbl, dict) and lbl.get("title", "").lower() == "voice":
-                    voice_label_id = lbl.get("id")
-                    break
-            if voice_label_id is None:
-                voice_label = await hass.async_add_executor_job(
-                    vikunja_api.create_label, "voice"
-                )
-                if voice_label:
-                    voice_label_id = voice_label.get("id")
-        except Exception as label_err:  # noqa: BLE001
-            _LOGGER.error("Could not ensure 'voice' label exists: %s", label_err)
+    voice_label = runtime.voice_label
+    if auto_voice_label and voice_label is not None:
+        # Memoized per entry; only the very first command (or one after a
+        # failed attach) waits for the lookup.
+        voice_label_id = voice_label.label_id
+        if voice_label_id is None:
+            # May create the label: not cancelled when out of time, the
+            # command goes on without it and the next one reuses the id
+            resolving = hass.async_create_background_task(
+                voice_label.resolve(), "vikunja_resolve_voice_label"
+            )
+            try:
+                voice_label_id = await deadline.run_optional(resolving, "voice_label")
+            except Exception as label_err:  # noqa: BLE001
+                _LOGGER.error("Could not ensure 'voice' label exists: %s", label_err)
 
-    llm_client = HomeAssistantLLMAPI(hass, ai_task_entity)
     users_for_prompt = user_cache_users if enable_user_assignment else []
-    llm_response = await llm_client.create_task_from_description(
-        task_description,
-        projects,
-        labels,
-        default_due_date,
-        voice_correction,
-        users=users_for_prompt,
-        enable_user_assignment=enable_user_assignment,
-    )
+    resolver = runtime.resolver
+    if resolver is not None:
+        resolver.sync(index, users_for_prompt)
+    local_task = None
+    cache_key = None
+    if fast_path is not None:
+        local_task = fast_path.parse(
+            task_description, lang, index, default_due_date, users_for_prompt
+        )
+    if local_task is None and parse_cache is not None:
+        cache_key = parse_cache.key(
+            task_description,
+            lang,
+            index.version,
+            default_due_date,
+            voice_correction,
+            enable_user_assignment,
+        )
+        local_task = parse_cache.get(cache_key, default_due_date)
+    if local_task is not None:
+        llm_response = {"task_data": local_task}
+    elif runtime.llm_breaker.is_open:
+        _LOGGER.warning("AI Task circuit open; rejecting voice command")
+        return False, L("llm_conn_error", lang), ""
+    else:
+        llm_client = HomeAssistantLLMAPI(
+            hass,
+            ai_task_entity,
+            runtime.llm_breaker,
+            capabilities=runtime.llm_capabilities,
+        )
+        llm_response = await llm_client.create_task_from_description(
+            task_description,
+            index.projects,
+            index.labels,
+            default_due_date,
+            voice_correction,
+            users=users_for_prompt,
+            enable_user_assignment=enable_user_assignment,
+            timeout=deadline.remaining(),
+            index=index,
+            prompt_budget=domain_config.get(CONF_PROMPT_BUDGET, DEFAULT_PROMPT_BUDGET),
+            usage=runtime.usage,
+            resolver=resolver,
+            prompt_encoding=domain_config.get(
+                CONF_PROMPT_ENCODING, DEFAULT_PROMPT_ENCODING
+            ),
+            compact_output=domain_config.get(CONF_COMPACT_OUTPUT, False),
+        )
+        if cache_key is not None and llm_response:
+            parse_cache.put(
+                cache_key,
+                task_description,
+                lang,
+                llm_response.get("task_data"),
+                default_due_date,
+            )
     if not llm_response:
         _LOGGER.error("Failed to process task with Home Assistant LLM")
         return False, L("llm_conn_error", lang), ""
@@ -103,71 +189,129 @@ async def process_task(
 
         extracted_label_ids = []
         if isinstance(task_data, dict) and task_data.get("label_ids"):
-            existing_label_ids = {
-                label_obj.get("id")
-                for label_obj in (labels or [])
-                if isinstance(label_obj, dict)
-            }
             for lid in task_data.get("label_ids", []):
-                if lid in existing_label_ids:
+                if lid in index.labels_by_id:
                     extracted_label_ids.append(lid)
             task_data.pop("label_ids", None)
 
         assignee_username_or_name = task_data.pop("assignee", None)
-        result = await hass.async_add_executor_job(
-            lambda: vikunja_api.add_task(task_data)
-        )
-        if result:
+
+        # Resolve relations up front so they can ride along in the create call
+        label_ids_to_attach = list(dict.fromkeys(extracted_label_ids))
+        if (
+            auto_voice_label
+            and voice_label_id
+            and voice_label_id not in label_ids_to_attach
+        ):
+            label_ids_to_attach.append(voice_label_id)
+        assignee_ids: List[int] = []
+        if enable_user_assignment and assignee_username_or_name:
+            assignee_id = _find_user_id(user_cache_users, assignee_username_or_name)
+            if assignee_id is None and resolver is not None:
+                # e.g. a misheard name the LLM passed through verbatim
+                match = resolver.best(
+                    KIND_USER,
+                    assignee_username_or_name,
+                    FUZZY_ASSIGNEE_CONFIDENCE,
+                    margin=FUZZY_ASSIGNEE_MARGIN,
+                    symmetric=True,
+                )
+                if match is not None:
+                    _LOGGER.debug(
+                        "Assignee '%s' resolved to '%s' (%.2f)",
+                        assignee_username_or_name,
+                        match.name,
+                        match.confidence,
+                    )
+                    assignee_id = match.id
+            if assignee_id is None:
+                _LOGGER.warning(
+                    "Assignee '%s' not found in cached users",
+                    assignee_username_or_name,
+                )
+            else:
+                assignee_ids.append(assignee_id)
+
+        result = None
+        queued = False
+        pending_labels, pending_assignees = [], []
+        if outbox is not None:
+            # Acknowledge once persisted; the outbox worker writes to Vikunja
+            try:
+                result = await outbox.enqueue(
+                    task_data, label_ids_to_attach, assignee_ids
+                )
+                queued = True
+            except Exception as err:  # noqa: BLE001
+                _LOGGER.error("Could not queue task, creating it directly: %s", err)
+        if not queued:
+            # Creating is not idempotent: never cancel it half way, or a
+            # retry could add the task twice
+            create = hass.async_create_background_task(
+                vikunja_api.add_task_with_relations(
+                    task_data, label_ids_to_attach, assignee_ids
+                ),
+                "vikunja_create_task",
+            )
             try:
-                task_id = result.get("id") if isinstance(result, dict) else None
-                if task_id:
-                    label_ids_to_attach = list(dict.fromkeys(extracted_label_ids))
-                    if (
-                        auto_voice_label
-                        and voice_label_id
-                        and voice_label_id not in label_ids_to_attach
-                    ):
-                        label_ids_to_attach.append(voice_label_id)
-                    for lid in label_ids_to_attach:
-                        attach_success = await hass.async_add_executor_job(
-                            vikunja_api.add_label_to_task, task_id, lid
-                        )
-                        if not attach_success:
-                            _LOGGER.error(
-                                "Failed to attach label %s to task %s", lid, task_id
-                            )
-                    if enable_user_assignment and assignee_username_or_name:
-                        # Late import to avoid circulars
-                        lookup = assignee_username_or_name.strip().lower()
-                        # user_cache_users already prepared list
-                        uid = None
-                        for u in user_cache_users:
-                            uname = str(u.get("username", "")).lower()
-                            name = str(u.get("name", "")).lower()
-                            if lookup == uname or lookup == name:
-                                uid = u.get("id")
-                                break
-                        if uid is not None:
-                            assign_ok = await hass.async_add_executor_job(
-                                vikunja_api.assign_user_to_task, task_id, uid
-                            )
-                            if not assign_ok:
-                                _LOGGER.error(
-                                    "Failed to assign user %s to task %s",
-                                    lookup,
-                                    task_id,
-                                )
-                        else:
-                            _LOGGER.warning(
-                                "Assignee '%s' not found in cached users",
-                                assignee_username_or_name,
-                            )
-            except Exception as attach_err:  # noqa: BLE001
-                _LOGGER.error("Error attaching labels/assignee to task: %s", attach_err)
+                result, pending_labels, pending_assignees = await deadline.run_shielded(
+                    create, "create", min_budget=CREATE_MIN_BUDGET_SECONDS
+                )
+            except DeadlineExceeded as err:
+                _LOGGER.warning("Vikunja task still being created: %s", err)
+                hass.async_create_background_task(
+                    _enrich_after_create(
+                        create,
+                        vikunja_api,
+                        label_ids_to_attach,
+                        assignee_ids,
+                        voice_label,
+                    ),
+                    "vikunja_enrich_created_task",
+                )
+                return (
+                    True,
+                    L("task_still_creating", lang, title=task_data.get("title")),
+                    task_data.get("title"),
+                )
+        if result:
+            task_id = result.get("id") if isinstance(result, dict) else None
+            if task_id and (pending_labels or pending_assignees):
+                # Fallback for servers ignoring embedded relations. Optional
+                # stage: reply without waiting if the budget is low,
+                # enrichment then completes in the background.
+                enrichment = hass.async_create_background_task(
+                    _enrich_task(
+                        vikunja_api,
+                        task_id,
+                        pending_labels,
+                        pending_assignees,
+                        voice_label,
+                        attached_labels=[
+                            lid
+                            for lid in label_ids_to_attach
+                            if lid not in pending_labels
+                        ],
+                        attached_users=[
+                            uid for uid in assignee_ids if uid not in pending_assignees
+                        ],
+                    ),
+                    f"vikunja_enrich_task_{task_id}",
+                )
+                await deadline.run_optional(
+                    enrichment,
+                    "enrichment",
+                    min_budget=ENRICHMENT_MIN_BUDGET_SECONDS,
+                )
+        _LOGGER.debug("Voice command stage durations: %s", deadline.stage_durations)
 
         if result:
             task_title = task_data.get("title")
             _LOGGER.info("Created Vikunja task '%s'", task_title)
+            if runtime.usage is not None:
+                runtime.usage.record(KIND_PROJECT, [task_data.get("project_id")])
+                runtime.usage.record(KIND_LABEL, extracted_label_ids)
+                runtime.usage.record(KIND_USER, assignee_ids)
             # Build response message
             # detailed_response flag determines whether to include metadata in response
             if not detailed_response:
@@ -179,12 +323,13 @@ async def process_task(
                 detailed_message = build_detailed_response(
                     task_title=safe_task_title,
                     task_data=task_data,
-                    projects=projects,
-                    labels=labels,
+                    projects=index.projects,
+                    labels=index.labels,
                     extracted_label_ids=extracted_label_ids,
                     assignee_username_or_name=assignee_username_or_name,
                     enable_user_assignment=enable_user_assignment,
                     lang=lang,
+                    index=index,
                 )
             except Exception as format_err:  # noqa: BLE001
                 _LOGGER.error("Error building detailed response: %s", format_err)
@@ -199,3 +344,88 @@ async def process_task(
     except Exception as err:  # noqa: BLE001
         _LOGGER.error("Unexpected error creating task: %s", err)
         return False, L("unexpected_error", lang), ""
+
+
+async def _get_metadata_index(metadata_cache, vikunja_api) -> MetadataIndex:
+    """Shared index from the metadata cache, or one built from direct reads."""
+    if metadata_cache is not None:
+        return await metadata_cache.get_index()
+    projects, labels = await asyncio.gather(
+        vikunja_api.get_projects(), vikunja_api.get_labels()
+    )
+    return MetadataIndex.build(projects, labels)
+
+
+def _find_user_id(users: List[Dict[str, Any]], assignee: str) -> Optional[int]:
+    """Exact (case-insensitive) username or name match in the cached users."""
+    lookup = assignee.strip().lower()
+    for u in users:
+        uname = str(u.get("username", "")).lower()
+        name = str(u.get("name", "")).lower()
+        if lookup == uname or lookup == name:
+            return u.get("id")
+    return None
+
+
+async def _enrich_after_create(
+    create: "asyncio.Future",
+    vikunja_api,
+    label_ids: List[int],
+    assignee_ids: List[int],
+    voice_label=None,
+) -> None:
+    """Finish a create that outlived the command's deadline."""
+    try:
+        result, pending_labels, pending_assignees = await create
+    except Exception as err:  # noqa: BLE001
+        _LOGGER.error("Creating Vikunja task failed: %s", err)
+        return
+    task_id = result.get("id") if isinstance(result, dict) else None
+    if task_id is None:
+        _LOGGER.error("Failed to create task in Vikunja")
+        return
+    _LOGGER.info("Created Vikunja task '%s' after the reply", result.get("title"))
+    if pending_labels or pending_assignees:
+        await _enrich_task(
+            vikunja_api,
+            task_id,
+            pending_labels,
+            pending_assignees,
+            voice_label,
+            attached_labels=[lid for lid in label_ids if lid not in pending_labels],
+            attached_users=[
+                uid for uid in assignee_ids if uid not in pending_assignees
+            ],
+        )
+
+
+async def _enrich_task(
+    vikunja_api,
+    task_id: int,
+    label_ids: List[int],
+    assignee_ids: List[int],
+    voice_label=None,
+    attached_labels: Sequence[int] = (),
+    attached_users: Sequence[int] = (),
+) -> None:
+    """Attach labels and assignees to a freshly created task.
+
+    `attached_labels`/`attached_users` are already on the task and are kept.
+    """
+    try:
+        result = await vikunja_api.enrich_task(
+            task_id,
+            label_ids,
+            assignee_ids,
+            attached_labels=attached_labels,
+            attached_users=attached_users,
+        )
+    except Exception as attach_err:  # noqa: BLE001
+        _LOGGER.error("Error attaching labels/assignee to task: %s", attach_err)
+        return
+    for lid in result.failed_labels:
+        _LOGGER.error("Failed to attach label %s to task %s", lid, task_id)
+        if voice_label is not None:
+            voice_label.attach_failed(lid)
+    for uid in result.failed_users:
+        _LOGGER.error("Failed to assign user %s to task %s", uid, task_id)
@@ -1,58 +1,64 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from .const import (
     USER_CACHE_FILENAME,
     USER_CACHE_REFRESH_HOURS,
     CONF_ENABLE_USER_ASSIGN,
-    CONF_VIKUNJA_URL,
-    CONF_VIKUNJA_API_KEY,
     DOMAIN,
 )
 from .api.vikunja_api import VikunjaAPI
+from .helpers.records import is_metadata_item
+from .helpers.scheduler import PRIORITY_BACKGROUND, request_priority
+from .helpers.single_flight import SingleFlight
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def _collect_project_users(api: VikunjaAPI) -> Dict[str, Dict[str, Any]]:
+async def _collect_project_users(api: VikunjaAPI) -> Dict[str, Dict[str, Any]]:
     """Gather unique users across all accessible projects."""
     combined: Dict[str, Dict[str, Any]] = {}
+    project_ids: List[int] = []
     try:
-        projects = api.get_projects() or []
+        # Stream projects page by page; only their ids are needed here.
+        async for project in api.iter_projects():
+            project_id = project.get("id") if is_metadata_item(project) else None
+            try:
+                project_id_int = int(project_id)
+            except (TypeError, ValueError):
+                _LOGGER.debug("Skipping project with invalid id: %s", project_id)
+                continue
+
+            if project_id_int == -1:
+                _LOGGER.debug("Skipping favorites pseudo-project (%s)", project_id_int)
+                continue
+            project_ids.append(project_id_int)
     except Exception as err:  # noqa: BLE001
         _LOGGER.error("Failed to retrieve projects for user cache: %s", err)
         return combined
 
-    for project in projects:
-        project_id = project.get("id")
-        try:
-            project_id_int = int(project_id)
-        except (TypeError, ValueError):
-            _LOGGER.debug("Skipping project with invalid id: %s", project_id)
-            continue
-
-        if project_id_int == -1:
-            _LOGGER.debug("Skipping favorites pseudo-project (%s)", project_id_int)
-            continue
-
-        try:
-            users = api.get_project_users(project_id_int) or []
-        except Exception as err:  # noqa: BLE001
+    results = await asyncio.gather(
+        *(api.get_project_users(pid) for pid in project_ids),
+        return_exceptions=True,
+    )
+    for project_id_int, users in zip(project_ids, results):
+        if isinstance(users, BaseException):
             _LOGGER.error(
                 "Failed to retrieve project users for project %s: %s",
                 project_id_int,
-                err,
+                users,
             )
             continue
 
-        for u in users:
-            if not isinstance(u, dict):
+        for u in users or []:
+            if not is_metadata_item(u):
                 continue
             user_id = u.get("id")
             if user_id is None:
@@ -67,26 +73,31 @@ def _collect_project_users(api: VikunjaAPI) -> Dict[str, Dict[str, Any]]:
     return combined
 
 
-
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
-def build_initial_user_cache_sync(
-    hass_config_dir: str, vikunja_url: str, api_key: str
-) -> None:
-    """Initial synchronous (executor) build for config flow usage.
+def _write_cache_file(path: str, cache: "UserCache") -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"users": cache.users, "last_refresh": cache.last_refresh},
+            f,
+            indent=2,
+        )
+
+
+async def async_build_initial_user_cache(hass, vikunja_url: str, api_key: str) -> None:
+    """Initial build for config flow usage.
 
     Fetches project users once and writes the cache file. Errors are swallowed
     (reported via logging) so that the config flow can proceed.
     """
     try:
-        api = VikunjaAPI(vikunja_url, api_key)
-        combined = _collect_project_users(api)
-        path = os.path.join(hass_config_dir, USER_CACHE_FILENAME)
-        data = {"users": list(combined.values()), "last_refresh": _utc_now_iso()}
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        api = VikunjaAPI(hass, vikunja_url, api_key)
+        combined = await _collect_project_users(api)
+        path = os.path.join(hass.config.config_dir, USER_CACHE_FILENAME)
+        cache = UserCache(users=list(combined.values()), last_refresh=_utc_now_iso())
+        await hass.async_add_executor_job(_write_cache_file, path, cache)
     except Exception as err:  # noqa: BLE001
         _LOGGER.debug("Initial user cache build failed (non-fatal): %s", err)
 
@@ -110,12 +121,22 @@ class UserCache:
 class VikunjaUserCacheManager:
     """Manages persistent user cache lifecycle."""
 
-    def __init__(self, hass):
+    def __init__(self, hass, api: VikunjaAPI):
         from homeassistant.core import HomeAssistant  # local import for typing
 
         self.hass: "HomeAssistant" = hass
+        self.api = api
         self.cache_path = os.path.join(hass.config.config_dir, USER_CACHE_FILENAME)
         self.data = UserCache()
+        # A manual refresh overlapping the scheduled one joins it
+        self.refresh_flight = SingleFlight()
+        self._listeners: List[Callable[[], None]] = []
+        self.refresh_hours = USER_CACHE_REFRESH_HOURS
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call `listener` after every refresh; returns an unsubscribe."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
 
     # --------------- Persistence helpers ---------------
     def _load_sync(self) -> UserCache:
@@ -131,71 +152,77 @@ class VikunjaUserCacheManager:
                 _LOGGER.error("Failed loading user cache: %s", err)
         return UserCache()
 
-    def _save_sync(self) -> None:
+    def _save_sync(self, cache: Optional[UserCache] = None) -> None:
         try:
-            with open(self.cache_path, "w", encoding="utf-8") as f:
-                json.dump(
-                    {"users": self.data.users, "last_refresh": self.data.last_refresh},
-                    f,
-                    indent=2,
-                )
+            _write_cache_file(self.cache_path, cache or self.data)
         except Exception as err:  # noqa: BLE001
             _LOGGER.error("Failed saving user cache: %s", err)
 
+    async def apply_user(self, user: Dict[str, Any]) -> bool:
+        """Add a user seen in a webhook event; True if it was new."""
+        user_id = user.get("id")
+        if user_id is None or any(u.get("id") == user_id for u in self.data.users):
+            return False
+        self.data.users = [
+            *self.data.users,
+            {
+                "id": user_id,
+                "name": user.get("name"),
+                "username": user.get("username"),
+            },
+        ]
+        await self.hass.async_add_executor_job(self._save_sync, self.data)
+        for listener in list(self._listeners):
+            listener()
+        return True
+
     async def load(self) -> None:
         self.data = await self.hass.async_add_executor_job(self._load_sync)
 
     # --------------- Refresh logic ---------------
-    def _refresh_sync(self, vikunja_url: str, api_key: str) -> UserCache:
-        api = VikunjaAPI(vikunja_url, api_key)
-        combined = _collect_project_users(api)
+    async def _async_refresh(self) -> UserCache:
+        # One request per project; yield to interactive voice commands.
+        with request_priority(PRIORITY_BACKGROUND):
+            combined = await _collect_project_users(self.api)
         new_cache = UserCache(
             users=list(combined.values()), last_refresh=_utc_now_iso()
         )
-        try:
-            with open(self.cache_path, "w", encoding="utf-8") as f:
-                json.dump(
-                    {"users": new_cache.users, "last_refresh": new_cache.last_refresh},
-                    f,
-                    indent=2,
-                )
-        except Exception as err:  # noqa: BLE001
-            _LOGGER.error("Failed writing user cache: %s", err)
+        await self.hass.async_add_executor_job(self._save_sync, new_cache)
         return new_cache
 
     async def refresh(self, force: bool = False) -> None:
         domain_config = self.hass.data.get(DOMAIN, {})
         if not domain_config.get(CONF_ENABLE_USER_ASSIGN):
             return
-        vikunja_url = domain_config.get(CONF_VIKUNJA_URL)
-        api_key = domain_config.get(CONF_VIKUNJA_API_KEY)
-        if not (vikunja_url and api_key):
-            return
         if (
             not force
             and self.data.age_hours is not None
-            and self.data.age_hours < USER_CACHE_REFRESH_HOURS
+            and self.data.age_hours < self.refresh_hours
         ):
             return
-        self.data = await self.hass.async_add_executor_job(
-            self._refresh_sync, vikunja_url, api_key
-        )
+        self.data = await self.refresh_flight.run("refresh", self._async_refresh)
         _LOGGER.info("Vikunja user cache refreshed: %s users", len(self.data.users))
+        for listener in list(self._listeners):
+            listener()
 
     # --------------- Scheduling ---------------
-    def schedule_periodic_refresh(self) -> None:
-        """Schedule periodic refresh task via HA helper."""
+    def schedule_periodic_refresh(self) -> Callable[[], None]:
+        """Schedule periodic refresh task via HA helper.
+
+        Returns a callback cancelling the schedule (no-op if scheduling failed).
+        """
         try:
             from homeassistant.helpers.event import async_track_time_interval
 
-            interval = timedelta(hours=USER_CACHE_REFRESH_HOURS)
+            interval = timedelta(hours=self.refresh_hours)
 
             async def _scheduled(_now):  # noqa: D401
                 await self.refresh()
 
-            async_track_time_interval(self.hass, _scheduled, interval)
+            return async_track_time_interval(self.hass, _scheduled, interval)
         except Exception as err:  # noqa: BLE001
             _LOGGER.error("Failed to schedule user cache refresh: %s", err)
+            return lambda: None
 
     # --------------- Lookup helper ---------------
     def find_user_id(self, lookup: str) -> Optional[int]:
@@ -0,0 +1,117 @@
+"""Per-entry resolution of the auto-attached "voice" label.
+
+The label id is looked up (or the label created) once, under a lock, so two
+concurrent first commands cannot both create a "voice" label. The id is
+then served from memory, persisted in the metadata snapshot, and only
+looked up again after attaching it to a task failed (e.g. because the label
+was deleted in Vikunja).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from .helpers.records import LabelRecord
+from .metadata_cache import KIND_LABELS
+
+_LOGGER = logging.getLogger(__name__)
+
+VOICE_LABEL_TITLE = "voice"
+
+
+class VoiceLabelResolver:
+    """Resolve, memoize and re-validate the "voice" label id."""
+
+    def __init__(self, api, metadata_cache) -> None:
+        self.api = api
+        self.metadata_cache = metadata_cache
+        self.label_id: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._revalidate = False
+        self._listeners: List[Callable[[], None]] = []
+        self.lookups = 0
+        self.created = 0
+        self.invalidations = 0
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call `listener` whenever the resolved id changes; returns an unsubscribe."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _set(self, label_id: Optional[int]) -> None:
+        if label_id == self.label_id:
+            return
+        self.label_id = label_id
+        for listener in list(self._listeners):
+            listener()
+
+    def seed(self, label_id: Optional[int]) -> None:
+        """Adopt a previously resolved id (from the snapshot) without a lookup."""
+        if self.label_id is None and label_id is not None:
+            self.label_id = label_id
+
+    async def resolve(self) -> Optional[int]:
+        """Return the label id, looking it up or creating the label on first use.
+
+        The label is only created when a freshly fetched label list lacks
+        it. Returns None if the label could not be found or created; the
+        next call tries again.
+        """
+        if self.label_id is not None:
+            return self.label_id
+        async with self._lock:
+            if self.label_id is not None:
+                return self.label_id  # resolved by a concurrent caller
+            self.lookups += 1
+            if self._revalidate:
+                # The cached labels still list the id that just failed
+                await self.metadata_cache.async_refresh(KIND_LABELS)
+                self._revalidate = False
+            index = await self.metadata_cache.get_index()
+            label_id = index.label_id(VOICE_LABEL_TITLE)
+            if label_id is None:
+                # Only a label list just fetched from Vikunja proves the label
+                # is missing; a failed, seeded or stale one would duplicate it
+                if not await self.metadata_cache.async_ensure_fresh(KIND_LABELS):
+                    _LOGGER.warning(
+                        "Labels could not be loaded; not creating the '%s' label",
+                        VOICE_LABEL_TITLE,
+                    )
+                    return None
+                index = await self.metadata_cache.get_index()
+                label_id = index.label_id(VOICE_LABEL_TITLE)
+            if label_id is None:
+                created = await self.api.create_label(VOICE_LABEL_TITLE)
+                record = LabelRecord.from_json(created)
+                if record is None:
+                    _LOGGER.error("Could not create the '%s' label", VOICE_LABEL_TITLE)
+                    return None
+                self.created += 1
+                _LOGGER.info("Created '%s' label %s", VOICE_LABEL_TITLE, record.id)
+                self.metadata_cache.apply_upsert(KIND_LABELS, record)
+                label_id = record.id
+            self._set(label_id)
+            return label_id
+
+    def attach_failed(self, label_id: Any) -> None:
+        """Forget the id after attaching it failed, so the next use looks again."""
+        if label_id is None or label_id != self.label_id:
+            return
+        self.invalidations += 1
+        self._revalidate = True
+        _LOGGER.warning(
+            "Attaching '%s' label %s failed; resolving it again",
+            VOICE_LABEL_TITLE,
+            label_id,
+        )
+        self._set(None)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "label_id": self.label_id,
+            "lookups": self.lookups,
+            "created": self.created,
+            "invalidations": self.invalidations,
+        }
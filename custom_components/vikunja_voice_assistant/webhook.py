@@ -0,0 +1,171 @@
+"""Receive Vikunja webhooks and apply them to the in-memory caches.
+
+Vikunja signs each webhook body with HMAC-SHA256 using the secret set on
+the webhook and sends the hex digest in `X-Vikunja-Signature`. With a
+secret configured in the options, the integration registers one HA webhook
+per config entry; verified project, label and user events update the
+metadata and user caches in place, so their polling intervals can be
+raised to a slow safety net.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from aiohttp import web
+
+from .const import CONF_WEBHOOK_ID, DOMAIN, WEBHOOK_SIGNATURE_HEADER
+from .helpers.records import LabelRecord, ProjectRecord
+from .metadata_cache import KIND_LABELS, KIND_PROJECTS
+
+_LOGGER = logging.getLogger(__name__)
+
+# event name -> (cache kind, payload key, record factory)
+_METADATA_UPSERTS = {
+    "project.created": (KIND_PROJECTS, "project", ProjectRecord.from_json),
+    "project.updated": (KIND_PROJECTS, "project", ProjectRecord.from_json),
+    "label.created": (KIND_LABELS, "label", LabelRecord.from_json),
+    "label.updated": (KIND_LABELS, "label", LabelRecord.from_json),
+}
+_METADATA_DELETES = {
+    "project.deleted": (KIND_PROJECTS, "project"),
+    "label.deleted": (KIND_LABELS, "label"),
+}
+# Payload keys holding users who (now) have access to a project
+_USER_KEYS = ("user", "assignee", "doer")
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check a Vikunja webhook signature (hex HMAC-SHA256 of the raw body)."""
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+@dataclass
+class WebhookStats:
+    received: int = 0
+    rejected: int = 0
+    applied: int = 0
+    ignored: int = 0
+    events: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "rejected": self.rejected,
+            "applied": self.applied,
+            "ignored": self.ignored,
+            "events": dict(self.events),
+        }
+
+
+class VikunjaWebhookProcessor:
+    """Verify webhook requests and apply their events to the caches."""
+
+    def __init__(self, secret: str, metadata_cache, user_cache) -> None:
+        self.secret = secret
+        self.metadata_cache = metadata_cache
+        self.user_cache = user_cache
+        self.stats = WebhookStats()
+
+    async def handle_request(self, request: web.Request) -> web.Response:
+        self.stats.received += 1
+        body = await request.read()
+        if not verify_signature(
+            self.secret, body, request.headers.get(WEBHOOK_SIGNATURE_HEADER)
+        ):
+            self.stats.rejected += 1
+            _LOGGER.warning("Rejected Vikunja webhook with invalid signature")
+            return web.Response(status=401)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.stats.rejected += 1
+            return web.Response(status=400)
+        if not isinstance(payload, dict):
+            self.stats.rejected += 1
+            return web.Response(status=400)
+        await self.apply_event(payload)
+        return web.Response(status=200)
+
+    async def apply_event(self, payload: Dict[str, Any]) -> bool:
+        """Apply one event; returns True if any cache changed."""
+        event = str(payload.get("event_name") or "")
+        data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+        self.stats.events[event] = self.stats.events.get(event, 0) + 1
+        changed = False
+
+        if event in _METADATA_UPSERTS:
+            kind, key, factory = _METADATA_UPSERTS[event]
+            record = factory(data.get(key))
+            if record is not None:
+                changed = self.metadata_cache.apply_upsert(kind, record)
+        elif event in _METADATA_DELETES:
+            kind, key = _METADATA_DELETES[event]
+            item = data.get(key)
+            if isinstance(item, dict) and item.get("id") is not None:
+                changed = self.metadata_cache.apply_delete(kind, item["id"])
+
+        # Labels on task events reveal labels created elsewhere
+        task = data.get("task")
+        if isinstance(task, dict):
+            for raw_label in task.get("labels") or []:
+                label = LabelRecord.from_json(raw_label)
+                if label is not None:
+                    changed |= self.metadata_cache.apply_upsert(KIND_LABELS, label)
+
+        for key in _USER_KEYS:
+            user = data.get(key)
+            if isinstance(user, dict) and user.get("id") is not None:
+                changed |= await self.user_cache.apply_user(user)
+
+        if changed:
+            self.stats.applied += 1
+            _LOGGER.debug("Applied Vikunja webhook event %s", event)
+        else:
+            self.stats.ignored += 1
+        return changed
+
+
+def ensure_webhook_id(hass, entry) -> str:
+    """Return the entry's webhook id, generating and storing it on first use."""
+    webhook_id = entry.data.get(CONF_WEBHOOK_ID)
+    if not webhook_id:
+        from homeassistant.components import webhook
+
+        webhook_id = webhook.async_generate_id()
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_WEBHOOK_ID: webhook_id}
+        )
+    return webhook_id
+
+
+def async_register_webhook(
+    hass, entry, processor: VikunjaWebhookProcessor, webhook_id: str
+) -> Callable[[], None]:
+    """Register the entry's HA webhook; returns a callback unregistering it."""
+    from homeassistant.components import webhook
+
+    async def _handle(_hass, _webhook_id: str, request: web.Request) -> web.Response:
+        return await processor.handle_request(request)
+
+    webhook.async_register(
+        hass,
+        DOMAIN,
+        f"{entry.title} (Vikunja)",
+        webhook_id,
+        _handle,
+        allowed_methods=["POST"],
+    )
+    _LOGGER.info(
+        "Vikunja webhook endpoint: %s",
+        webhook.async_generate_url(hass, webhook_id),
+    )
+    return lambda: webhook.async_unregister(hass, webhook_id)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Compare the full and the compact (short-key) LLM output contracts.
+
+Usage:
+  python scripts/benchmark_output_contract.py
+  python scripts/benchmark_output_contract.py --url http://homeassistant:8123 \\
+      --token TOKEN --entity ai_task.ollama [--runs 3]
+
+Without --url, the answers the prompt examples ask for are serialized in
+both contracts and their output tokens counted. With --url, every sample
+utterance is sent through `ai_task.generate_data` of a running Home
+Assistant with each contract's prompt; end-to-end latency, the tokens of
+the returned answer and how many answers parse to the expected fields
+(due dates and title wording aside) are reported.
+Tokens are counted as in measure_prompt_encoding.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import measure_prompt_encoding as measure  # noqa: E402
+
+PROJECTS = [{"id": 1, "title": "Inbox"}, {"id": 2, "title": "Work"}]
+LABELS = [{"id": 7, "title": "groceries"}, {"id": 8, "title": "health"}]
+
+# Utterance and the task a correct answer contains
+SAMPLES = [
+    (
+        "Reminder to pick up groceries tomorrow",
+        {
+            "title": "Pick up groceries",
+            "project_id": 1,
+            "due_date": "2026-06-09T12:00:00Z",
+        },
+    ),
+    (
+        "Urgent: finish the report in work by Friday at 5pm",
+        {
+            "title": "Finish the report",
+            "project_id": 2,
+            "due_date": "2026-06-12T17:00:00Z",
+            "priority": 5,
+        },
+    ),
+    (
+        "Take vitamins daily with the health label",
+        {
+            "title": "Take vitamins",
+            "project_id": 1,
+            "repeat_after": 86400,
+            "label_ids": [8],
+        },
+    ),
+    (
+        "Add buy milk with the groceries label for next week",
+        {
+            "title": "Buy milk",
+            "project_id": 1,
+            "label_ids": [7],
+            "due_date": "2026-06-15T12:00:00Z",
+        },
+    ),
+    (
+        "Water the plants every week",
+        {"title": "Water the plants", "project_id": 1, "repeat_after": 604800},
+    ),
+]
+
+
+def _compact_answer(task, schema):
+    """What a model following the compact contract writes for `task`."""
+    long_keys = {name: key for key, name in schema.SHORT_KEYS.items()}
+    units = {seconds: unit for unit, seconds in schema.REPEAT_UNITS.items()}
+    answer = {}
+    for name, value in task.items():
+        if name == "due_date":
+            value = value[:16]
+        elif name == "repeat_after":
+            value = units.get(value, value)
+        answer[long_keys.get(name, name)] = value
+    return json.dumps(answer, separators=(",", ":"))
+
+
+def _offline(schema, count_tokens) -> None:
+    print(f"{'utterance':<52} {'full tok':>8} {'compact tok':>11}")
+    totals = [0, 0]
+    for utterance, task in SAMPLES:
+        full = json.dumps(task)
+        compact = _compact_answer(task, schema)
+        assert schema.expand_short_keys(json.loads(compact)) == task
+        tokens = [count_tokens(full), count_tokens(compact)]
+        totals = [a + b for a, b in zip(totals, tokens)]
+        print(f"{utterance[:52]:<52} {tokens[0]:>8} {tokens[1]:>11}")
+    print(
+        f"{'total':<52} {totals[0]:>8} {totals[1]:>11}  ({totals[1] / totals[0]:.0%})"
+    )
+
+
+def _generate(args, instructions):
+    request = urllib.request.Request(
+        f"{args.url.rstrip('/')}/api/services/ai_task/generate_data?return_response",
+        data=json.dumps(
+            {
+                "entity_id": args.entity,
+                "task_name": "Output contract benchmark",
+                "instructions": instructions,
+            }
+        ).encode(),
+        headers={
+            "Authorization": f"Bearer {args.token}",
+            "Content-Type": "application/json",
+        },
+        method="POST",
+    )
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=args.timeout) as response:
+        body = json.loads(response.read())
+    elapsed = time.perf_counter() - started
+    data = body.get("service_response", {}).get("data")
+    return elapsed, data if isinstance(data, str) else json.dumps(data)
+
+
+def _live(args, prompt_builder, schema, count_tokens) -> None:
+    print(f"{'contract':<9} {'median s':>9} {'p90 s':>7} {'out tok':>8} {'correct':>7}")
+    for compact in (False, True):
+        latencies, tokens, correct = [], [], 0
+        for utterance, expected in SAMPLES:
+            messages = prompt_builder.build_task_creation_messages(
+                utterance, PROJECTS, LABELS, compact_output=compact
+            )
+            instructions = "\n\n".join(m["content"] for m in messages)
+            for _ in range(args.runs):
+                elapsed, answer = _generate(args, instructions)
+                latencies.append(elapsed)
+                tokens.append(count_tokens(answer))
+                start, end = answer.find("{"), answer.rfind("}") + 1
+                try:
+                    task = schema.expand_short_keys(json.loads(answer[start:end]))
+                except ValueError:
+                    continue
+                correct += bool(task.get("title")) and all(
+                    task.get(key) == value
+                    for key, value in expected.items()
+                    if key not in ("title", "due_date")
+                )
+        latencies.sort()
+        print(
+            f"{'compact' if compact else 'full':<9} "
+            f"{statistics.median(latencies):>9.2f} "
+            f"{latencies[int(0.9 * (len(latencies) - 1))]:>7.2f} "
+            f"{statistics.mean(tokens):>8.1f} "
+            f"{correct:>3}/{len(latencies):<3}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Home Assistant base URL (live mode)")
+    parser.add_argument("--token", help="long-lived access token")
+    parser.add_argument("--entity", help="AI Task entity id")
+    parser.add_argument("--runs", type=int, default=3, help="calls per utterance")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    _encodings, prompt_builder, _snapshot = measure._load_helpers()
+    from custom_components.vikunja_voice_assistant.helpers import task_schema
+
+    method, count_tokens = measure._token_counter()
+    print(f"tokens: {method}")
+    if not args.url:
+        _offline(task_schema, count_tokens)
+        return 0
+    if not (args.token and args.entity):
+        parser.error("--url needs --token and --entity")
+    _live(args, prompt_builder, task_schema, count_tokens)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Compare prompt size for the JSON and table metadata encodings.
+
+Usage: python scripts/measure_prompt_encoding.py [SNAPSHOT] [--utterance TEXT]
+
+SNAPSHOT is a metadata snapshot written by the integration
+(`<config>/vikunja_metadata.json`); without one, a synthetic tenant with
+--projects/--labels/--users entries is measured. Tokens are counted with
+tiktoken when it is installed, otherwise estimated as bytes / 4.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE_DIR = ROOT / "custom_components" / "vikunja_voice_assistant"
+
+
+def _load_helpers():
+    """Import the prompt helpers without running the integration's __init__
+    (which needs Home Assistant)."""
+    sys.path.insert(0, str(ROOT))
+    for name, path in (
+        ("custom_components", ROOT / "custom_components"),
+        ("custom_components.vikunja_voice_assistant", PACKAGE_DIR),
+    ):
+        module = types.ModuleType(name)
+        module.__path__ = [str(path)]
+        sys.modules.setdefault(name, module)
+    from custom_components.vikunja_voice_assistant.const import PROMPT_ENCODINGS
+    from custom_components.vikunja_voice_assistant.helpers import prompt_builder
+    from custom_components.vikunja_voice_assistant.snapshot import MetadataSnapshot
+
+    return PROMPT_ENCODINGS, prompt_builder, MetadataSnapshot
+
+
+def _token_counter():
+    try:
+        import tiktoken  # type: ignore[import-not-found]
+    except ImportError:
+        return "estimated (bytes/4)", lambda text: round(len(text.encode()) / 4)
+    encoding = tiktoken.get_encoding("cl100k_base")
+    return "tiktoken cl100k_base", lambda text: len(encoding.encode(text))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("snapshot", nargs="?", type=Path)
+    parser.add_argument("--utterance", default="Buy milk tomorrow for the groceries")
+    parser.add_argument("--projects", type=int, default=150)
+    parser.add_argument("--labels", type=int, default=100)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    encodings, prompt_builder, snapshot_cls = _load_helpers()
+    if args.snapshot:
+        snapshot = snapshot_cls.from_json(
+            json.loads(args.snapshot.read_text(encoding="utf-8"))
+        )
+        if snapshot is None:
+            print(f"{args.snapshot}: not a supported metadata snapshot")
+            return 1
+        projects, labels, users = snapshot.projects, snapshot.labels, snapshot.users
+    else:
+        projects = [
+            {"id": i, "title": f"Project {i}"} for i in range(1, args.projects + 1)
+        ]
+        labels = [{"id": i, "title": f"label-{i}"} for i in range(1, args.labels + 1)]
+        users = [
+            {"id": i, "username": f"user{i}", "name": f"User Number {i}"}
+            for i in range(1, args.users + 1)
+        ]
+
+    method, count_tokens = _token_counter()
+    print(
+        f"{len(projects)} projects, {len(labels)} labels, {len(users)} users; "
+        f"tokens: {method}"
+    )
+    print(
+        f"{'encoding':<10} {'metadata B':>11} {'meta tok':>9} {'prompt B':>9} {'prompt tok':>11}"
+    )
+    baseline = None
+    for encoding in encodings:
+        messages = prompt_builder.build_task_creation_messages(
+            args.utterance,
+            projects,
+            labels,
+            users=users,
+            enable_user_assignment=bool(users),
+            encoding=encoding,
+        )
+        prompt = "\n\n".join(message["content"] for message in messages)
+        metadata = messages[0]["content"][
+            messages[0]["content"].index("Available projects") :
+        ]
+        tokens = count_tokens(prompt)
+        baseline = baseline or tokens
+        print(
+            f"{encoding:<10} {len(metadata.encode()):>11} {count_tokens(metadata):>9} "
+            f"{len(prompt.encode()):>9} {tokens:>11}  ({tokens / baseline:.0%})"
+        )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
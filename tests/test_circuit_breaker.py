@@ -0,0 +1,84 @@
+import pytest
+
+from custom_components.vikunja_voice_assistant.helpers.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    retry_with_backoff,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_trips_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "test", failure_threshold=2, recovery_seconds=10, clock=clock
+    )
+    changes = []
+    breaker.add_listener(lambda: changes.append(breaker.state))
+
+    breaker.record_failure("boom")
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure("boom")
+    assert breaker.is_open and not breaker.allow_request()
+
+    clock.now = 10
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert changes == [STATE_OPEN, STATE_HALF_OPEN, STATE_CLOSED]
+
+
+def test_breaker_backs_off_while_still_down():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "test", failure_threshold=1, recovery_seconds=10, clock=clock
+    )
+    breaker.record_failure()
+    assert breaker.retry_in == 10
+    clock.now = 10
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.retry_in == 20
+
+
+async def test_probe_closes_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    breaker.record_failure()
+
+    async def healthy():
+        return True
+
+    breaker.probe = healthy
+    await breaker.async_probe()
+    assert breaker.state == STATE_CLOSED
+
+
+async def test_retry_with_backoff_only_retries_transient():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    result = await retry_with_backoff(
+        flaky, attempts=3, is_transient=lambda e: True, base_delay=0
+    )
+    assert result == "ok" and len(calls) == 3
+
+    async def broken():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        await retry_with_backoff(broken, attempts=3, is_transient=lambda e: False)
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from custom_components.vikunja_voice_assistant.helpers.deadline import (
+    Deadline,
+    DeadlineExceeded,
+)
+
+
+async def test_run_returns_result_within_budget():
+    deadline = Deadline(1.0)
+
+    async def fast():
+        return 42
+
+    assert await deadline.run(fast(), "fast") == 42
+    assert "fast" in deadline.stage_durations
+
+
+async def test_run_raises_when_stage_overruns():
+    deadline = Deadline(0.05)
+
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        await deadline.run(asyncio.sleep(1), "slow")
+    assert exc_info.value.stage == "slow"
+    assert deadline.expired
+
+    with pytest.raises(DeadlineExceeded):
+        await deadline.run(asyncio.sleep(0), "after_expiry")
+
+
+async def test_run_optional_defers_instead_of_cancelling():
+    deadline = Deadline(0.05)
+    finished = asyncio.Event()
+
+    async def enrich():
+        await asyncio.sleep(0.1)
+        finished.set()
+        return "done"
+
+    task = asyncio.ensure_future(enrich())
+    assert await deadline.run_optional(task, "enrichment") is None
+    # The optional stage keeps running after the reply was sent
+    await asyncio.wait_for(finished.wait(), 1)
+    assert task.result() == "done"
+
+
+async def test_run_optional_skips_wait_when_budget_low():
+    deadline = Deadline(0.5)
+    task = asyncio.ensure_future(asyncio.sleep(0.01, result="ok"))
+    assert await deadline.run_optional(task, "enrichment", min_budget=1.0) is None
+    assert await task == "ok"
+
+
+async def test_run_shielded_grants_floor_and_never_cancels():
+    deadline = Deadline(0.0)
+    task = asyncio.ensure_future(asyncio.sleep(0.01, result="created"))
+    # Out of budget, but the floor still lets the write finish
+    assert await deadline.run_shielded(task, "create", min_budget=1.0) == "created"
+
+    slow = asyncio.ensure_future(asyncio.sleep(0.1, result="late"))
+    with pytest.raises(DeadlineExceeded):
+        await deadline.run_shielded(slow, "create", min_budget=0.01)
+    assert await slow == "late"
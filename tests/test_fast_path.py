@@ -0,0 +1,184 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from custom_components.vikunja_voice_assistant.helpers.fast_path import FastPathParser
+from custom_components.vikunja_voice_assistant.helpers.metadata_index import (
+    MetadataIndex,
+)
+
+NOW = datetime(2026, 10, 17, 9, 0, tzinfo=timezone.utc)  # a Saturday
+INDEX = MetadataIndex.build(
+    [
+        {"id": 1, "title": "Inbox"},
+        {"id": 2, "title": "Work"},
+        {"id": 3, "title": "Work Stuff"},
+        {"id": 4, "title": "Arbeit"},
+        {"id": 5, "title": "工作"},
+    ],
+    [{"id": 7, "title": "groceries"}, {"id": 8, "title": "health"}],
+)
+
+
+def _parse(text, lang="en", parser=None, **kwargs):
+    parser = parser or FastPathParser()
+    return parser.parse(text, lang, INDEX, now=NOW, **kwargs)
+
+
+@pytest.mark.parametrize(
+    ("lang", "text", "expected"),
+    [
+        (
+            "en",
+            "Urgent: finish the report in work by Friday at 5pm",
+            {
+                "title": "Finish the report",
+                "project_id": 2,
+                "due_date": "2026-10-23T17:00:00Z",
+                "priority": 5,
+            },
+        ),
+        (
+            "en",
+            "Take vitamins daily with the health label",
+            {
+                "title": "Take vitamins",
+                "project_id": 1,
+                "repeat_after": 86400,
+                "label_ids": [8],
+            },
+        ),
+        (
+            "en",
+            "remind me to call mom at 17:30",
+            {"title": "Call mom", "project_id": 1, "due_date": "2026-10-17T17:30:00Z"},
+        ),
+        (
+            "en",
+            "pay rent not urgent",
+            {"title": "Pay rent", "project_id": 1, "priority": 2},
+        ),
+        (
+            "en",
+            "file taxes in the work stuff project",
+            {"title": "File taxes", "project_id": 3},
+        ),
+        (
+            "de",
+            "Bericht abschließen im Projekt Arbeit bis Freitag",
+            {
+                "title": "Bericht abschließen",
+                "project_id": 4,
+                "due_date": "2026-10-23T12:00:00Z",
+            },
+        ),
+        (
+            "fr",
+            "Acheter du pain demain à 8h30",
+            {
+                "title": "Acheter du pain",
+                "project_id": 1,
+                "due_date": "2026-10-18T08:30:00Z",
+            },
+        ),
+        (
+            "zh-Hans",
+            "明天下午3点买牛奶",
+            {"title": "买牛奶", "project_id": 1, "due_date": "2026-10-18T15:00:00Z"},
+        ),
+        ("zh-Hans", "买牛奶 工作项目", {"title": "买牛奶", "project_id": 5}),
+        (
+            "ar",
+            "شراء الحليب غدا الساعة 5 مساء",
+            {
+                "title": "شراء الحليب",
+                "project_id": 1,
+                "due_date": "2026-10-18T17:00:00Z",
+            },
+        ),
+    ],
+)
+def test_simple_commands_are_parsed_locally(lang, text, expected):
+    assert _parse(text, lang) == expected
+
+
+@pytest.mark.parametrize(
+    ("lang", "text", "reason"),
+    [
+        ("en", "call mom at 5", "ambiguous_time"),  # am or pm?
+        ("en", "buy milk with the groceries label for next week", "unhandled_words"),
+        ("en", "finish work report", "name"),  # a project without "in"
+        ("en", "buy milk yesterday", "unhandled_words"),
+        ("en", "call mom today at 8am", "past_date"),
+        ("en", "buy milk urgent not urgent", "conflicting_priority"),
+        ("en", "order 3 pizzas", "digits"),
+        ("es", "Comprar pan mañana por la mañana", "ambiguous"),
+        ("de", "Steuer machen nächste Woche", "unhandled_words"),
+        ("zh-Hans", "下周买牛奶", "unhandled_words"),
+    ],
+)
+def test_unclear_commands_are_deferred(lang, text, reason):
+    parser = FastPathParser()
+    assert _parse(text, lang, parser) is None
+    assert parser.stats.deferred == {reason: 1}
+
+
+KEYWORD_INDEX = MetadataIndex.build(
+    [{"id": 1, "title": "Inbox"}, {"id": 2, "title": "daily"}],
+    [{"id": 7, "title": "urgent"}, {"id": 8, "title": "important"}],
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "index", "reason"),
+    [
+        ("fix sink with the urgent label", KEYWORD_INDEX, "keyword_in_name"),
+        ("buy milk in the daily project", KEYWORD_INDEX, "keyword_in_name"),
+        ("review budget in important", KEYWORD_INDEX, "keyword_in_name"),
+        # Same words without such names still leave a connector behind
+        ("fix sink with the urgent label", INDEX, "dangling_connector"),
+        ("buy milk in the daily project", INDEX, "dangling_connector"),
+        ("review budget in important", INDEX, "dangling_connector"),
+    ],
+)
+def test_keywords_next_to_names_are_deferred(text, index, reason):
+    parser = FastPathParser()
+    assert parser.parse(text, "en", index, now=NOW) is None
+    assert parser.stats.deferred == {reason: 1}
+
+
+def test_name_followed_by_unknown_words_is_deferred():
+    index = MetadataIndex.build([{"id": 2, "title": "Work"}], [])
+    parser = FastPathParser()
+    # There is no "Work Stuff" project; "stuff" is not part of the title
+    assert parser.parse("fix the bug in work stuff", "en", index, now=NOW) is None
+    assert parser.stats.deferred == {"dangling_name": 1}
+    assert parser.parse("fix the bug in work tomorrow", "en", index, now=NOW) == {
+        "title": "Fix the bug",
+        "project_id": 2,
+        "due_date": "2026-10-18T12:00:00Z",
+    }
+
+
+def test_assignees_are_left_to_the_llm():
+    users = [{"id": 3, "username": "jdoe", "name": "Jane Doe"}]
+    assert _parse("ask Jane Doe to buy milk", users=users) is None
+    assert _parse("buy milk", users=users) == {"title": "Buy milk", "project_id": 1}
+
+
+def test_default_due_date_only_without_project():
+    assert _parse("buy milk", default_due_date="tomorrow")["due_date"] == (
+        "2026-10-18T12:00:00Z"
+    )
+    assert "due_date" not in _parse("buy milk in work", default_due_date="tomorrow")
+
+
+def test_stats_report_hit_rate_and_latency():
+    parser = FastPathParser()
+    _parse("buy milk tomorrow", parser=parser)
+    _parse("buy milk next week", parser=parser)
+    stats = parser.as_dict()
+    assert stats["attempts"] == 2
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["avg_ms"] is not None
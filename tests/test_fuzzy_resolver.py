@@ -0,0 +1,80 @@
+from custom_components.vikunja_voice_assistant.helpers.fuzzy_resolver import (
+    FuzzyResolver,
+)
+from custom_components.vikunja_voice_assistant.helpers.metadata_index import (
+    MetadataIndex,
+)
+from custom_components.vikunja_voice_assistant.helpers.prompt_builder import (
+    build_task_creation_messages,
+)
+from custom_components.vikunja_voice_assistant.helpers.records import (
+    LabelRecord,
+    ProjectRecord,
+)
+
+INDEX = MetadataIndex.build(
+    [ProjectRecord(1, "Inbox"), ProjectRecord(2, "Garden"), ProjectRecord(3, "Garage")],
+    [LabelRecord(5, "errand"), LabelRecord(6, "urgent")],
+)
+USERS = [
+    {"id": 7, "username": "wbrown", "name": "William Brown"},
+    {"id": 8, "username": "alice", "name": "Alice"},
+]
+
+
+def _resolver():
+    resolver = FuzzyResolver()
+    resolver.sync(INDEX, USERS)
+    return resolver
+
+
+def test_ranks_candidates_with_confidence():
+    matches = _resolver().match("water the gardn as an errand")
+    assert matches[0].kind == "label" and matches[0].id == 5
+    assert matches[0].confidence == 1.0
+    garden, garage = [m for m in matches if m.kind == "project"]
+    assert garden.id == 2 and 0.5 <= garden.confidence < 1.0
+    assert garage.confidence < garden.confidence
+
+
+def test_best_user_matches_name_or_username():
+    resolver = _resolver()
+    assert resolver.best("user", "wiliam brown", 0.6).id == 7
+    assert resolver.best("user", "ALICE", 0.9).id == 8
+    assert resolver.best("user", "bob", 0.6) is None
+
+
+def test_symmetric_assignee_match_needs_a_clear_lead():
+    resolver = FuzzyResolver()
+    users = [
+        {"id": 1, "username": "alice", "name": "Alice"},
+        {"id": 2, "username": "asmith", "name": "Alice Smith"},
+        {"id": 3, "username": "ann", "name": "Ann"},
+        {"id": 4, "username": "annette", "name": "Annette"},
+    ]
+    resolver.sync(INDEX, users)
+    # Both names lie fully inside the spoken one; only Dice tells them apart
+    assert resolver.best("user", "alice smith", 0.75) is None
+    assert resolver.best("user", "alice smith", 0.75, symmetric=True).id == 2
+    assert resolver.best("user", "alice jones", 0.75).id == 1
+    assert resolver.best("user", "alice jones", 0.75, symmetric=True) is None
+    # "anne" is about as close to Ann as to Annette
+    assert resolver.best("user", "anne", 0.5, symmetric=True).id == 3
+    assert resolver.best("user", "anne", 0.5, margin=0.1, symmetric=True) is None
+
+
+def test_sync_rebuilds_only_changed_kinds():
+    resolver = _resolver()
+    assert resolver.sync(INDEX, USERS) is False
+    changed = MetadataIndex.build(INDEX.projects, [LabelRecord(9, "pharmacy")])
+    assert resolver.sync(changed, USERS) is True
+    assert resolver.rebuilds == {"project": 1, "label": 2, "user": 1}
+    assert resolver.best("label", "go to the pharmacy", 0.9).id == 9
+
+
+def test_confident_names_are_pinned_in_the_request():
+    messages = build_task_creation_messages(
+        "weed the garden", None, None, index=INDEX, resolver=_resolver()
+    )
+    assert 'project "Garden" (id 2)' in messages[1]["content"]
+    assert "Garage" not in messages[1]["content"]
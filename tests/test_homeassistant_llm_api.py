@@ -0,0 +1,202 @@
+import asyncio
+from types import SimpleNamespace
+
+import voluptuous as vol
+
+from custom_components.vikunja_voice_assistant.api.homeassistant_llm_api import (
+    AITaskCapabilities,
+    HomeAssistantLLMAPI,
+)
+from custom_components.vikunja_voice_assistant.helpers.circuit_breaker import (
+    CircuitBreaker,
+)
+from custom_components.vikunja_voice_assistant.helpers.task_schema import (
+    expand_short_keys,
+    normalize_structured_task,
+    task_structure,
+)
+
+PROJECTS = [{"id": 1, "title": "Inbox"}]
+LABELS = [{"id": 7, "title": "groceries"}]
+
+
+def _schema(accepts_structure):
+    fields = {
+        vol.Required("entity_id"): str,
+        vol.Required("task_name"): str,
+        vol.Required("instructions"): str,
+    }
+    if accepts_structure:
+        fields[vol.Optional("structure")] = dict
+    return vol.Schema(fields)
+
+
+class FakeServices:
+    def __init__(self, responses, accepts_structure=True):
+        self.responses = list(responses)
+        self.calls = []
+        self.schema_checks = 0
+        self._schema = _schema(accepts_structure)
+
+    def async_services_for_domain(self, domain):
+        assert domain == "ai_task"
+
+        def schema(data):
+            self.schema_checks += 1
+            return self._schema(data)
+
+        return {"generate_data": SimpleNamespace(schema=schema)}
+
+    async def async_call(self, domain, service, payload, **_kwargs):
+        self.calls.append(payload)
+        self._schema(payload)
+        return self.responses.pop(0)
+
+
+def _client(services, capabilities):
+    hass = SimpleNamespace(services=services)
+    return HomeAssistantLLMAPI(hass, "ai_task.test", capabilities=capabilities)
+
+
+async def test_structured_data_is_read_directly_and_capability_cached():
+    structured = {"data": {"title": "Buy milk", "project_id": 1.0, "label_ids": ["7"]}}
+    services = FakeServices([structured, structured])
+    capabilities = AITaskCapabilities()
+
+    for _ in range(2):
+        result = await _client(services, capabilities).create_task_from_description(
+            "buy milk groceries", PROJECTS, LABELS
+        )
+        assert result == {
+            "task_data": {"title": "Buy milk", "project_id": 1, "label_ids": [7]}
+        }
+
+    assert all("structure" in call for call in services.calls)
+    assert services.schema_checks == 1
+    assert capabilities.structured_output("ai_task.test") is True
+
+
+async def test_text_output_when_service_has_no_structure():
+    text = {"data": 'Sure: {"title": "Buy milk", "project_id": 1}'}
+    services = FakeServices([text], accepts_structure=False)
+    capabilities = AITaskCapabilities()
+
+    result = await _client(services, capabilities).create_task_from_description(
+        "buy milk", PROJECTS, LABELS
+    )
+
+    assert result == {"task_data": {"title": "Buy milk", "project_id": 1}}
+    assert "structure" not in services.calls[0]
+    assert capabilities.structured_output("ai_task.test") is False
+
+
+async def test_rejected_structure_falls_back_within_the_same_command():
+    text = {"data": '{"title": "Buy milk", "project_id": 1}'}
+    services = FakeServices([text])
+    services._schema = _schema(False)  # registered schema lies
+    capabilities = AITaskCapabilities()
+    capabilities.set_structured_output("ai_task.test", True)
+
+    result = await _client(services, capabilities).create_task_from_description(
+        "buy milk", PROJECTS, LABELS
+    )
+
+    assert result["task_data"]["title"] == "Buy milk"
+    assert len(services.calls) == 2
+    assert capabilities.structured_output("ai_task.test") is False
+
+
+async def test_unstructured_answer_is_parsed_without_disabling_structure():
+    text = {"data": '```json\n{"title": "Buy milk", "project_id": 1}\n```'}
+    services = FakeServices([text, {"data": {"title": "Eggs", "project_id": 1}}])
+    capabilities = AITaskCapabilities()
+    client = _client(services, capabilities)
+
+    result = await client.create_task_from_description("buy milk", PROJECTS, LABELS)
+
+    assert result["task_data"] == {"title": "Buy milk", "project_id": 1}
+    assert capabilities.structured_output("ai_task.test") is True
+    await client.create_task_from_description("eggs", PROJECTS, LABELS)
+    assert "structure" in services.calls[1]
+
+
+def test_normalize_structured_task_drops_empty_fields():
+    assert normalize_structured_task(
+        {
+            "title": " Pay rent ",
+            "project_id": 2.0,
+            "priority": None,
+            "due_date": "",
+            "repeat_after": 2592000.0,
+            "label_ids": ["3", "x", 4.0],
+            "assignee": "",
+        }
+    ) == {
+        "title": "Pay rent",
+        "project_id": 2,
+        "repeat_after": 2592000,
+        "label_ids": [3, 4],
+    }
+
+
+async def test_compact_answers_are_expanded_to_vikunja_fields():
+    text = {"data": '{"t":"Take vitamins","p":1,"r":"d","l":[8],"d":"2026-10-18"}'}
+    services = FakeServices([text], accepts_structure=False)
+
+    result = await _client(services, AITaskCapabilities()).create_task_from_description(
+        "take vitamins daily", PROJECTS, LABELS, compact_output=True
+    )
+
+    assert result["task_data"] == {
+        "title": "Take vitamins",
+        "project_id": 1,
+        "repeat_after": 86400,
+        "label_ids": [8],
+        "due_date": "2026-10-18T12:00:00Z",
+    }
+    assert "COMPACT OUTPUT KEYS" in services.calls[0]["instructions"]
+
+
+def test_expand_short_keys_prefers_full_names():
+    assert expand_short_keys(
+        {"t": "short", "title": "Full", "d": "2026-10-18T07:30", "r": 3600}
+    ) == {"title": "Full", "due_date": "2026-10-18T07:30:00Z", "repeat_after": 3600}
+    compact = task_structure(True, compact_output=True)
+    assert set(compact) == set("tpdrla") | {"priority"}
+    # A unit letter must be a valid answer for the structured field too
+    assert compact["r"]["selector"] == {"text": {}}
+    assert expand_short_keys({"r": "W"}) == {"repeat_after": 604800}
+    assert normalize_structured_task(expand_short_keys({"r": "3600"})) == {
+        "repeat_after": 3600
+    }
+
+
+class SlowServices(FakeServices):
+    def __init__(self, error=None):
+        super().__init__([])
+        self.error = error
+
+    async def async_call(self, domain, service, payload, **_kwargs):
+        if self.error is not None:
+            raise self.error
+        await asyncio.sleep(1)
+
+
+async def test_running_out_of_command_budget_is_not_a_backend_failure():
+    breaker = CircuitBreaker("AI Task", failure_threshold=1)
+    hass = SimpleNamespace(services=SlowServices())
+    client = HomeAssistantLLMAPI(
+        hass, "ai_task.test", breaker=breaker, capabilities=AITaskCapabilities()
+    )
+    assert (
+        await client.create_task_from_description(
+            "Buy milk", PROJECTS, LABELS, timeout=0.01
+        )
+        is None
+    )
+    assert breaker.allow_request()
+
+    # A timeout raised by the backend itself still counts
+    hass.services = SlowServices(error=asyncio.TimeoutError())
+    await client.create_task_from_description("Buy milk", PROJECTS, LABELS, timeout=5)
+    assert not breaker.allow_request()
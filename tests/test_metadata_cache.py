@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+
+from custom_components.vikunja_voice_assistant.api.vikunja_api import (
+    VikunjaRequestError,
+)
+from custom_components.vikunja_voice_assistant.helpers.records import (
+    LabelRecord,
+    ProjectRecord,
+)
+from custom_components.vikunja_voice_assistant.metadata_cache import MetadataCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeHass:
+    def async_create_background_task(self, target, name):
+        return asyncio.ensure_future(target)
+
+
+class CountingAPI:
+    def __init__(self):
+        self.projects = [SimpleNamespace(id=1, title="Inbox")]
+        self.labels = [SimpleNamespace(id=5, title="errand")]
+        self.calls = {"projects": 0, "labels": 0}
+        self.fail = False
+        self.gate = None
+
+    async def list_projects(self):
+        self.calls["projects"] += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            raise VikunjaRequestError("down")
+        return list(self.projects)
+
+    async def list_labels(self):
+        self.calls["labels"] += 1
+        return list(self.labels)
+
+
+async def test_fresh_hits_skip_the_network():
+    api, clock = CountingAPI(), FakeClock()
+    cache = MetadataCache(FakeHass(), api, ttl=60, clock=clock)
+    first = await cache.get_projects()
+    clock.now += 30
+    assert await cache.get_projects() is first
+    assert api.calls["projects"] == 1
+    stats = cache.as_dict()
+    assert stats["misses"] == 1 and stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+async def test_stale_entries_are_served_while_refreshing():
+    api, clock = CountingAPI(), FakeClock()
+    cache = MetadataCache(FakeHass(), api, ttl=60, clock=clock)
+    old = await cache.get_projects()
+    api.projects = [SimpleNamespace(id=2, title="Home")]
+    api.gate = asyncio.Event()
+    clock.now += 120
+
+    assert await cache.get_projects() is old  # served immediately
+    assert await cache.get_projects() is old  # refresh joined, not repeated
+    await asyncio.sleep(0)
+    assert api.calls["projects"] == 2
+    api.gate.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert [p.id for p in await cache.get_projects()] == [2]
+    assert cache.as_dict()["stale_hits"] == 2
+
+
+async def test_failed_refresh_keeps_serving_cached_data():
+    api, clock = CountingAPI(), FakeClock()
+    cache = MetadataCache(FakeHass(), api, ttl=0, clock=clock)
+    old = await cache.get_projects()
+    api.fail = True
+    assert await cache.get_projects() is old
+    await asyncio.sleep(0)
+    assert await cache.get_projects() is old
+    assert cache.as_dict()["refresh_failures"] >= 1
+
+
+async def test_cold_failure_returns_empty_list():
+    api = CountingAPI()
+    api.fail = True
+    cache = MetadataCache(FakeHass(), api, ttl=60)
+    assert await cache.get_projects() == []
+
+
+async def test_forced_refresh_refetches_now():
+    api, clock = CountingAPI(), FakeClock()
+    cache = MetadataCache(FakeHass(), api, ttl=600, clock=clock)
+    await cache.get_labels()
+    api.labels = [SimpleNamespace(id=6, title="voice")]
+    await cache.async_refresh("labels")
+    assert [label.id for label in await cache.get_labels()] == [6]
+    assert api.calls == {"projects": 0, "labels": 2}
+
+
+async def test_index_is_rebuilt_only_when_data_changes():
+    api, clock = CountingAPI(), FakeClock()
+    api.projects = [ProjectRecord(1, "Inbox")]
+    api.labels = [LabelRecord(5, "Voice")]
+    cache = MetadataCache(FakeHass(), api, ttl=0, clock=clock)
+    first = await cache.get_index()
+    assert first.label_id("voice") == 5
+    await asyncio.sleep(0)  # stale revalidation returns identical data
+    assert await cache.get_index() is first
+
+    cache.apply_upsert("labels", LabelRecord(6, "errand"))
+    second = await cache.get_index()
+    assert second is not first and second.version != first.version
+    assert second.label_id("ERRAND") == 6
+    assert cache.as_dict()["index_builds"] == 2
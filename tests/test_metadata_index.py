@@ -0,0 +1,40 @@
+import pytest
+
+from custom_components.vikunja_voice_assistant.helpers.metadata_index import (
+    MetadataIndex,
+)
+from custom_components.vikunja_voice_assistant.helpers.records import (
+    LabelRecord,
+    ProjectRecord,
+)
+
+
+def test_index_lookups_accept_records_and_dicts():
+    index = MetadataIndex.build(
+        [ProjectRecord(1, "Inbox"), {"id": 2, "title": " Garden "}, {"title": "x"}],
+        [LabelRecord(5, "Voice"), LabelRecord(6, "voice"), "junk"],
+    )
+    assert [p.get("id") for p in index.projects] == [1, 2]
+    assert index.project_id("garden") == 2
+    assert index.project_title(2) == "Garden"
+    assert index.label_id("VOICE") == 5  # first match wins
+    assert index.label_title(6) == "voice"
+    assert index.projects_json == (
+        '[{"id": 1, "name": "Inbox"}, {"id": 2, "name": " Garden "}]'
+    )
+
+
+def test_version_tracks_prompt_visible_content():
+    a = MetadataIndex.build([ProjectRecord(1, "Inbox")], [LabelRecord(5, "a")])
+    b = MetadataIndex.build([{"id": 1, "title": "Inbox"}], [{"id": 5, "title": "a"}])
+    c = MetadataIndex.build([ProjectRecord(1, "Inbox")], [LabelRecord(5, "b")])
+    assert a.version == b.version
+    assert a.version != c.version
+
+
+def test_index_is_read_only():
+    index = MetadataIndex.build([ProjectRecord(1, "Inbox")], [])
+    with pytest.raises(TypeError):
+        index.projects_by_id[2] = ProjectRecord(2, "x")
+    with pytest.raises(AttributeError):
+        index.version = "other"
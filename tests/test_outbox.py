@@ -0,0 +1,178 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.vikunja_voice_assistant import outbox as outbox_mod
+from custom_components.vikunja_voice_assistant.api.vikunja_api import (
+    EnrichmentResult,
+    VikunjaRequestError,
+)
+from custom_components.vikunja_voice_assistant.outbox import VikunjaOutbox
+
+
+class FakeHass:
+    def __init__(self, config_dir):
+        self.config = SimpleNamespace(config_dir=str(config_dir))
+
+    async def async_add_executor_job(self, func, *args):
+        return func(*args)
+
+    def async_create_background_task(self, target, name):
+        return asyncio.ensure_future(target)
+
+
+class FlakyVikunjaAPI:
+    """Fails the first `create_failures` creates, then records tasks."""
+
+    def __init__(self, create_failures=0, reject=(), status=404):
+        self.create_failures = create_failures
+        self.reject = set(reject)  # titles Vikunja refuses with `status`
+        self.status = status
+        self.created = []
+        self.enriched = []
+
+    async def add_task_with_relations(
+        self, task_data, label_ids, assignee_ids, raise_errors=False
+    ):
+        if task_data["title"] in self.reject:
+            raise VikunjaRequestError("request refused", status=self.status)
+        if self.create_failures:
+            self.create_failures -= 1
+            return None, list(label_ids), list(assignee_ids)
+        task = {"id": 100 + len(self.created), **task_data}
+        self.created.append(task)
+        return task, list(label_ids), list(assignee_ids)
+
+    async def enrich_task(
+        self, task_id, label_ids, assignee_ids, attached_labels=(), attached_users=()
+    ):
+        self.enriched.append((task_id, list(label_ids), list(assignee_ids)))
+        return EnrichmentResult(
+            task_id=task_id, attached_labels=label_ids, assigned_users=assignee_ids
+        )
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(outbox_mod, "OUTBOX_RETRY_BASE_SECONDS", 0)
+
+
+async def _drain(outbox, timeout=1.0):
+    async def _wait():
+        while outbox.backlog:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(_wait(), timeout)
+
+
+async def test_enqueue_persists_and_worker_replays_in_order(tmp_path):
+    api = FlakyVikunjaAPI(create_failures=2)
+    outbox = VikunjaOutbox(FakeHass(tmp_path), api)
+    changes = []
+    outbox.add_listener(lambda: changes.append(outbox.backlog))
+
+    await outbox.enqueue({"title": "first", "project_id": 1}, [5], [7])
+    await outbox.enqueue({"title": "second", "project_id": 1}, [], [])
+    saved = json.loads((tmp_path / "vikunja_outbox.json").read_text())
+    assert [e["task_data"]["title"] for e in saved["entries"]] == ["first", "second"]
+
+    stop = outbox.start()
+    try:
+        await _drain(outbox)
+    finally:
+        stop()
+    assert [t["title"] for t in api.created] == ["first", "second"]
+    assert api.enriched == [(100, [5], [7])]
+    assert changes[-1] == 0
+    saved = json.loads((tmp_path / "vikunja_outbox.json").read_text())
+    assert saved["entries"] == []
+
+
+async def test_queue_survives_restart_without_recreating_task(tmp_path):
+    hass = FakeHass(tmp_path)
+    first = VikunjaOutbox(hass, FlakyVikunjaAPI())
+    await first.enqueue({"title": "created before restart"}, [5], [])
+    # Simulate: task created, enrichment still pending when HA stopped
+    first.entries[0].task_id = 42
+    await first._async_save()
+
+    api = FlakyVikunjaAPI()
+    second = VikunjaOutbox(hass, api)
+    await second.load()
+    assert second.backlog == 1
+    stop = second.start()
+    try:
+        await _drain(second)
+    finally:
+        stop()
+    assert api.created == []
+    assert api.enriched == [(42, [5], [])]
+
+
+async def test_entry_dropped_after_max_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox_mod, "OUTBOX_MAX_ATTEMPTS", 3)
+    api = FlakyVikunjaAPI(create_failures=10)
+    outbox = VikunjaOutbox(FakeHass(tmp_path), api)
+    await outbox.enqueue({"title": "doomed"}, [], [])
+    stop = outbox.start()
+    try:
+        await _drain(outbox)
+    finally:
+        stop()
+    assert api.created == [] and api.create_failures == 7
+
+
+async def test_permanently_rejected_entry_does_not_block_the_queue(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(outbox_mod, "OUTBOX_RETRY_BASE_SECONDS", 60)
+    api = FlakyVikunjaAPI(reject={"deleted project"})
+    outbox = VikunjaOutbox(FakeHass(tmp_path), api)
+    await outbox.enqueue({"title": "deleted project", "project_id": 9}, [], [])
+    await outbox.enqueue({"title": "second", "project_id": 1}, [], [])
+
+    stop = outbox.start()
+    try:
+        await _drain(outbox)  # would sleep 60 s on a retry
+    finally:
+        stop()
+    assert [t["title"] for t in api.created] == ["second"]
+
+
+async def test_auth_errors_keep_entries_queued(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox_mod, "OUTBOX_RETRY_BASE_SECONDS", 0)
+    monkeypatch.setattr(outbox_mod, "OUTBOX_MAX_ATTEMPTS", 2)
+    api = FlakyVikunjaAPI(reject={"buy milk"}, status=401)  # expired token
+    outbox = VikunjaOutbox(FakeHass(tmp_path), api)
+    await outbox.enqueue({"title": "buy milk", "project_id": 1}, [], [])
+
+    async def _retried():
+        while outbox.entries[0].attempts < 5:
+            await asyncio.sleep(0.01)
+
+    stop = outbox.start()
+    try:
+        await asyncio.wait_for(_retried(), 1.0)
+    finally:
+        stop()
+    assert [e.task_data["title"] for e in outbox.entries] == ["buy milk"]
+
+    # Once the token is fixed, the entry goes through
+    api.reject.clear()
+    stop = outbox.start()
+    try:
+        await _drain(outbox)
+    finally:
+        stop()
+    assert [t["title"] for t in api.created] == ["buy milk"]
+
+
+async def test_enqueue_raises_when_the_queue_cannot_be_saved(tmp_path):
+    outbox = VikunjaOutbox(
+        FakeHass(tmp_path), FlakyVikunjaAPI(), path=str(tmp_path / "missing" / "q")
+    )
+    with pytest.raises(OSError):
+        await outbox.enqueue({"title": "lost", "project_id": 1}, [], [])
+    assert outbox.backlog == 0
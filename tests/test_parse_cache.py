@@ -0,0 +1,178 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from custom_components.vikunja_voice_assistant.parse_cache import (
+    PARSE_CACHE_VERSION,
+    ParseCache,
+    normalize_utterance,
+)
+
+SATURDAY = datetime(2026, 10, 17, 9, 0, tzinfo=timezone.utc)
+MONDAY = SATURDAY + timedelta(days=2)
+
+
+class FakeHass:
+    def __init__(self, config_dir):
+        self.config = SimpleNamespace(config_dir=str(config_dir))
+
+    async def async_add_executor_job(self, func, *args):
+        return func(*args)
+
+    def async_create_background_task(self, target, name):
+        return asyncio.ensure_future(target)
+
+
+def _key(text, version="v1", default_due_date="none"):
+    return ParseCache.key(text, "en", version, default_due_date, True, False)
+
+
+def test_key_ignores_case_punctuation_and_spacing_but_not_settings():
+    assert normalize_utterance("  Take out the TRASH! ") == "take out the trash"
+    assert _key("Take out the trash.") == _key("take  out the trash")
+    assert _key("take out the trash") != _key("take out the trash", version="v2")
+    assert _key("take out the trash") != _key(
+        "take out the trash", default_due_date="tomorrow"
+    )
+
+
+def test_relative_dates_are_resolved_again_on_hit():
+    cache = ParseCache(max_entries=10)
+    key = _key("call mom tomorrow at 5pm")
+    cache.put(
+        key,
+        "call mom tomorrow at 5pm",
+        "en",
+        {"title": "Call mom", "project_id": 1, "due_date": "2026-10-18T17:00:00Z"},
+        "none",
+        now=SATURDAY,
+    )
+    assert cache.get(key, "none", now=MONDAY) == {
+        "title": "Call mom",
+        "project_id": 1,
+        "due_date": "2026-10-20T17:00:00Z",
+    }
+
+    friday = _key("pay rent on friday")
+    cache.put(
+        friday,
+        "pay rent on friday",
+        "en",
+        {"title": "Pay rent", "project_id": 1, "due_date": "2026-10-23T12:00:00Z"},
+        "none",
+        now=SATURDAY,
+    )
+    assert cache.get(friday, "none", now=MONDAY)["due_date"] == "2026-10-23T12:00:00Z"
+    assert cache.get(friday, "none", now=MONDAY + timedelta(days=5))["due_date"] == (
+        "2026-10-30T12:00:00Z"
+    )
+
+
+def test_default_and_unknown_due_dates():
+    cache = ParseCache(max_entries=10)
+    trash = _key("take out the trash", default_due_date="tomorrow")
+    cache.put(
+        trash,
+        "take out the trash",
+        "en",
+        {
+            "title": "Take out the trash",
+            "project_id": 1,
+            "due_date": "2026-10-18T12:00:00Z",
+        },
+        "tomorrow",
+        now=SATURDAY,
+    )
+    assert cache.get(trash, "tomorrow", now=MONDAY)["due_date"] == (
+        "2026-10-20T12:00:00Z"
+    )
+
+    # Not expressible relative to the utterance: only valid on the same day
+    party = _key("plan the party for the 24th")
+    cache.put(
+        party,
+        "plan the party for the 24th",
+        "en",
+        {
+            "title": "Plan the party",
+            "project_id": 1,
+            "due_date": "2026-10-24T12:00:00Z",
+        },
+        "none",
+        now=SATURDAY,
+    )
+    assert cache.get(party, "none", now=SATURDAY)["due_date"] == "2026-10-24T12:00:00Z"
+    assert cache.get(party, "none", now=MONDAY) is None
+    assert cache.stale == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ParseCache(max_entries=2)
+    for text in ("a", "b"):
+        cache.put(_key(text), text, "en", {"title": text, "project_id": 1}, "none")
+    assert cache.get(_key("a"), "none") is not None
+    cache.put(_key("c"), "c", "en", {"title": "c", "project_id": 1}, "none")
+
+    assert cache.get(_key("b"), "none") is None
+    assert cache.get(_key("a"), "none") == {"title": "a", "project_id": 1}
+    assert cache.as_dict()["evictions"] == 1
+
+
+def test_hits_are_copies():
+    cache = ParseCache()
+    cache.put(_key("x"), "x", "en", {"title": "X", "label_ids": [7]}, "none")
+    cache.get(_key("x"), "none")["label_ids"].pop()
+    assert cache.get(_key("x"), "none")["label_ids"] == [7]
+
+
+async def test_persisted_cache_survives_restart(tmp_path):
+    hass = FakeHass(tmp_path)
+    cache = ParseCache.persisted(hass, 10)
+    cache.delay = 0.01
+    cache.put(_key("x"), "x", "en", {"title": "X", "project_id": 1}, "none")
+    cache.put(_key("y"), "y", "en", {"title": "Y", "project_id": 1}, "none")
+    await asyncio.sleep(0.05)
+    assert cache.saves == 1
+    raw = json.loads((tmp_path / "vikunja_parse_cache.json").read_text())
+    assert raw["version"] == PARSE_CACHE_VERSION
+
+    restored = ParseCache.persisted(hass, 1)
+    await restored.async_load()
+    assert len(restored) == 1  # only the most recent entries fit
+    assert restored.get(_key("y"), "none") == {"title": "Y", "project_id": 1}
+
+
+def test_same_day_dates_expire_once_past():
+    cache = ParseCache(max_entries=10)
+    tonight = _key("call mom tonight")
+    cache.put(
+        tonight,
+        "call mom tonight",
+        "en",
+        {"title": "Call mom", "project_id": 1, "due_date": "2026-10-17T20:00:00Z"},
+        "none",
+        now=SATURDAY,
+    )
+    assert cache.get(tonight, "none", now=SATURDAY + timedelta(hours=5))
+    assert cache.get(tonight, "none", now=SATURDAY + timedelta(hours=13)) is None
+
+
+def test_dates_counted_from_now_are_not_cached():
+    cache = ParseCache(max_entries=10)
+    oven = _key("check the oven in 10 minutes")
+    cache.put(
+        oven,
+        "check the oven in 10 minutes",
+        "en",
+        {
+            "title": "Check the oven",
+            "project_id": 1,
+            "due_date": "2026-10-17T09:10:00Z",
+        },
+        "none",
+        now=SATURDAY,
+    )
+    assert cache.get(oven, "none", now=SATURDAY + timedelta(hours=5)) is None
+    assert len(cache) == 0
+    assert cache.as_dict()["not_cacheable"] == 1
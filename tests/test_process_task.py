@@ -1,4 +1,6 @@
 import asyncio
+from types import SimpleNamespace
+
 import pytest
 
 from custom_components.vikunja_voice_assistant.task_handler import process_task
@@ -12,7 +14,17 @@ from custom_components.vikunja_voice_assistant.const import (
     CONF_AUTO_VOICE_LABEL,
     CONF_ENABLE_USER_ASSIGN,
     CONF_DETAILED_RESPONSE,
+    CONF_FAST_PATH,
+    CONF_COMMAND_TIMEOUT,
+)
+from custom_components.vikunja_voice_assistant.api.vikunja_api import (
+    EnrichmentResult,
 )
+from custom_components.vikunja_voice_assistant.helpers.circuit_breaker import (
+    CircuitBreaker,
+)
+from custom_components.vikunja_voice_assistant.helpers.fast_path import FastPathParser
+from custom_components.vikunja_voice_assistant.parse_cache import ParseCache
 import custom_components.vikunja_voice_assistant.task_handler as th_mod
 
 
@@ -25,6 +37,9 @@ class FakeHass:
             return await func(*args, **kwargs)
         return func(*args, **kwargs)
 
+    def async_create_background_task(self, target, name):
+        return asyncio.ensure_future(target)
+
 
 class FakeVikunjaAPI:
     def __init__(self, url, key):  # noqa: D401
@@ -39,27 +54,44 @@ class FakeVikunjaAPI:
     def _set_labels(self, labels):
         self._labels = labels
 
-    def get_projects(self):
+    async def get_projects(self):
         return self._projects
 
-    def get_labels(self):
+    async def get_labels(self):
         return self._labels
 
-    def create_label(self, name):
+    async def create_label(self, name):
         return {"id": 999, "title": name}
 
-    def add_task(self, task_data):
+    async def add_task(self, task_data):
         task = {"id": 123, **task_data}
         self._tasks_created.append(task)
         return task
 
-    def add_label_to_task(self, task_id, label_id):
+    async def add_task_with_relations(
+        self, task_data, label_ids, assignee_ids, raise_errors=False
+    ):
+        # Behaves like a server that ignores embedded relations
+        return await self.add_task(task_data), list(label_ids), list(assignee_ids)
+
+    async def add_label_to_task(self, task_id, label_id):
         return True
 
-    def assign_user_to_task(self, task_id, user_id):
+    async def assign_user_to_task(self, task_id, user_id):
         self._assignments.append((task_id, user_id))
         return True
 
+    async def enrich_task(
+        self, task_id, label_ids, assignee_ids, attached_labels=(), attached_users=()
+    ):
+        for lid in label_ids:
+            await self.add_label_to_task(task_id, lid)
+        for uid in assignee_ids:
+            await self.assign_user_to_task(task_id, uid)
+        return EnrichmentResult(
+            task_id=task_id, attached_labels=label_ids, assigned_users=assignee_ids
+        )
+
 
 class FakeLLMAPI:
     """Fake wrapper for the HomeAssistantLLMAPI (or similar) used by task_handler."""
@@ -69,17 +101,37 @@ class FakeLLMAPI:
 
     def set_response(self, task_data):
         # task_handler expects {"task_data": {...}} or None
-        self._next_response = {"task_data": task_data} if task_data is not None else None
+        self._next_response = (
+            {"task_data": task_data} if task_data is not None else None
+        )
 
     async def create_task_from_description(self, *_, **__):
         return self._next_response
 
 
+@pytest.fixture
+def runtime():
+    return SimpleNamespace(
+        api=None,
+        vikunja_breaker=CircuitBreaker("Vikunja"),
+        llm_breaker=CircuitBreaker("AI Task"),
+        outbox=None,
+        metadata=None,
+        voice_label=None,
+        usage=None,
+        resolver=None,
+        llm_capabilities=None,
+        fast_path=None,
+        parse_cache=None,
+    )
+
+
 @pytest.fixture(autouse=True)
-def patch_apis(monkeypatch):
+def patch_apis(monkeypatch, runtime):
     fake_vikunja = FakeVikunjaAPI("url", "key")
     fake_llm = FakeLLMAPI()
-    monkeypatch.setattr(th_mod, "VikunjaAPI", lambda *a, **k: fake_vikunja)
+    runtime.api = fake_vikunja
+    monkeypatch.setattr(th_mod, "get_runtime_data", lambda _hass: runtime)
     # Adjust this attribute name to match the actual LLM wrapper used in task_handler
     monkeypatch.setattr(th_mod, "HomeAssistantLLMAPI", lambda *a, **k: fake_llm)
     return fake_vikunja, fake_llm
@@ -181,3 +233,113 @@ def test_process_task_missing_title(patch_apis):
     assert ok is False
     assert "couldn't understand" in msg.lower()
     assert title == ""
+
+
+def test_process_task_fails_fast_when_vikunja_circuit_open(patch_apis, runtime):
+    fake_vikunja, fake_llm = patch_apis
+    fake_llm.set_response({"title": "Buy milk", "project_id": 1})
+    for _ in range(runtime.vikunja_breaker.failure_threshold):
+        runtime.vikunja_breaker.record_failure("down")
+    hass = FakeHass(base_config())
+    ok, msg, title = asyncio.run(process_task(hass, "Buy milk", []))
+    assert ok is False
+    assert "couldn't add the task to vikunja" in msg.lower()
+    assert fake_vikunja._tasks_created == []
+
+
+class FakeOutbox:
+    def __init__(self):
+        self.entries = []
+
+    async def enqueue(self, task_data, label_ids, assignee_ids):
+        self.entries.append((dict(task_data), list(label_ids), list(assignee_ids)))
+        return SimpleNamespace(id="entry")
+
+
+def test_process_task_queues_in_outbox_while_vikunja_down(patch_apis, runtime):
+    fake_vikunja, fake_llm = patch_apis
+    runtime.outbox = FakeOutbox()
+    fake_llm.set_response({"title": "Buy milk", "project_id": 1})
+    for _ in range(runtime.vikunja_breaker.failure_threshold):
+        runtime.vikunja_breaker.record_failure("down")
+    hass = FakeHass(base_config(CONF_DETAILED_RESPONSE=False))
+    ok, msg, title = asyncio.run(process_task(hass, "Buy milk", []))
+    assert ok is True
+    assert msg == "Successfully added task: Buy milk"
+    assert runtime.outbox.entries == [({"title": "Buy milk", "project_id": 1}, [], [])]
+    assert fake_vikunja._tasks_created == []
+
+
+def test_process_task_fast_path_skips_the_llm(patch_apis, runtime):
+    fake_vikunja, fake_llm = patch_apis
+    fake_vikunja._set_projects([{"id": 2, "title": "Home"}])
+    fake_llm.set_response(None)  # the LLM would fail the command
+    for _ in range(runtime.llm_breaker.failure_threshold):
+        runtime.llm_breaker.record_failure("down")
+    runtime.fast_path = FastPathParser()
+    hass = FakeHass({**base_config(CONF_DETAILED_RESPONSE=False), CONF_FAST_PATH: True})
+    ok, msg, title = asyncio.run(process_task(hass, "Fix the fence in Home", []))
+    assert ok is True
+    assert title == "Fix the fence"
+    assert fake_vikunja._tasks_created[0]["project_id"] == 2
+    assert runtime.fast_path.stats.hits == 1
+
+    # Deferred commands still need the LLM, whose circuit is open
+    ok, msg, _ = asyncio.run(process_task(hass, "Fix the fence next week", []))
+    assert ok is False
+    assert runtime.fast_path.stats.deferred == {"unhandled_words": 1}
+
+
+def test_process_task_repeats_are_served_from_the_parse_cache(patch_apis, runtime):
+    fake_vikunja, fake_llm = patch_apis
+    runtime.parse_cache = ParseCache(max_entries=10)
+    fake_llm.set_response({"title": "Take out the trash", "project_id": 1})
+    hass = FakeHass(base_config(CONF_DETAILED_RESPONSE=False))
+    assert asyncio.run(process_task(hass, "Take out the trash", []))[0] is True
+
+    fake_llm.set_response(None)  # a second LLM call would fail
+    ok, _msg, title = asyncio.run(process_task(hass, "take out the trash.", []))
+    assert ok is True
+    assert title == "Take out the trash"
+    assert len(fake_vikunja._tasks_created) == 2
+    assert runtime.parse_cache.hits == 1
+
+
+class BrokenOutbox:
+    async def enqueue(self, task_data, label_ids, assignee_ids):
+        raise OSError("disk full")
+
+
+def test_process_task_creates_directly_when_outbox_save_fails(patch_apis, runtime):
+    fake_vikunja, fake_llm = patch_apis
+    runtime.outbox = BrokenOutbox()
+    fake_llm.set_response({"title": "Buy milk", "project_id": 1})
+    hass = FakeHass(base_config(CONF_DETAILED_RESPONSE=False))
+    ok, msg, _title = asyncio.run(process_task(hass, "Buy milk", []))
+    assert ok is True
+    assert [t["title"] for t in fake_vikunja._tasks_created] == ["Buy milk"]
+
+
+def test_process_task_does_not_cancel_a_slow_create(patch_apis, monkeypatch):
+    fake_vikunja, fake_llm = patch_apis
+    monkeypatch.setattr(th_mod, "CREATE_MIN_BUDGET_SECONDS", 0.01)
+    add_task = fake_vikunja.add_task
+
+    async def slow_add_task(task_data):
+        await asyncio.sleep(0.1)
+        return await add_task(task_data)
+
+    fake_vikunja.add_task = slow_add_task
+    fake_llm.set_response({"title": "Buy milk", "project_id": 1})
+    hass = FakeHass({**base_config(), CONF_COMMAND_TIMEOUT: 0.02})
+
+    async def run():
+        reply = await process_task(hass, "Buy milk", [])
+        await asyncio.sleep(0.2)
+        return reply
+
+    ok, msg, _title = asyncio.run(run())
+    assert ok is True
+    assert "still being added" in msg
+    # The create was left to finish after the reply
+    assert [t["title"] for t in fake_vikunja._tasks_created] == ["Buy milk"]
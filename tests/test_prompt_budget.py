@@ -0,0 +1,57 @@
+from custom_components.vikunja_voice_assistant.helpers.prompt_budget import (
+    KIND_LABEL,
+    RecentUsage,
+    prune_metadata,
+    similarity,
+)
+from custom_components.vikunja_voice_assistant.helpers.prompt_builder import (
+    build_task_creation_messages,
+)
+from custom_components.vikunja_voice_assistant.helpers.records import (
+    LabelRecord,
+    ProjectRecord,
+)
+
+PROJECTS = [ProjectRecord(1, "Inbox")] + [
+    ProjectRecord(i, f"Client project {i}") for i in range(2, 60)
+]
+PROJECTS.append(ProjectRecord(99, "Garden"))
+LABELS = [LabelRecord(i, f"tag-{i}") for i in range(100, 160)]
+
+
+def test_similarity_prefers_names_in_the_utterance():
+    assert similarity("water the garden tomorrow", "Garden") == 1.0
+    assert similarity("water the gardn", "Garden") > similarity("water", "Garden")
+    assert similarity("anything", "") == 0.0
+
+
+def test_prune_keeps_relevant_entries_and_default_project():
+    pruned = prune_metadata(
+        "water the garden with tag-150", PROJECTS, LABELS, [], budget=120
+    )
+    assert '"Inbox"' in pruned.projects
+    assert '"Garden"' in pruned.projects
+    assert '"tag-150"' in pruned.labels
+    assert '"Client project 7"' not in pruned.projects
+    assert pruned.users == ""
+
+
+def test_recent_usage_breaks_ties():
+    usage = RecentUsage()
+    usage.record(KIND_LABEL, [130, 131, 130])
+    pruned = prune_metadata("call mom", [], LABELS, [], budget=40, usage=usage)
+    assert pruned.labels.startswith('[{"id": 130')
+
+
+def test_prompt_is_only_pruned_over_budget():
+    full = build_task_creation_messages("water the garden", PROJECTS, LABELS)
+    small = build_task_creation_messages(
+        "water the garden", PROJECTS, LABELS, budget=200
+    )
+    assert "Client project 7" in full[0]["content"]
+    assert "Client project 7" not in small[0]["content"]
+    assert "Garden" in small[0]["content"]
+    roomy = build_task_creation_messages(
+        "water the garden", PROJECTS, LABELS, budget=100000
+    )
+    assert roomy[0]["content"] == full[0]["content"]
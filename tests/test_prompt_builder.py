@@ -1,5 +1,9 @@
+from custom_components.vikunja_voice_assistant.helpers.metadata_index import (
+    MetadataIndex,
+)
 from custom_components.vikunja_voice_assistant.helpers.prompt_builder import (
     build_task_creation_messages,
+    prompt_block_stats,
 )
 
 
@@ -34,3 +38,81 @@ def test_prompt_builder_with_users():
     system = msgs[0]["content"]
     assert "Available users" in system or "Available users" in system  # tolerant check
     assert "assignee" in system
+
+
+def test_prompt_prefix_is_byte_stable_across_commands():
+    index = MetadataIndex.build(
+        [{"id": 1, "title": "General"}], [{"id": 5, "title": "groceries"}]
+    )
+    first = build_task_creation_messages(
+        "Buy milk", None, None, default_due_date="tomorrow", index=index
+    )
+    second = build_task_creation_messages(
+        "Call mom", None, None, default_due_date="tomorrow", index=index
+    )
+    # Time and utterance live in the user message only
+    assert first[0]["content"] == second[0]["content"]
+    assert "Current date/time" not in first[0]["content"]
+    assert "Create task: Call mom" in second[1]["content"]
+    assert "Default due date: " in second[1]["content"]
+
+    stats = prompt_block_stats()
+    assert stats["metadata_hits"] >= 1
+    assert stats["bytes"]["static"] > stats["bytes"]["volatile"] > 0
+
+
+def test_metadata_block_follows_index_version():
+    old = build_task_creation_messages(
+        "x", [{"id": 1, "title": "General"}], [{"id": 5, "title": "a"}]
+    )[0]["content"]
+    new = build_task_creation_messages(
+        "x", [{"id": 1, "title": "General"}], [{"id": 6, "title": "b"}]
+    )[0]["content"]
+    static_len = old.index("Available projects")
+    assert old[:static_len] == new[:static_len]
+    assert '"name": "b"' in new and '"name": "b"' not in old
+
+
+def test_metadata_block_is_reused_for_an_equal_index():
+    def build():
+        index = MetadataIndex.build(
+            [{"id": 1, "title": "General"}], [{"id": 5, "title": "memo"}]
+        )
+        return build_task_creation_messages("x", None, None, index=index)
+
+    first = build()
+    hits = prompt_block_stats()["metadata_hits"]
+    # A rebuilt index with the same data has the same version
+    assert build()[0]["content"] == first[0]["content"]
+    assert prompt_block_stats()["metadata_hits"] == hits + 1
+
+
+def test_table_encoding_lists_one_row_per_entry():
+    msgs = build_task_creation_messages(
+        "Assign report to Alice",
+        [{"id": 1, "title": "General"}, {"id": 2, "title": "Home|Garden"}],
+        [{"id": 5, "title": "groceries"}],
+        users=[{"id": 2, "name": "Alice", "username": "alice"}],
+        enable_user_assignment=True,
+        encoding="table",
+    )
+    system = msgs[0]["content"]
+    assert "Available projects (id|name):\n1|General\n2|Home/Garden\n" in system
+    assert "Available labels (id|name):\n5|groceries" in system
+    assert "Available users (id|name|username):\n2|Alice|alice" in system
+    assert '"name"' not in system[system.index("Available projects") :]
+
+
+def test_compact_output_swaps_only_the_answer_format():
+    args = ("Take vitamins daily", [{"id": 1, "title": "General"}], [])
+    full = build_task_creation_messages(*args, default_due_date="tomorrow")
+    compact = build_task_creation_messages(
+        *args, default_due_date="tomorrow", compact_output=True
+    )
+    assert "COMPACT OUTPUT KEYS" not in full[0]["content"]
+    assert "COMPACT OUTPUT KEYS" in compact[0]["content"]
+    assert '"repeat_after": 86400' not in compact[0]["content"]
+    assert "PRIORITY LEVELS" in compact[0]["content"]
+    # Default due date is given in the short date format as well
+    assert "Default due date: " in compact[1]["content"]
+    assert ":00Z" not in compact[1]["content"].split("Default due date: ")[1]
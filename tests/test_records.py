@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from custom_components.vikunja_voice_assistant.helpers import records
+from custom_components.vikunja_voice_assistant.helpers.records import (
+    LabelRecord,
+    RecordStreamDecoder,
+    UserRecord,
+)
+
+LABELS = [
+    {
+        "id": i,
+        "title": f"läbel {i}",
+        "hex_color": "ff0000",
+        "created_by": {"id": 1, "username": "admin", "name": "Admin"},
+        "description": 'quotes " and ] brackets, too',
+    }
+    for i in range(1, 30)
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(records, "orjson", None)
+    elif records.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 100_000])
+def test_decoder_projects_array_in_any_chunking(backend, chunk_size):
+    body = json.dumps(LABELS, ensure_ascii=False, indent=1).encode()
+    decoder = RecordStreamDecoder(LabelRecord.from_json)
+    for start in range(0, len(body), chunk_size):
+        decoder.feed(body[start : start + chunk_size])
+    result = decoder.close()
+    assert result == [LabelRecord(id=i, title=f"läbel {i}") for i in range(1, 30)]
+    assert decoder.size == len(body)
+
+
+def test_decoder_skips_unusable_items_and_non_arrays(backend):
+    decoder = RecordStreamDecoder(UserRecord.from_json)
+    decoder.feed(b'[{"id": 3, "username": "sam"}, {"name": "no id"}, 7]')
+    assert decoder.close() == [UserRecord(id=3, username="sam", name="")]
+
+    decoder = RecordStreamDecoder(UserRecord.from_json)
+    decoder.feed(b'{"message": "not a list"}')
+    assert decoder.close() == []
+
+
+def test_decoder_rejects_truncated_body(backend):
+    decoder = RecordStreamDecoder(LabelRecord.from_json)
+    decoder.feed(b'[{"id": 1, "title": "a"}, {"id": 2')
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+def test_records_are_slotted_with_mapping_access():
+    label = LabelRecord(id=1, title="Home")
+    assert not hasattr(label, "__dict__")
+    assert label.get("title") == "Home"
+    assert label.get("hex_color", "none") == "none"
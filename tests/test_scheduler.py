@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from custom_components.vikunja_voice_assistant.helpers.scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    RequestScheduler,
+    current_priority,
+    request_priority,
+)
+
+
+async def test_admits_within_burst_without_queueing():
+    scheduler = RequestScheduler(rate=1, burst=3, max_concurrent=10)
+    for _ in range(3):
+        assert await scheduler.acquire() == 0.0
+    stats = scheduler.as_dict()["classes"]["interactive"]
+    assert stats["granted"] == 3 and stats["queued"] == 0
+
+
+async def test_interactive_overtakes_queued_background():
+    scheduler = RequestScheduler(rate=1000, burst=1, max_concurrent=1)
+    order = []
+
+    async def request(name, priority):
+        async with scheduler.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire()  # occupy the only slot
+    waiters = [
+        asyncio.ensure_future(request("bg1", PRIORITY_BACKGROUND)),
+        asyncio.ensure_future(request("bg2", PRIORITY_BACKGROUND)),
+    ]
+    await asyncio.sleep(0)
+    waiters.append(asyncio.ensure_future(request("voice", PRIORITY_INTERACTIVE)))
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth(PRIORITY_BACKGROUND) == 2
+    assert scheduler.queue_depth(PRIORITY_INTERACTIVE) == 1
+
+    scheduler.release()
+    await asyncio.gather(*waiters)
+    assert order == ["voice", "bg1", "bg2"]
+    classes = scheduler.as_dict()["classes"]
+    assert classes["background"]["queued"] == 2
+    assert classes["background"]["max_wait_ms"] >= 0
+
+
+async def test_token_bucket_limits_rate():
+    scheduler = RequestScheduler(rate=50, burst=1, max_concurrent=10)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for _ in range(4):
+        await scheduler.acquire()
+        scheduler.release()
+    # One token up front, then three refills at 50/s
+    assert loop.time() - started == pytest.approx(0.06, abs=0.04)
+
+
+async def test_cancelled_waiter_does_not_leak_slot():
+    scheduler = RequestScheduler(rate=1000, burst=5, max_concurrent=1)
+    await scheduler.acquire()
+    waiter = asyncio.ensure_future(scheduler.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    scheduler.release()
+    assert await asyncio.wait_for(scheduler.acquire(), 1) == pytest.approx(0, abs=0.01)
+    assert scheduler.queue_depth() == 0
+
+
+async def test_priority_context_propagates_to_tasks():
+    async def read_priority():
+        return current_priority()
+
+    assert current_priority() == PRIORITY_INTERACTIVE
+    with request_priority(PRIORITY_BACKGROUND):
+        assert await asyncio.gather(read_priority()) == [PRIORITY_BACKGROUND]
+    assert current_priority() == PRIORITY_INTERACTIVE
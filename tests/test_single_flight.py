@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from custom_components.vikunja_voice_assistant.helpers.single_flight import (
+    SingleFlight,
+)
+
+
+async def test_callers_with_same_key_share_result():
+    flight = SingleFlight()
+    calls = 0
+    gate = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await gate.wait()
+        return ["inbox"]
+
+    waiters = [asyncio.ensure_future(flight.run("projects", fetch)) for _ in range(3)]
+    other = asyncio.ensure_future(flight.run("labels", fetch))
+    await asyncio.sleep(0)
+    assert flight.in_flight() == 2
+    gate.set()
+    assert await asyncio.gather(*waiters, other) == [["inbox"]] * 4
+    assert calls == 2
+    assert flight.stats.as_dict() == {
+        "calls": 4,
+        "coalesced": 2,
+        "coalesced_rate": 0.5,
+    }
+    assert flight.in_flight() == 0
+
+
+async def test_errors_reach_every_caller_and_release_key():
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0)
+        raise RuntimeError("down")
+
+    results = await asyncio.gather(
+        flight.run("k", boom), flight.run("k", boom), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.in_flight() == 0
+
+
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+    gate = asyncio.Event()
+
+    async def fetch():
+        await gate.wait()
+        return 42
+
+    first = asyncio.ensure_future(flight.run("k", fetch))
+    second = asyncio.ensure_future(flight.run("k", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    gate.set()
+    assert await second == 42
@@ -0,0 +1,89 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from custom_components.vikunja_voice_assistant.helpers.records import (
+    LabelRecord,
+    ProjectRecord,
+)
+from custom_components.vikunja_voice_assistant.metadata_cache import MetadataCache
+from custom_components.vikunja_voice_assistant.snapshot import (
+    SNAPSHOT_VERSION,
+    MetadataSnapshotStore,
+)
+from custom_components.vikunja_voice_assistant.user_cache import UserCache
+
+
+class FakeHass:
+    def __init__(self, config_dir):
+        self.config = SimpleNamespace(config_dir=str(config_dir))
+
+    async def async_add_executor_job(self, func, *args):
+        return func(*args)
+
+    def async_create_background_task(self, target, name):
+        return asyncio.ensure_future(target)
+
+
+class FakeAPI:
+    def __init__(self):
+        self.calls = 0
+
+    async def list_projects(self):
+        self.calls += 1
+        return [ProjectRecord(1, "Inbox"), ProjectRecord(2, "Home")]
+
+    async def list_labels(self):
+        self.calls += 1
+        return [LabelRecord(5, "errand"), LabelRecord(9, "Voice")]
+
+
+def _make(tmp_path, api=None, delay=0.01):
+    hass = FakeHass(tmp_path)
+    cache = MetadataCache(hass, api or FakeAPI(), ttl=300)
+    users = SimpleNamespace(data=UserCache())
+    return cache, users, MetadataSnapshotStore(hass, cache, users, delay=delay)
+
+
+async def test_saves_are_coalesced_and_compact(tmp_path):
+    cache, users, store = _make(tmp_path)
+    cache.add_listener(store.schedule_save)
+    await cache.async_refresh()  # two changes -> two save requests
+    users.data.users = [{"id": 3, "username": "sam", "name": "Sam"}]
+    store.schedule_save()
+    await asyncio.sleep(0.05)
+
+    assert store.saves == 1
+    assert store.coalesced == 2
+    raw = json.loads((tmp_path / "vikunja_metadata.json").read_text())
+    assert raw["version"] == SNAPSHOT_VERSION
+    assert raw["projects"] == [[1, "Inbox"], [2, "Home"]]
+    assert raw["users"] == [[3, "sam", "Sam"]]
+    assert raw["voice_label_id"] == 9
+
+    # Unchanged state is not written again
+    await store.async_save()
+    assert store.saves == 1
+
+
+async def test_load_seeds_caches_for_warm_first_command(tmp_path):
+    cache, users, store = _make(tmp_path)
+    await cache.async_refresh()
+    users.data.users = [{"id": 3, "username": "sam", "name": "Sam"}]
+    await store.async_save()
+
+    api = FakeAPI()
+    cache, users, store = _make(tmp_path, api=api)
+    snapshot = await store.async_load()
+    assert snapshot.voice_label_id == 9
+    assert users.data.users == [{"id": 3, "username": "sam", "name": "Sam"}]
+    assert [p.title for p in await cache.get_projects()] == ["Inbox", "Home"]
+    assert cache.as_dict()["misses"] == 0  # served from the snapshot
+
+
+async def test_other_versions_are_ignored(tmp_path):
+    (tmp_path / "vikunja_metadata.json").write_text(
+        json.dumps({"version": SNAPSHOT_VERSION + 1, "projects": [[1, "x"]]})
+    )
+    _cache, _users, store = _make(tmp_path)
+    assert await store.async_load() is None
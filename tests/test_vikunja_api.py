@@ -0,0 +1,346 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from custom_components.vikunja_voice_assistant.api.vikunja_api import VikunjaAPI
+from custom_components.vikunja_voice_assistant.helpers.records import (
+    LabelRecord,
+    ProjectRecord,
+)
+from custom_components.vikunja_voice_assistant.helpers.scheduler import (
+    PRIORITY_BACKGROUND,
+    RequestScheduler,
+    request_priority,
+)
+
+
+class FakeVikunjaServer:
+    """Local HTTP stand-in for the subset of the Vikunja API the client uses."""
+
+    def __init__(self):
+        self.projects = [{"id": 1, "title": "Inbox"}, {"id": 2, "title": "Home"}]
+        self.labels = [{"id": 5, "title": "errand"}]
+        self.requests = []
+        self.fail_paths = set()
+        self.fail_pages = set()
+        self.etag = None
+        self.bulk_enabled = True
+        self.version = "v0.24.1"
+        self.embed_relations = True
+        self.embed_only = None  # label ids kept on create, None for all
+        self.missing_labels = set()  # label ids the server answers 404 for
+        self.app = web.Application(middlewares=[self._record])
+        self.app.router.add_get("/api/v1/projects", self._projects)
+        self.app.router.add_get("/api/v1/labels", self._labels)
+        self.app.router.add_get("/api/v1/info", self._info)
+        self.app.router.add_put("/api/v1/labels", self._create_label)
+        self.app.router.add_put("/api/v1/projects/{pid}/tasks", self._create_task)
+        self.app.router.add_put("/api/v1/tasks/{tid}/labels", self._add_label)
+        self.app.router.add_put("/api/v1/tasks/{tid}/assignees", self._ok)
+        self.app.router.add_post("/api/v1/tasks/{tid}/labels/bulk", self._bulk)
+        self.app.router.add_post("/api/v1/tasks/{tid}/assignees/bulk", self._bulk)
+
+    @web.middleware
+    async def _record(self, request, handler):
+        body = await request.json() if request.can_read_body else None
+        self.requests.append((request.method, request.path, body))
+        page = request.query.get("page")
+        if request.path in self.fail_paths or (request.path, page) in self.fail_pages:
+            return web.Response(status=500, text="boom")
+        return await handler(request)
+
+    def _paginate(self, request, items):
+        per_page = int(request.query.get("per_page", 50))
+        page = int(request.query.get("page", 1))
+        total_pages = max(1, -(-len(items) // per_page))
+        chunk = items[(page - 1) * per_page : page * per_page]
+        return web.json_response(
+            chunk, headers={"x-pagination-total-pages": str(total_pages)}
+        )
+
+    async def _projects(self, request):
+        return self._paginate(request, self.projects)
+
+    async def _labels(self, request):
+        if self.etag is not None:
+            if request.headers.get("If-None-Match") == self.etag:
+                return web.Response(status=304)
+            response = self._paginate(request, self.labels)
+            response.headers["ETag"] = self.etag
+            return response
+        return self._paginate(request, self.labels)
+
+    async def _create_label(self, request):
+        body = await request.json()
+        return web.json_response({"id": 99, "title": body["title"]})
+
+    async def _info(self, request):
+        return web.json_response({"version": self.version})
+
+    async def _create_task(self, request):
+        body = await request.json()
+        if any(lbl["id"] in self.missing_labels for lbl in body.get("labels", [])):
+            raise web.HTTPNotFound()
+        if not self.embed_relations:
+            body.pop("labels", None)
+            body.pop("assignees", None)
+        elif self.embed_only is not None:
+            body["labels"] = [
+                lbl for lbl in body.get("labels", []) if lbl["id"] in self.embed_only
+            ]
+        return web.json_response({"id": 123, **body})
+
+    async def _bulk(self, request):
+        if not self.bulk_enabled:
+            raise web.HTTPNotFound()
+        return web.json_response({})
+
+    async def _add_label(self, request):
+        body = await request.json()
+        if body["label_id"] in self.missing_labels:
+            raise web.HTTPNotFound()
+        return web.json_response({})
+
+    async def _ok(self, request):
+        return web.json_response({})
+
+
+@pytest.fixture
+async def vikunja_server():
+    fake = FakeVikunjaServer()
+    server = TestServer(fake.app)
+    await server.start_server()
+    fake.url = str(server.make_url("/api/v1"))
+    try:
+        yield fake
+    finally:
+        await server.close()
+
+
+@pytest.fixture
+async def api(vikunja_server):
+    async with aiohttp.ClientSession() as session:
+        yield VikunjaAPI(None, vikunja_server.url, "token", session=session)
+
+
+async def test_get_projects_and_labels(api, vikunja_server):
+    assert await api.get_projects() == [
+        ProjectRecord.from_json(p) for p in vikunja_server.projects
+    ]
+    assert await api.get_labels() == [
+        LabelRecord.from_json(lbl) for lbl in vikunja_server.labels
+    ]
+    assert await api.test_connection() is True
+
+
+async def test_add_task_and_enrichment(api, vikunja_server):
+    task = await api.add_task({"title": "Buy milk", "project_id": 2})
+    assert task["id"] == 123
+    assert await api.add_label_to_task(123, 5) is True
+    assert await api.assign_user_to_task(123, 7) is True
+    paths = [(m, p) for m, p, _ in vikunja_server.requests]
+    assert ("PUT", "/api/v1/projects/2/tasks") in paths
+    assert ("PUT", "/api/v1/tasks/123/labels") in paths
+    assert ("PUT", "/api/v1/tasks/123/assignees") in paths
+
+
+async def test_failures_fall_back(api, vikunja_server):
+    vikunja_server.fail_paths = {"/api/v1/projects", "/api/v1/projects/1/tasks"}
+    assert await api.get_projects() == []
+    assert await api.add_task({"title": "x", "project_id": 1}) is None
+    assert await api.add_task({"project_id": 1}) is None
+    assert await api.test_connection() is False
+
+
+async def test_pooled_client_reuses_connections(vikunja_server):
+    api = VikunjaAPI.with_connection_pool(
+        None, vikunja_server.url, "token", pool_size=2, keepalive_timeout=30
+    )
+    try:
+        await api.get_projects()
+        await api.get_labels()
+        connector = api._session.connector
+        assert connector.limit == 2
+        # Both calls went over the same kept-alive connection
+        assert sum(len(v) for v in connector._conns.values()) == 1
+    finally:
+        await api.async_close()
+    assert api._session.closed
+
+
+async def test_get_labels_fetches_every_page(api, vikunja_server):
+    vikunja_server.labels = [{"id": i, "title": f"l{i}"} for i in range(1, 12)]
+    labels = await api.get_labels(per_page=3)
+    assert [label.id for label in labels] == list(range(1, 12))
+    pages = [p for m, p, _ in vikunja_server.requests if p == "/api/v1/labels"]
+    assert len(pages) == 4
+
+
+async def test_iter_projects_streams_in_order(api, vikunja_server):
+    vikunja_server.projects = [{"id": i, "title": f"p{i}"} for i in range(1, 8)]
+    seen = [p.id async for p in api.iter_projects(per_page=2)]
+    assert seen == list(range(1, 8))
+
+
+async def test_failed_page_fails_whole_fetch(api, vikunja_server):
+    vikunja_server.labels = [{"id": i, "title": f"l{i}"} for i in range(1, 5)]
+    vikunja_server.fail_pages = {("/api/v1/labels", "2")}
+    assert await api.get_labels(per_page=2) == []
+
+
+async def test_conditional_get_reuses_decoded_body(api, vikunja_server):
+    vikunja_server.etag = '"v1"'
+    first = await api.get_labels()
+    second = await api.get_labels()
+    assert first == second == [LabelRecord(id=5, title="errand")]
+    assert api.conditional_stats.hits == 1
+    assert api.conditional_stats.misses == 1
+    assert api.conditional_stats.bytes_saved > 0
+
+    # A changed validator is a miss and refreshes the cached body
+    vikunja_server.etag = '"v2"'
+    vikunja_server.labels = [{"id": 6, "title": "new"}]
+    assert await api.get_labels() == [LabelRecord(id=6, title="new")]
+    assert api.conditional_stats.as_dict()["misses"] == 2
+
+
+async def test_enrich_task_uses_bulk_endpoints(api, vikunja_server):
+    result = await api.enrich_task(123, [5, 6, 7], [8, 9])
+    assert result.ok and result.used_bulk
+    assert result.attached_labels == [5, 6, 7]
+    assert result.assigned_users == [8, 9]
+    paths = [p for _m, p, _b in vikunja_server.requests]
+    assert paths.count("/api/v1/tasks/123/labels/bulk") == 1
+    assert "/api/v1/tasks/123/labels" not in paths
+
+
+async def test_enrich_task_falls_back_to_concurrent_single_calls(api, vikunja_server):
+    vikunja_server.bulk_enabled = False
+    vikunja_server.fail_paths = {"/api/v1/tasks/123/assignees"}
+    result = await api.enrich_task(123, [5, 6], [8])
+    assert not result.used_bulk
+    assert sorted(result.attached_labels) == [5, 6]
+    assert result.failed_users == [8]
+    assert not result.ok
+
+    # Unsupported bulk endpoints are remembered and not probed again
+    vikunja_server.requests.clear()
+    await api.enrich_task(124, [5, 6], [])
+    paths = [p for _m, p, _b in vikunja_server.requests]
+    assert "/api/v1/tasks/124/labels/bulk" not in paths
+
+
+async def test_add_task_with_embedded_relations(api, vikunja_server):
+    task, pending_labels, pending_users = await api.add_task_with_relations(
+        {"title": "Buy milk", "project_id": 2}, [5, 6], [8]
+    )
+    assert task["id"] == 123
+    assert pending_labels == [] and pending_users == []
+    creates = [b for m, p, b in vikunja_server.requests if p.endswith("/tasks")]
+    assert creates[-1]["labels"] == [{"id": 5}, {"id": 6}]
+    assert creates[-1]["assignees"] == [{"id": 8}]
+
+
+async def test_add_task_with_relations_falls_back_when_ignored(api, vikunja_server):
+    vikunja_server.embed_relations = False
+    _task, pending_labels, pending_users = await api.add_task_with_relations(
+        {"title": "Buy milk", "project_id": 2}, [5], [8]
+    )
+    assert pending_labels == [5] and pending_users == [8]
+
+    # Later creates no longer embed relations
+    vikunja_server.requests.clear()
+    await api.add_task_with_relations({"title": "Eggs", "project_id": 2}, [5], [])
+    creates = [b for m, p, b in vikunja_server.requests if p.endswith("/tasks")]
+    assert "labels" not in creates[-1]
+
+
+async def test_bulk_enrichment_keeps_embedded_relations(api, vikunja_server):
+    # The server kept label 5 on create but dropped 6 and 7
+    vikunja_server.embed_only = {5}
+    task, pending_labels, _users = await api.add_task_with_relations(
+        {"title": "Buy milk", "project_id": 2}, [5, 6, 7], []
+    )
+    assert pending_labels == [6, 7]
+    result = await api.enrich_task(task["id"], pending_labels, [], attached_labels=[5])
+    assert result.attached_labels == [6, 7]
+    bulk = [b for m, p, b in vikunja_server.requests if p.endswith("/labels/bulk")]
+    # Bulk replaces the task's labels, so the embedded one is sent along
+    assert bulk == [{"labels": [{"id": 5}, {"id": 6}, {"id": 7}]}]
+
+
+async def test_rejected_embedded_create_is_retried_without_relations(
+    api, vikunja_server
+):
+    vikunja_server.missing_labels = {6}  # e.g. a deleted "voice" label
+    task, pending_labels, pending_users = await api.add_task_with_relations(
+        {"title": "Buy milk", "project_id": 2}, [5, 6], [8]
+    )
+    assert task["id"] == 123
+    assert pending_labels == [5, 6] and pending_users == [8]
+    creates = [b for m, p, b in vikunja_server.requests if p.endswith("/tasks")]
+    assert "labels" not in creates[-1] and "assignees" not in creates[-1]
+
+    # The missing label fails on its own when the rest is attached
+    vikunja_server.bulk_enabled = False
+    result = await api.enrich_task(123, pending_labels, pending_users)
+    assert result.attached_labels == [5] and result.failed_labels == [6]
+
+
+async def test_transient_create_failure_is_not_retried_plain(api, vikunja_server):
+    vikunja_server.fail_paths = {"/api/v1/projects/2/tasks"}
+    task, _labels, _users = await api.add_task_with_relations(
+        {"title": "Buy milk", "project_id": 2}, [5], []
+    )
+    assert task is None
+    creates = [b for m, p, b in vikunja_server.requests if p.endswith("/tasks")]
+    assert all("labels" in body for body in creates)
+
+
+async def test_old_server_skips_embedding(api, vikunja_server):
+    vikunja_server.version = "v0.21.0"
+    _task, pending_labels, _users = await api.add_task_with_relations(
+        {"title": "Buy milk", "project_id": 2}, [5], []
+    )
+    assert pending_labels == [5]
+    creates = [b for m, p, b in vikunja_server.requests if p.endswith("/tasks")]
+    assert "labels" not in creates[-1]
+
+
+async def test_requests_pass_through_scheduler(api, vikunja_server):
+    api.scheduler = RequestScheduler(rate=100, burst=2, max_concurrent=2)
+    with request_priority(PRIORITY_BACKGROUND):
+        await api.get_projects()
+    await api.get_labels()
+    classes = api.scheduler.as_dict()["classes"]
+    assert classes["background"]["granted"] == 1
+    assert classes["interactive"]["granted"] == 1
+
+
+async def test_concurrent_identical_reads_share_one_request(api, vikunja_server):
+    first, second, labels = await asyncio.gather(
+        api.get_projects(), api.get_projects(), api.get_labels()
+    )
+    assert first == second and labels
+    gets = [p for m, p, _b in vikunja_server.requests if m == "GET"]
+    assert gets.count("/api/v1/projects") == 1
+    assert api.coalescing_stats["coalesced"] == 1
+
+    # Once finished, the next read goes to the server again
+    await api.get_projects()
+    gets = [p for m, p, _b in vikunja_server.requests if m == "GET"]
+    assert gets.count("/api/v1/projects") == 2
+
+
+async def test_reads_are_only_shared_within_one_priority(api, vikunja_server):
+    async def background_read():
+        with request_priority(PRIORITY_BACKGROUND):
+            return await api.get_projects()
+
+    await asyncio.gather(background_read(), api.get_projects())
+    gets = [p for m, p, _b in vikunja_server.requests if m == "GET"]
+    assert gets.count("/api/v1/projects") == 2
+    assert api.coalescing_stats["coalesced"] == 0
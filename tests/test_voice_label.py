@@ -0,0 +1,98 @@
+import asyncio
+
+from custom_components.vikunja_voice_assistant.api.vikunja_api import (
+    VikunjaRequestError,
+)
+from custom_components.vikunja_voice_assistant.helpers.records import LabelRecord
+from custom_components.vikunja_voice_assistant.metadata_cache import MetadataCache
+from custom_components.vikunja_voice_assistant.voice_label import VoiceLabelResolver
+
+
+class FakeHass:
+    def async_create_background_task(self, target, name):
+        return asyncio.ensure_future(target)
+
+
+class FakeAPI:
+    def __init__(self, labels=None):
+        self.labels = list(labels or [])
+        self.label_calls = 0
+        self.created = []
+
+    async def list_projects(self):
+        return []
+
+    async def list_labels(self):
+        self.label_calls += 1
+        return list(self.labels)
+
+    async def create_label(self, title):
+        await asyncio.sleep(0)  # let a concurrent caller race us
+        label = {"id": 100 + len(self.created), "title": title}
+        self.created.append(label)
+        self.labels.append(LabelRecord(label["id"], title))
+        return label
+
+
+def _resolver(api):
+    return VoiceLabelResolver(api, MetadataCache(FakeHass(), api, ttl=300))
+
+
+async def test_concurrent_first_commands_create_one_label():
+    api = FakeAPI()
+    resolver = _resolver(api)
+    ids = await asyncio.gather(*(resolver.resolve() for _ in range(5)))
+    assert ids == [100] * 5
+    assert len(api.created) == 1
+    assert resolver.as_dict()["lookups"] == 1
+    # Created label is visible to the prompt without refetching labels
+    assert (await resolver.metadata_cache.get_index()).label_id("voice") == 100
+
+
+async def test_resolved_id_is_memoized_until_attach_fails():
+    api = FakeAPI([LabelRecord(7, "Voice")])
+    resolver = _resolver(api)
+    changes = []
+    resolver.add_listener(lambda: changes.append(resolver.label_id))
+    assert await resolver.resolve() == 7
+    assert await resolver.resolve() == 7
+    assert api.label_calls == 1
+
+    resolver.attach_failed(3)  # some other label
+    assert resolver.label_id == 7
+    api.labels = [LabelRecord(8, "voice")]  # deleted and recreated elsewhere
+    resolver.attach_failed(7)
+    assert await resolver.resolve() == 8
+    assert api.label_calls == 2
+    assert not api.created
+    assert changes == [7, None, 8]
+
+
+async def test_seeded_id_skips_the_lookup():
+    api = FakeAPI()
+    resolver = _resolver(api)
+    resolver.seed(42)
+    assert await resolver.resolve() == 42
+    assert api.label_calls == 0
+
+
+async def test_label_is_not_created_when_labels_fail_to_load():
+    api = FakeAPI()
+
+    async def failing_list_labels():
+        raise VikunjaRequestError("boom", status=500)
+
+    api.list_labels = failing_list_labels
+    resolver = _resolver(api)
+    assert await resolver.resolve() is None
+    assert not api.created
+
+
+async def test_stale_labels_are_refetched_before_creating():
+    api = FakeAPI()
+    resolver = _resolver(api)
+    # Snapshot taken before someone added the label in Vikunja
+    resolver.metadata_cache.seed("labels", [])
+    api.labels = [LabelRecord(9, "voice")]
+    assert await resolver.resolve() == 9
+    assert not api.created
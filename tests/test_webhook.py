@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import hmac
+import json
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from custom_components.vikunja_voice_assistant.helpers.records import (
+    LabelRecord,
+    ProjectRecord,
+)
+from custom_components.vikunja_voice_assistant.metadata_cache import MetadataCache
+from custom_components.vikunja_voice_assistant.webhook import (
+    VikunjaWebhookProcessor,
+    verify_signature,
+)
+
+SECRET = "s3cret"
+
+
+class FakeHass:
+    def async_create_background_task(self, target, name):
+        return asyncio.ensure_future(target)
+
+
+class FakeAPI:
+    async def list_projects(self):
+        return []
+
+    async def list_labels(self):
+        return []
+
+
+class FakeUserCache:
+    def __init__(self):
+        self.users = {}
+
+    async def apply_user(self, user):
+        if self.users.get(user["id"]) == user:
+            return False
+        self.users[user["id"]] = user
+        return True
+
+
+def _sign(body: bytes, secret: str = SECRET) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+async def _client(processor):
+    # Local stand-in for the HA webhook endpoint
+    app = web.Application()
+    app.router.add_post("/api/webhook/test", processor.handle_request)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client
+
+
+def _processor():
+    cache = MetadataCache(FakeHass(), FakeAPI())
+    cache.seed("projects", [ProjectRecord(1, "Inbox")])
+    cache.seed("labels", [LabelRecord(5, "errand")])
+    return VikunjaWebhookProcessor(SECRET, cache, FakeUserCache())
+
+
+async def _post(client, payload, signature=None):
+    body = json.dumps(payload).encode()
+    headers = {"X-Vikunja-Signature": signature or _sign(body)}
+    return await client.post("/api/webhook/test", data=body, headers=headers)
+
+
+def test_verify_signature():
+    body = b'{"event_name": "project.created"}'
+    assert verify_signature(SECRET, body, _sign(body))
+    assert verify_signature(SECRET, body, _sign(body).upper())
+    assert not verify_signature(SECRET, body, _sign(body, "other"))
+    assert not verify_signature(SECRET, body, None)
+    assert not verify_signature("", body, _sign(body, ""))
+
+
+async def test_signed_events_update_caches():
+    processor = _processor()
+    changes = []
+    processor.metadata_cache.add_listener(lambda: changes.append(1))
+    client = await _client(processor)
+    try:
+        resp = await _post(
+            client,
+            {
+                "event_name": "project.created",
+                "data": {"project": {"id": 2, "title": "Garden"}, "doer": {"id": 7}},
+            },
+        )
+        assert resp.status == 200
+        resp = await _post(
+            client,
+            {"event_name": "label.deleted", "data": {"label": {"id": 5}}},
+        )
+        assert resp.status == 200
+        resp = await _post(
+            client,
+            {
+                "event_name": "task.updated",
+                "data": {"task": {"id": 9, "labels": [{"id": 6, "title": "voice"}]}},
+            },
+        )
+        assert resp.status == 200
+    finally:
+        await client.close()
+
+    cache = processor.metadata_cache
+    assert cache.peek("projects") == [
+        ProjectRecord(1, "Inbox"),
+        ProjectRecord(2, "Garden"),
+    ]
+    assert cache.peek("labels") == [LabelRecord(6, "voice")]
+    assert 7 in processor.user_cache.users
+    assert len(changes) == 3
+    assert processor.stats.applied == 3
+
+
+async def test_unchanged_event_is_ignored():
+    processor = _processor()
+    changed = await processor.apply_event(
+        {
+            "event_name": "project.updated",
+            "data": {"project": {"id": 1, "title": "Inbox"}},
+        }
+    )
+    assert changed is False
+    assert processor.stats.ignored == 1
+
+
+async def test_rejects_bad_signature_and_malformed_body():
+    processor = _processor()
+    client = await _client(processor)
+    try:
+        resp = await _post(
+            client,
+            {"event_name": "project.deleted", "data": {"project": {"id": 1}}},
+            signature="deadbeef",
+        )
+        assert resp.status == 401
+        body = b"not json"
+        resp = await client.post(
+            "/api/webhook/test",
+            data=body,
+            headers={"X-Vikunja-Signature": _sign(body)},
+        )
+        assert resp.status == 400
+    finally:
+        await client.close()
+
+    assert processor.metadata_cache.peek("projects") == [ProjectRecord(1, "Inbox")]
+    assert processor.stats.rejected == 2